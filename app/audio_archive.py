@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Root of the local audio archive; archiving is disabled when unset
+AUDIO_ARCHIVE_DIR = os.getenv('AUDIO_ARCHIVE_DIR', '')
+
+# Uncompressed formats are stored as lossless FLAC; already compressed
+# formats (mp3, m4a, ogg) gain nothing and are stored as uploaded
+LOSSLESS_COMPRESS_EXTENSIONS = {'wav'}
+
+def archive_enabled() -> bool:
+    """Whether uploads are kept in the local archive"""
+    return bool(AUDIO_ARCHIVE_DIR)
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 hex digest of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _archive_dir(audio_hash: str) -> str:
+    """Two-level fan-out directory for a hash, e.g. <root>/ab/cd"""
+    return os.path.join(AUDIO_ARCHIVE_DIR, audio_hash[:2], audio_hash[2:4])
+
+def audio_path(audio_hash: str) -> Optional[str]:
+    """
+    Locate archived audio by content hash.
+
+    Returns:
+        Optional[str]: Path of the stored file, or None if it is not archived
+    """
+    if not archive_enabled():
+        return None
+    directory = _archive_dir(audio_hash)
+    if not os.path.isdir(directory):
+        return None
+    for name in os.listdir(directory):
+        if name.split('.', 1)[0] == audio_hash:
+            return os.path.join(directory, name)
+    return None
+
+def _compress_lossless(source: str, target: str) -> bool:
+    """Encode source as FLAC at target; False if the encoder is unavailable"""
+    try:
+        from pydub import AudioSegment
+        AudioSegment.from_file(source).export(target, format='flac')
+        return True
+    except Exception as e:
+        logger.warning(f"FLAC compression failed, storing original audio: {str(e)}")
+        return False
+
+def archive_audio(source_path: str, filename: str) -> Optional[str]:
+    """
+    Store audio in the archive under its content hash.
+    Identical uploads are stored once; the hash is computed over the
+    original bytes so re-uploads are recognized regardless of compression.
+
+    Args:
+        source_path (str): Path of the uploaded audio file
+        filename (str): Original filename, used for the format extension
+
+    Returns:
+        Optional[str]: Content hash, or None if archiving is disabled or failed
+    """
+    if not archive_enabled():
+        return None
+    try:
+        audio_hash = file_hash(source_path)
+        if audio_path(audio_hash):
+            logger.info(f"Audio {audio_hash[:12]} already archived")
+            return audio_hash
+
+        directory = _archive_dir(audio_hash)
+        os.makedirs(directory, exist_ok=True)
+        extension = os.path.splitext(filename)[1].lower().lstrip('.') or 'bin'
+
+        # Write to a temporary name and rename, so readers never see partial files
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            if extension in LOSSLESS_COMPRESS_EXTENSIONS and _compress_lossless(source_path, temp_path):
+                extension = 'flac'
+            else:
+                shutil.copyfile(source_path, temp_path)
+            final_path = os.path.join(directory, f"{audio_hash}.{extension}")
+            os.replace(temp_path, final_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+        logger.info(f"Archived {filename} as {os.path.basename(final_path)} "
+                    f"({os.path.getsize(source_path)} -> {os.path.getsize(final_path)} bytes)")
+        return audio_hash
+
+    except Exception as e:
+        logger.error(f"Failed to archive audio {filename}: {str(e)}")
+        return None
@@ -0,0 +1,147 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+from app.db_operations_whisper import DatabaseOperations
+from app.audio_archive import archive_audio
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = {'mp3', 'wav', 'm4a', 'ogg'}
+
+# Derived audio metadata kept in the speech document; duration, language,
+# word count, processing time and archive hash are also stored as typed columns
+AUDIO_METADATA_KEYS = (
+    'language', 'duration_seconds', 'word_count',
+    'language_detection_seconds', 'transcription_seconds', 'processing_seconds',
+    'model', 'audio_hash'
+)
+
+def build_speech_data(text: str, filename: str, processed_at: Optional[str] = None,
+                      metadata: Optional[Dict] = None) -> Dict:
+    """
+    Build the speech JSONB document stored for a transcription.
+
+    Args:
+        text (str): Transcribed text
+        filename (str): Original audio filename
+        processed_at (str, optional): ISO timestamp of transcription (default: now)
+        metadata (Dict, optional): Audio metadata, e.g. the result of
+            WhisperTranscriber.process_audio_with_metadata
+
+    Returns:
+        Dict: Speech data in the format used by store_transcription
+    """
+    speech_data = {
+        'text': text,
+        'filename': filename,
+        'file_type': os.path.splitext(filename)[1].lstrip('.'),
+        'processed_at': processed_at or datetime.now().isoformat()
+    }
+    for key in AUDIO_METADATA_KEYS:
+        if metadata and metadata.get(key) is not None:
+            speech_data[key] = metadata[key]
+    return speech_data
+
+def read_transcripts(path: str) -> Iterator[Dict]:
+    """
+    Read archived transcripts from a JSON Lines file.
+    Each line must contain 'text' and may contain 'filename', 'processed_at'
+    and audio metadata such as 'language' and 'duration_seconds'.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if not item.get('text'):
+                logger.warning(f"Skipping line {line_number}: no text")
+                continue
+            yield build_speech_data(
+                item['text'],
+                item.get('filename', f"{os.path.basename(path)}:{line_number}"),
+                item.get('processed_at'),
+                item
+            )
+
+def transcribe_directory(directory: str) -> Iterator[Dict]:
+    """
+    Transcribe every supported audio file in a directory.
+    A single WhisperTranscriber is loaded and reused for all files.
+    Files are kept in the audio archive when it is enabled.
+    """
+    from app.whisper_transcribe import WhisperTranscriber
+
+    transcriber = WhisperTranscriber()
+    for name in sorted(os.listdir(directory)):
+        if os.path.splitext(name)[1].lower().lstrip('.') not in AUDIO_EXTENSIONS:
+            continue
+        path = os.path.join(directory, name)
+        result = transcriber.process_audio_with_metadata(path)
+        if not result or not result['text']:
+            logger.error(f"Transcription failed for {name}")
+            continue
+        result['audio_hash'] = archive_audio(path, name)
+        yield build_speech_data(result['text'], name, metadata=result)
+
+def ingest(items: Iterable[Dict], batch_size: int = 1000) -> List[int]:
+    """
+    Store speech documents in batches, one transaction per batch.
+
+    Args:
+        items (Iterable[Dict]): Speech data documents
+        batch_size (int): Number of rows per transaction
+
+    Returns:
+        List[int]: IDs of all stored records
+    """
+    db_ops = DatabaseOperations()
+    record_ids = []
+    batch = []
+
+    def flush():
+        success, ids = db_ops.store_transcriptions(batch)
+        if not success:
+            raise RuntimeError(f"Failed to store batch of {len(batch)} transcriptions")
+        record_ids.extend(ids)
+        logger.info(f"Stored {len(record_ids)} transcriptions so far")
+        batch.clear()
+
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return record_ids
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Backfill transcriptions into the database in batches'
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--transcripts', help='JSON Lines file with archived transcripts')
+    source.add_argument('--audio-dir', help='Directory of audio files to transcribe')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Rows per insert transaction (default: 1000)')
+
+    args = parser.parse_args()
+
+    try:
+        items = read_transcripts(args.transcripts) if args.transcripts else transcribe_directory(args.audio_dir)
+        ids = ingest(items, args.batch_size)
+        print(json.dumps({'stored': len(ids), 'ids': ids}), flush=True)
+    except Exception as e:
+        logger.error(f"Bulk ingestion failed: {str(e)}")
+        sys.exit(1)
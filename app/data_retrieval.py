@@ -1,6 +1,11 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator
+import csv
+import io
+import json
 import logging
 from datetime import datetime
+from app.db_handler import DatabaseHandler
+from app.query_filters import build_evaluation_filters
 from app.db_operations_whisper import DatabaseOperations as WhisperDB
 from app.db_operations_evaluation import DatabaseOperationsEvaluation as EvalDB
 
@@ -95,4 +100,112 @@ def get_evaluation_statistics() -> Dict:
             'pending_evaluations': 0,
             'average_mark': 0,
             'marks_distribution': {i: 0 for i in range(1, 11)}
-        } 
\ No newline at end of file
+        } 
+
+# Columns written by the export, in output order
+EXPORT_COLUMNS = [
+    'id', 'created_at', 'status', 'mark', 'filename', 'file_type',
+    'language', 'duration_seconds', 'word_count',
+    'transcription', 'evaluation', 'evaluated_at'
+]
+
+def _format_export_chunk(rows: List[tuple], export_format: str) -> str:
+    """Serialize a chunk of export rows as NDJSON or CSV lines"""
+    records = []
+    for row in rows:
+        record = dict(zip(EXPORT_COLUMNS, row))
+        for column in ('created_at', 'evaluated_at'):
+            if record[column]:
+                record[column] = record[column].isoformat()
+        records.append(record)
+
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writerows(records)
+        return buffer.getvalue()
+    return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+
+def iter_evaluations_export(
+    filters: Optional[Dict] = None,
+    export_format: str = 'ndjson',
+    chunk_size: int = 2000
+) -> Iterator[bytes]:
+    """
+    Stream evaluations as NDJSON or CSV from a named server-side cursor.
+    Only chunk_size rows are held in memory at any time, so exports of
+    any size run with bounded memory. The connection is opened and the
+    query started before this returns, so database failures raise here,
+    before a response has been sent; the returned iterator closes them.
+
+    Args:
+        filters: Keyword arguments for build_evaluation_filters
+        export_format: 'ndjson' or 'csv'
+        chunk_size: Rows fetched from the cursor per round trip
+
+    Returns:
+        Iterator[bytes]: UTF-8 encoded chunks of the export
+
+    Raises:
+        ConnectionError: The database is unavailable
+    """
+    where_clause, params = build_evaluation_filters(**(filters or {}), alias='v')
+    db = DatabaseHandler()
+    # Exports are long-running reads; keep them off the primary when a replica exists
+    if not db.connect(read_only=True):
+        raise ConnectionError("Database connection failed during export")
+
+    try:
+        # Named cursor keeps the result set on the server (DECLARE ... CURSOR)
+        cursor = db.conn.cursor(name='evaluations_export')
+        cursor.itersize = chunk_size
+        cursor.execute(f"""
+            SELECT
+                v.id,
+                v.created_at,
+                v.status,
+                v.mark,
+                p.speech->>'filename',
+                p.speech->>'file_type',
+                v.language,
+                v.duration_seconds,
+                v.word_count,
+                p.speech->>'text',
+                p.evaluation->>'text',
+                v.evaluated_at
+            FROM voice_evaluations v
+            JOIN voice_evaluation_payloads p
+              ON p.id = v.id AND p.created_at = v.created_at
+            {where_clause}
+            ORDER BY v.created_at DESC
+        """, params)
+    except Exception:
+        db.conn.rollback()
+        db.close()
+        raise
+
+    return _stream_export(db, cursor, export_format, chunk_size)
+
+def _stream_export(db: DatabaseHandler, cursor, export_format: str,
+                   chunk_size: int) -> Iterator[bytes]:
+    """Yield export chunks from an open cursor, then close cursor and connection"""
+    try:
+        if export_format == 'csv':
+            header = io.StringIO()
+            csv.writer(header).writerow(EXPORT_COLUMNS)
+            yield header.getvalue().encode('utf-8')
+
+        exported = 0
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            exported += len(rows)
+            yield _format_export_chunk(rows, export_format).encode('utf-8')
+
+        logger.info(f"Exported {exported} evaluation records as {export_format}")
+
+    finally:
+        cursor.close()
+        db.conn.rollback()
+        db.close()
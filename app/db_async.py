@@ -0,0 +1,727 @@
+import asyncpg
+import json
+import logging
+import os
+from typing import Optional, Dict, Tuple, List
+from datetime import datetime
+from dotenv import load_dotenv
+from app.query_filters import build_evaluation_filters
+from app.init_db import TEXT_SEARCH_CONFIG
+from app.db_handler import primary_params, recent_writes, replica_params, speech_metadata
+from app.record_cache import evaluation_cache, invalidate_record, transcription_cache
+from app.http_cache import data_version
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def _asyncpg_params(params: Dict) -> Dict:
+    """Convert DatabaseHandler connection parameters to asyncpg keywords"""
+    return {
+        'database': params['dbname'],
+        'user': params['user'],
+        'password': params['password'],
+        'host': params['host'],
+        'port': int(params['port'])
+    }
+
+class AsyncDatabaseHandler:
+    """
+    Asynchronous connection pool handler built on asyncpg.
+    Used by the FastAPI endpoints so that many queries can run
+    concurrently per worker without blocking the event loop.
+    """
+
+    def __init__(self):
+        """Initialize pool parameters from the same environment as DatabaseHandler"""
+        self.pool = None
+        self.read_pool = None
+        self.db_params = _asyncpg_params(primary_params())
+        replica = replica_params()
+        self.read_params = _asyncpg_params(replica) if replica else None
+        self.min_size = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+        self.max_size = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+        logger.info("Async database handler initialized")
+
+    @staticmethod
+    async def _init_connection(conn: asyncpg.Connection):
+        """Decode JSONB columns into Python objects, as psycopg2 does"""
+        await conn.set_type_codec(
+            'jsonb',
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema='pg_catalog'
+        )
+
+    async def connect(self) -> bool:
+        """Create the connection pool if it does not exist yet"""
+        if self.pool is not None:
+            return True
+        try:
+            self.pool = await asyncpg.create_pool(
+                **self.db_params,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                init=self._init_connection
+            )
+            logger.info(f"Async connection pool created (min={self.min_size}, max={self.max_size})")
+        except Exception as e:
+            logger.error(f"Async database connection failed: {str(e)}")
+            self.pool = None
+            return False
+
+        if self.read_params is not None:
+            try:
+                self.read_pool = await asyncpg.create_pool(
+                    **self.read_params,
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    init=self._init_connection
+                )
+                logger.info(f"Read replica pool created for {self.read_params['host']}:{self.read_params['port']}")
+            except Exception as e:
+                # Reads fall back to the primary pool
+                logger.warning(f"Read replica unavailable, reading from primary: {str(e)}")
+                self.read_pool = None
+        return True
+
+    async def close(self):
+        """Close all pooled connections"""
+        try:
+            if self.pool is not None:
+                await self.pool.close()
+                self.pool = None
+            if self.read_pool is not None:
+                await self.read_pool.close()
+                self.read_pool = None
+            logger.info("Async connection pool closed successfully")
+        except Exception as e:
+            logger.error(f"Error closing async connection pool: {str(e)}")
+
+class AsyncDatabaseOperations:
+    """
+    Asynchronous counterpart of DatabaseOperations and DatabaseOperationsEvaluation.
+    Return values mirror the synchronous classes so endpoints can switch freely.
+    """
+
+    def __init__(self):
+        """Initialize async handler; the pool is created in connect()"""
+        self.db = AsyncDatabaseHandler()
+
+    async def connect(self) -> bool:
+        """Open the underlying connection pool"""
+        return await self.db.connect()
+
+    async def close(self):
+        """Close the underlying connection pool"""
+        await self.db.close()
+
+    async def _acquire(self, read_only: bool = False):
+        """
+        Return the pool, connecting lazily on first use.
+
+        Args:
+            read_only (bool): Prefer the read replica pool when one is connected
+        """
+        if self.db.pool is None and not await self.db.connect():
+            raise ConnectionError("Async database pool is not available")
+        if read_only and self.db.read_pool is not None:
+            return self.db.read_pool
+        return self.db.pool
+
+    async def store_transcription(self, speech_data: Dict) -> Tuple[bool, Optional[int]]:
+        """
+        Store Whisper transcription data with pending evaluation status.
+
+        Args:
+            speech_data (Dict): Transcription data (text, filename, file_type, processed_at)
+
+        Returns:
+            Tuple[bool, Optional[int]]: (success status, record ID if successful)
+        """
+        try:
+            metadata = speech_metadata(speech_data)
+            pool = await self._acquire()
+            record_id = await pool.fetchval("""
+                WITH meta AS (
+                    INSERT INTO voice_evaluations
+                    (created_at, content_hash, duration_seconds, language,
+                     word_count, processing_seconds, audio_hash, status, mark)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, 'pending', 0)
+                    RETURNING id, created_at
+                )
+                INSERT INTO voice_evaluation_payloads (id, created_at, speech, evaluation)
+                SELECT id, created_at, $8, $9
+                FROM meta
+                RETURNING id
+                """,
+                datetime.now(),
+                metadata['content_hash'],
+                metadata['duration_seconds'],
+                metadata['language'],
+                metadata['word_count'],
+                metadata['processing_seconds'],
+                metadata['audio_hash'],
+                speech_data,
+                {'status': 'pending'}
+            )
+            if record_id is None:
+                logger.error("Failed to get inserted record ID")
+                return False, None
+
+            logger.info(f"Successfully stored transcription with ID: {record_id}")
+            # Notifications arrive asynchronously; bump now so this process
+            # does not answer 304 for its own write in the meantime
+            data_version.bump()
+            recent_writes.mark([record_id])
+            return True, record_id
+
+        except Exception as e:
+            logger.error(f"Async store_transcription failed: {str(e)}")
+            return False, None
+
+    async def store_transcriptions(self, speech_items: List[Dict]) -> Tuple[bool, List[int]]:
+        """
+        Store many transcriptions with a single INSERT ... SELECT over arrays.
+
+        Args:
+            speech_items (List[Dict]): Speech data dictionaries, as for store_transcription
+
+        Returns:
+            Tuple[bool, List[int]]: (success status, record IDs in input order)
+        """
+        if not speech_items:
+            return True, []
+
+        try:
+            metadata = [speech_metadata(speech_data) for speech_data in speech_items]
+            pool = await self._acquire()
+            # IDs are drawn up front so metadata and payload rows can be
+            # written from the same arrays in one statement
+            rows = await pool.fetch("""
+                WITH items AS (
+                    SELECT nextval('voice_evaluations_id_seq')::integer AS id, item.*
+                    FROM unnest($1::jsonb[], $2::text[], $3::real[], $4::text[],
+                                $5::integer[], $6::real[], $7::text[])
+                         WITH ORDINALITY AS item(speech, content_hash, duration_seconds, language,
+                                                 word_count, processing_seconds, audio_hash, position)
+                ),
+                meta AS (
+                    INSERT INTO voice_evaluations
+                    (id, created_at, content_hash, duration_seconds, language,
+                     word_count, processing_seconds, audio_hash, status, mark)
+                    SELECT id, $8, content_hash, duration_seconds, language,
+                           word_count, processing_seconds, audio_hash, 'pending', 0
+                    FROM items
+                )
+                INSERT INTO voice_evaluation_payloads (id, created_at, speech, evaluation)
+                SELECT id, $8, speech, $9
+                FROM items
+                ORDER BY position
+                RETURNING id
+                """,
+                speech_items,
+                [item['content_hash'] for item in metadata],
+                [item['duration_seconds'] for item in metadata],
+                [item['language'] for item in metadata],
+                [item['word_count'] for item in metadata],
+                [item['processing_seconds'] for item in metadata],
+                [item['audio_hash'] for item in metadata],
+                datetime.now(),
+                {'status': 'pending'}
+            )
+            record_ids = [row['id'] for row in rows]
+            logger.info(f"Successfully stored {len(record_ids)} transcriptions in one batch")
+            data_version.bump()
+            recent_writes.mark(record_ids)
+            return True, record_ids
+
+        except Exception as e:
+            logger.error(f"Async store_transcriptions failed: {str(e)}")
+            return False, []
+
+    async def get_transcription(self, record_id: int) -> Optional[Dict]:
+        """
+        Retrieve transcription data by ID.
+        Served from transcription_cache when possible.
+
+        Args:
+            record_id (int): Database record ID
+
+        Returns:
+            Optional[Dict]: Speech data if found
+        """
+        cached = transcription_cache.get(record_id)
+        if cached is not None:
+            return cached
+        try:
+            pool = await self._acquire(read_only=not recent_writes.contains(record_id))
+            speech = await pool.fetchval("""
+                SELECT speech
+                FROM voice_evaluation_payloads
+                WHERE id = $1
+            """, record_id)
+            if speech is not None:
+                transcription_cache.set(record_id, speech)
+            return speech
+
+        except Exception as e:
+            logger.error(f"Async get_transcription failed: {str(e)}")
+            return None
+
+    async def store_evaluation(self, record_id: int, evaluation_data: Dict) -> bool:
+        """
+        Store evaluation results for an existing record.
+
+        Args:
+            record_id (int): Database record ID
+            evaluation_data (Dict): Evaluation text, mark, evaluated_at and status
+
+        Returns:
+            bool: True if storage successful, False otherwise
+        """
+        try:
+            pool = await self._acquire()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    status = await conn.execute("""
+                        UPDATE voice_evaluation_payloads
+                        SET evaluation = $1
+                        WHERE id = $2
+                        """,
+                        evaluation_data,
+                        record_id
+                    )
+                    # asyncpg returns the command tag, e.g. 'UPDATE 1'
+                    if status.split()[-1] == '0':
+                        logger.error(f"No record found for ID: {record_id}")
+                        return False
+
+                    await conn.execute("""
+                        UPDATE voice_evaluations
+                        SET mark = $1,
+                            evaluated_at = $2,
+                            status = 'completed',
+                            claimed_by = NULL,
+                            lease_expires_at = NULL
+                        WHERE id = $3
+                        """,
+                        evaluation_data.get('mark', 0),
+                        datetime.now(),
+                        record_id
+                    )
+
+            data_version.bump()
+            recent_writes.mark([record_id])
+            invalidate_record(record_id)
+            logger.info(f"Successfully stored evaluation for ID: {record_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Async store_evaluation failed: {str(e)}")
+            return False
+
+    async def claim_record(self, record_id: int, worker_id: str, lease_seconds: int,
+                           include_finished: bool = False) -> Optional[Dict]:
+        """
+        Claim a single record for evaluation.
+        Concurrent claims on the same row serialize on the row lock, so only
+        one caller across all processes wins; the others get None.
+
+        Args:
+            record_id (int): Database record ID
+            worker_id (str): Identifier of the claiming process
+            lease_seconds (int): Lease duration before the claim expires
+            include_finished (bool): Also claim completed/failed records (re-evaluation)
+
+        Returns:
+            Optional[Dict]: Speech data if the claim succeeded
+        """
+        claimable = ['pending', 'completed', 'failed'] if include_finished else ['pending']
+        try:
+            pool = await self._acquire()
+            row = await pool.fetchrow("""
+                WITH claimed AS (
+                    UPDATE voice_evaluations
+                    SET status = 'processing',
+                        claimed_by = $2,
+                        lease_expires_at = NOW() + make_interval(secs => $3),
+                        attempts = attempts + 1
+                    WHERE id = $1
+                      AND (status = ANY($4::text[])
+                           OR (status = 'processing' AND lease_expires_at < NOW()))
+                    RETURNING id, created_at
+                )
+                SELECT p.speech
+                FROM claimed
+                JOIN voice_evaluation_payloads p
+                  ON p.id = claimed.id AND p.created_at = claimed.created_at
+            """, record_id, worker_id, float(lease_seconds), claimable)
+            if not row:
+                return None
+            # A forced re-evaluation moves a completed record back to processing
+            data_version.bump()
+            recent_writes.mark([record_id])
+            invalidate_record(record_id)
+            return {'id': record_id, 'speech': row['speech']}
+
+        except Exception as e:
+            logger.error(f"Async claim_record failed: {str(e)}")
+            return None
+
+    async def release_claim(self, record_id: int, worker_id: str, max_attempts: int) -> bool:
+        """
+        Give up a claim after a failed evaluation.
+
+        Args:
+            record_id (int): Database record ID
+            worker_id (str): Identifier of the process holding the claim
+            max_attempts (int): Attempts after which the record is marked failed
+
+        Returns:
+            bool: True if the claim was released
+        """
+        try:
+            pool = await self._acquire()
+            status = await pool.execute("""
+                UPDATE voice_evaluations
+                SET status = CASE WHEN attempts >= $3 THEN 'failed' ELSE 'pending' END,
+                    claimed_by = NULL,
+                    lease_expires_at = NULL
+                WHERE id = $1
+                  AND status = 'processing'
+                  AND claimed_by = $2
+            """, record_id, worker_id, max_attempts)
+            recent_writes.mark([record_id])
+            return status.split()[-1] != '0'
+
+        except Exception as e:
+            logger.error(f"Async release_claim failed: {str(e)}")
+            return False
+
+    async def get_evaluation(self, record_id: int, include_payload: bool = True) -> Optional[Dict]:
+        """
+        Retrieve evaluation data by ID.
+
+        Args:
+            record_id (int): Database record ID
+            include_payload (bool): Also fetch speech and evaluation documents;
+                when False only the slim metadata row is read
+
+        Returns:
+            Optional[Dict]: mark, created_at, evaluated_at and status if found, plus
+            speech and evaluation with include_payload
+        """
+        if include_payload:
+            cached = evaluation_cache.get(record_id)
+            if cached is not None:
+                return cached
+        try:
+            # Records written moments ago may not have reached the replica yet
+            pool = await self._acquire(read_only=not recent_writes.contains(record_id))
+            if include_payload:
+                row = await pool.fetchrow("""
+                    SELECT v.mark, v.created_at, v.status, v.evaluated_at, p.speech, p.evaluation
+                    FROM voice_evaluations v
+                    LEFT JOIN voice_evaluation_payloads p
+                      ON p.id = v.id AND p.created_at = v.created_at
+                    WHERE v.id = $1
+                """, record_id)
+            else:
+                row = await pool.fetchrow("""
+                    SELECT mark, created_at, status, evaluated_at
+                    FROM voice_evaluations
+                    WHERE id = $1
+                """, record_id)
+            if not row:
+                logger.info(f"No evaluation found for ID: {record_id}")
+                return None
+
+            record = {
+                'mark': row['mark'],
+                'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+                'status': row['status'],
+                'evaluated_at': row['evaluated_at'].isoformat() if row['evaluated_at'] else None
+            }
+            if include_payload:
+                record['speech'] = row['speech']
+                record['evaluation'] = row['evaluation']
+                # Pending and processing records are about to change
+                if record['status'] == 'completed':
+                    evaluation_cache.set(record_id, record)
+            return record
+
+        except Exception as e:
+            logger.error(f"Async get_evaluation failed: {str(e)}")
+            return None
+
+    async def get_all_evaluations(self, filters: Optional[Dict] = None,
+                                  limit: Optional[int] = None,
+                                  offset: int = 0) -> List[Dict]:
+        """
+        Retrieve evaluations with their transcriptions in a single query.
+        Produces the same shape as data_retrieval.get_all_evaluations.
+        Filtering and pagination run on the slim metadata table; payloads
+        are only joined for the rows on the requested page.
+
+        Args:
+            filters (Dict, optional): Keyword arguments for build_evaluation_filters
+            limit (int, optional): Maximum number of records to return
+            offset (int): Number of records to skip
+
+        Returns:
+            List[Dict]: Evaluation records, newest first
+        """
+        try:
+            where_clause, params = build_evaluation_filters(
+                **(filters or {}), placeholder='numeric', alias='v'
+            )
+            params.extend([limit, offset])
+            pool = await self._acquire(read_only=True)
+            rows = await pool.fetch(f"""
+                WITH page AS (
+                    SELECT v.id, v.created_at, v.evaluated_at, v.mark, v.status,
+                           v.language, v.duration_seconds, v.word_count
+                    FROM voice_evaluations v
+                    {where_clause}
+                    ORDER BY v.created_at DESC
+                    LIMIT ${len(params) - 1} OFFSET ${len(params)}
+                )
+                SELECT
+                    page.id,
+                    p.speech->>'text' as text,
+                    p.speech->>'filename' as filename,
+                    p.speech->>'file_type' as file_type,
+                    p.evaluation,
+                    page.mark,
+                    page.status,
+                    page.language,
+                    page.duration_seconds,
+                    page.word_count,
+                    page.evaluated_at,
+                    page.created_at
+                FROM page
+                LEFT JOIN voice_evaluation_payloads p
+                  ON p.id = page.id AND p.created_at = page.created_at
+                ORDER BY page.created_at DESC
+            """, *params)
+
+            return [
+                {
+                    'id': row['id'],
+                    'transcription': row['text'] or '',
+                    'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+                    'file_info': {
+                        'filename': row['filename'] or '',
+                        'file_type': row['file_type'] or '',
+                        'language': row['language'],
+                        'duration_seconds': row['duration_seconds'],
+                        'word_count': row['word_count']
+                    },
+                    'evaluation': row['evaluation'],
+                    'mark': row['mark'],
+                    'status': row['status'],
+                    'evaluated_at': row['evaluated_at'].isoformat() if row['evaluated_at'] else None
+                }
+                for row in rows
+            ]
+
+        except Exception as e:
+            logger.error(f"Async get_all_evaluations failed: {str(e)}")
+            return []
+
+    async def search_transcriptions(self, query: str, filters: Optional[Dict] = None,
+                                    limit: int = 20, offset: int = 0) -> List[Dict]:
+        """
+        Full-text search over transcripts using the speech_tsv GIN index.
+        Matches are ranked with ts_rank_cd; snippets are only built for the
+        requested page so highlighting cost does not grow with the match count.
+
+        Args:
+            query (str): Search text in web search syntax (quotes, OR, -word)
+            filters (Dict, optional): Keyword arguments for build_evaluation_filters
+            limit (int): Page size
+            offset (int): Number of hits to skip
+
+        Returns:
+            List[Dict]: Ranked hits with id, rank, snippet, mark, status and created_at
+        """
+        try:
+            where_clause, params = build_evaluation_filters(
+                **(filters or {}), placeholder='numeric', start_index=4, alias='v'
+            )
+            filter_clause = where_clause.replace('WHERE', 'AND', 1)
+            pool = await self._acquire(read_only=True)
+            rows = await pool.fetch(f"""
+                WITH search AS (
+                    SELECT websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', $1) AS query
+                ),
+                hits AS (
+                    SELECT
+                        v.id,
+                        p.speech,
+                        v.mark,
+                        v.status,
+                        v.created_at,
+                        ts_rank_cd(p.speech_tsv, search.query) AS rank
+                    FROM voice_evaluation_payloads p
+                    JOIN voice_evaluations v
+                      ON v.id = p.id AND v.created_at = p.created_at
+                    CROSS JOIN search
+                    WHERE p.speech_tsv @@ search.query
+                    {filter_clause}
+                    ORDER BY rank DESC, v.id DESC
+                    LIMIT $2 OFFSET $3
+                )
+                SELECT
+                    hits.id,
+                    hits.speech->>'filename' AS filename,
+                    hits.mark,
+                    hits.status,
+                    hits.created_at,
+                    hits.rank,
+                    ts_headline('{TEXT_SEARCH_CONFIG}', hits.speech->>'text', search.query,
+                                'MaxFragments=2, MinWords=5, MaxWords=20, StartSel=<b>, StopSel=</b>') AS snippet
+                FROM hits, search
+                ORDER BY hits.rank DESC, hits.id DESC
+            """, query, limit, offset, *params)
+
+            return [
+                {
+                    'id': row['id'],
+                    'filename': row['filename'] or '',
+                    'mark': row['mark'],
+                    'status': row['status'],
+                    'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+                    'rank': round(float(row['rank']), 4),
+                    'snippet': row['snippet']
+                }
+                for row in rows
+            ]
+
+        except Exception as e:
+            logger.error(f"Async search_transcriptions failed: {str(e)}")
+            return []
+
+    async def get_evaluation_statistics(self) -> Dict:
+        """
+        Get evaluation counts, average mark and mark distribution.
+        Aggregation is done in SQL instead of per-record lookups.
+        """
+        marks_distribution = {i: 0 for i in range(1, 11)}
+        try:
+            pool = await self._acquire(read_only=True)
+            async with pool.acquire() as conn:
+                totals = await conn.fetchrow("""
+                    SELECT
+                        COUNT(*) AS total_records,
+                        COUNT(*) FILTER (WHERE status = 'completed') AS evaluated_records,
+                        COUNT(*) FILTER (WHERE status IN ('pending', 'processing')) AS pending_evaluations,
+                        COUNT(*) FILTER (WHERE status = 'failed') AS failed_evaluations,
+                        AVG(mark) FILTER (WHERE status = 'completed' AND mark > 0) AS average_mark
+                    FROM voice_evaluations
+                """)
+                distribution = await conn.fetch("""
+                    SELECT mark, COUNT(*) AS count
+                    FROM voice_evaluations
+                    WHERE status = 'completed' AND mark > 0
+                    GROUP BY mark
+                """)
+                languages = await conn.fetch("""
+                    SELECT
+                        COALESCE(language, 'unknown') AS language,
+                        COUNT(*) AS records,
+                        COUNT(*) FILTER (WHERE status = 'completed') AS evaluated,
+                        AVG(mark) FILTER (WHERE status = 'completed' AND mark > 0) AS average_mark,
+                        AVG(duration_seconds) AS average_duration_seconds
+                    FROM voice_evaluations
+                    GROUP BY 1
+                    ORDER BY records DESC
+                """)
+
+            for row in distribution:
+                marks_distribution[row['mark']] = row['count']
+
+            average_mark = totals['average_mark']
+            return {
+                'total_records': totals['total_records'],
+                'evaluated_records': totals['evaluated_records'],
+                'pending_evaluations': totals['pending_evaluations'],
+                'failed_evaluations': totals['failed_evaluations'],
+                'average_mark': round(float(average_mark), 2) if average_mark is not None else 0,
+                'marks_distribution': marks_distribution,
+                'by_language': [
+                    {
+                        'language': row['language'],
+                        'records': row['records'],
+                        'evaluated': row['evaluated'],
+                        'average_mark': round(float(row['average_mark']), 2) if row['average_mark'] is not None else 0,
+                        'average_duration_seconds': round(float(row['average_duration_seconds']), 1)
+                            if row['average_duration_seconds'] is not None else None
+                    }
+                    for row in languages
+                ]
+            }
+
+        except Exception as e:
+            logger.error(f"Async get_evaluation_statistics failed: {str(e)}")
+            return {
+                'total_records': 0,
+                'evaluated_records': 0,
+                'pending_evaluations': 0,
+                'failed_evaluations': 0,
+                'average_mark': 0,
+                'marks_distribution': marks_distribution,
+                'by_language': []
+            }
+
+    async def get_trend_counts(self, bucket: str, timezone: str, start: datetime,
+                               end: datetime, language: Optional[str] = None) -> Tuple[List, List]:
+        """
+        Count ingested records and completed evaluations per time bucket.
+        Buckets are computed in SQL with date_trunc in the given time zone;
+        evaluations are bucketed by evaluated_at, ingest volume by created_at.
+
+        Args:
+            bucket (str): 'day', 'week' or 'month'
+            timezone (str): IANA time zone name used for bucket boundaries
+            start (datetime): Inclusive lower bound (aware)
+            end (datetime): Exclusive upper bound (aware)
+            language (str, optional): Only count records in this language
+
+        Returns:
+            Tuple[List, List]: (bucket, mark, count) rows for evaluations and
+            (bucket, count) rows for ingested records. Errors are raised rather
+            than returned as empty results, so zero counts are never cached.
+        """
+        where_clause, params = build_evaluation_filters(
+            language=language, placeholder='numeric', start_index=5
+        )
+        filter_clause = where_clause.replace('WHERE', 'AND', 1)
+        pool = await self._acquire(read_only=True)
+        async with pool.acquire() as conn:
+            evaluated = await conn.fetch(f"""
+                SELECT date_trunc($1, evaluated_at, $2) AS bucket, mark, COUNT(*) AS count
+                FROM voice_evaluations
+                WHERE status = 'completed'
+                  AND evaluated_at >= $3 AND evaluated_at < $4
+                  {filter_clause}
+                GROUP BY 1, 2
+            """, bucket, timezone, start, end, *params)
+            ingested = await conn.fetch(f"""
+                SELECT date_trunc($1, created_at, $2) AS bucket, COUNT(*) AS count
+                FROM voice_evaluations
+                WHERE created_at >= $3 AND created_at < $4
+                  {filter_clause}
+                GROUP BY 1
+            """, bucket, timezone, start, end, *params)
+        return evaluated, ingested
+
+# Shared instance used by the API; the pool is opened on application startup
+async_db = AsyncDatabaseOperations()
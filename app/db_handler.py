@@ -1,10 +1,14 @@
 import psycopg2
 from psycopg2.extras import Json
+from psycopg2.pool import ThreadedConnectionPool
 import logging
-from typing import Optional, Dict, Tuple
+from typing import Iterable, Optional, Dict, Tuple
 import os
 from dotenv import load_dotenv
 from datetime import datetime
+import hashlib
+import threading
+import time
 
 # Load environment variables
 load_dotenv()
@@ -16,6 +20,165 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Insert metadata and payload rows for one transcription in a single statement.
+# Parameters: created_at, content_hash, duration_seconds, language, word_count,
+# processing_seconds, audio_hash, speech, evaluation
+STORE_TRANSCRIPTION_SQL = """
+    WITH meta AS (
+        INSERT INTO voice_evaluations
+        (created_at, content_hash, duration_seconds, language, word_count,
+         processing_seconds, audio_hash, status, mark)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, 'pending', 0)
+        RETURNING id, created_at
+    )
+    INSERT INTO voice_evaluation_payloads (id, created_at, speech, evaluation)
+    SELECT id, created_at, %s::jsonb, %s::jsonb
+    FROM meta
+    RETURNING id;
+"""
+
+# Completing an evaluation writes the evaluation document into the payload
+# row, then updates metadata and releases the queue lease. Both statements
+# run in one transaction; the payload is written first so a missing record
+# is detected before metadata changes. created_at keeps the ingest time.
+# Parameters: evaluation, record_id
+STORE_EVALUATION_PAYLOAD_SQL = """
+    UPDATE voice_evaluation_payloads
+    SET evaluation = %s::jsonb
+    WHERE id = %s
+"""
+# Parameters: mark, evaluated_at, record_id
+STORE_EVALUATION_META_SQL = """
+    UPDATE voice_evaluations
+    SET mark = %s,
+        evaluated_at = %s,
+        status = 'completed',
+        claimed_by = NULL,
+        lease_expires_at = NULL
+    WHERE id = %s
+"""
+
+# Seconds after a write during which that record is read from the primary,
+# covering replication lag of the read replica
+READ_YOUR_WRITES_SECONDS = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+
+def primary_params() -> Dict:
+    """Connection parameters of the primary (read-write) database"""
+    return {
+        'dbname': os.getenv('DB_NAME', 'voice'),
+        'user': os.getenv('DB_USER', 'myadmin1'),
+        'password': os.getenv('DB_PASSWORD', 'P@ssw0rd!!!'),
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'port': os.getenv('DB_PORT', '5432')
+    }
+
+def replica_params() -> Optional[Dict]:
+    """
+    Connection parameters of the read replica, or None if DB_READ_HOST is unset.
+    Database name and credentials default to those of the primary.
+    """
+    host = os.getenv('DB_READ_HOST')
+    if not host:
+        return None
+    primary = primary_params()
+    return {
+        'dbname': os.getenv('DB_READ_NAME', primary['dbname']),
+        'user': os.getenv('DB_READ_USER', primary['user']),
+        'password': os.getenv('DB_READ_PASSWORD', primary['password']),
+        'host': host,
+        'port': os.getenv('DB_READ_PORT', primary['port'])
+    }
+
+class RecentWrites:
+    """
+    Remember which records were written in the last few seconds so reads
+    of them can bypass a possibly lagging replica. Fed by this process's
+    writes and by change notifications from other processes.
+    """
+
+    def __init__(self, window: float = READ_YOUR_WRITES_SECONDS):
+        """
+        Args:
+            window (float): Seconds a write keeps routing reads to the primary
+        """
+        self.window = window
+        self.last_write = 0.0
+        self._written: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, record_ids: Iterable[int]):
+        """Record writes to the given record IDs"""
+        now = time.monotonic()
+        with self._lock:
+            for record_id in record_ids:
+                self._written[record_id] = now
+            self.last_write = now
+            # Prune expired entries so the table stays small
+            cutoff = now - self.window
+            if len(self._written) > 1000:
+                self._written = {k: v for k, v in self._written.items() if v >= cutoff}
+
+    def contains(self, record_id: int) -> bool:
+        """Check whether the record was written within the window"""
+        with self._lock:
+            written_at = self._written.get(record_id)
+        return written_at is not None and time.monotonic() - written_at < self.window
+
+    def settled(self) -> bool:
+        """True when no write was seen within the window"""
+        return time.monotonic() - self.last_write >= self.window
+
+recent_writes = RecentWrites()
+
+_read_pool = None
+_read_pool_lock = threading.Lock()
+
+def get_read_pool() -> Optional[ThreadedConnectionPool]:
+    """Shared connection pool of the read replica, created on first use"""
+    global _read_pool
+    params = replica_params()
+    if params is None:
+        return None
+    with _read_pool_lock:
+        if _read_pool is None:
+            _read_pool = ThreadedConnectionPool(
+                int(os.getenv('DB_READ_POOL_MIN_SIZE', '1')),
+                int(os.getenv('DB_READ_POOL_MAX_SIZE', '10')),
+                **params
+            )
+            logger.info(f"Read replica pool created for {params['host']}:{params['port']}")
+    return _read_pool
+
+def content_hash(text: Optional[str]) -> str:
+    """SHA-256 hex digest of a transcript, as stored in voice_evaluations.content_hash"""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+def speech_metadata(speech_data: Dict) -> Dict:
+    """
+    Derive the metadata columns stored alongside a transcription payload.
+    Word count falls back to counting the transcript when not supplied.
+    
+    Args:
+        speech_data: Speech data dictionary
+        
+    Returns:
+        Dict: content_hash, duration_seconds, language, word_count,
+        processing_seconds and audio_hash
+    """
+    duration = speech_data.get('duration_seconds')
+    processing = speech_data.get('processing_seconds')
+    word_count = speech_data.get('word_count')
+    if word_count is None:
+        word_count = len((speech_data.get('text') or '').split())
+    return {
+        'content_hash': content_hash(speech_data.get('text')),
+        'duration_seconds': float(duration) if duration is not None else None,
+        'language': speech_data.get('language'),
+        'word_count': int(word_count),
+        'processing_seconds': float(processing) if processing is not None else None,
+        'audio_hash': speech_data.get('audio_hash')
+    }
+
 class DatabaseHandler:
     """Database connection and basic operations handler"""
     
@@ -23,17 +186,28 @@ class DatabaseHandler:
         """Initialize database connection parameters"""
         self.conn = None
         self.cursor = None
-        self.db_params = {
-            'dbname': os.getenv('DB_NAME', 'voice'),
-            'user': os.getenv('DB_USER', 'myadmin1'),
-            'password': os.getenv('DB_PASSWORD', 'P@ssw0rd!!!'),
-            'host': os.getenv('DB_HOST', 'localhost'),
-            'port': os.getenv('DB_PORT', '5432')
-        }
+        self.db_params = primary_params()
+        self._read_pool = None
         logger.info("Database handler initialized with updated connection parameters")
 
-    def connect(self) -> bool:
-        """Establish database connection"""
+    def connect(self, read_only: bool = False) -> bool:
+        """
+        Establish database connection.
+
+        Args:
+            read_only (bool): Use a pooled read replica connection when one is
+                configured; falls back to the primary if the replica is unavailable
+        """
+        if read_only:
+            try:
+                pool = get_read_pool()
+                if pool is not None:
+                    self.conn = pool.getconn()
+                    self.cursor = self.conn.cursor()
+                    self._read_pool = pool
+                    return True
+            except Exception as e:
+                logger.warning(f"Read replica unavailable, using primary: {str(e)}")
         try:
             self.conn = psycopg2.connect(**self.db_params)
             self.cursor = self.conn.cursor()
@@ -56,7 +230,7 @@ class DatabaseHandler:
         try:
             self.cursor.execute("""
                 SELECT speech 
-                FROM voice_evaluations 
+                FROM voice_evaluation_payloads 
                 WHERE id = %s
             """, (record_id,))
             result = self.cursor.fetchone()
@@ -77,9 +251,11 @@ class DatabaseHandler:
         """
         try:
             self.cursor.execute("""
-                SELECT evaluation, mark 
-                FROM voice_evaluations 
-                WHERE id = %s
+                SELECT p.evaluation, v.mark 
+                FROM voice_evaluations v
+                JOIN voice_evaluation_payloads p
+                  ON p.id = v.id AND p.created_at = v.created_at
+                WHERE v.id = %s
             """, (record_id,))
             result = self.cursor.fetchone()
             if result:
@@ -103,21 +279,24 @@ class DatabaseHandler:
             Tuple[bool, Optional[int]]: Success status and record ID
         """
         try:
-            self.cursor.execute("""
-                INSERT INTO voice_evaluations 
-                (speech, evaluation, mark, created_at) 
-                VALUES (%s::jsonb, %s::jsonb, %s, %s)
-                RETURNING id;
-                """, 
+            metadata = speech_metadata(speech_data)
+            self.cursor.execute(STORE_TRANSCRIPTION_SQL, 
                 (
+                    datetime.now(),
+                    metadata['content_hash'],
+                    metadata['duration_seconds'],
+                    metadata['language'],
+                    metadata['word_count'],
+                    metadata['processing_seconds'],
+                    metadata['audio_hash'],
                     Json(speech_data),
-                    Json({'status': 'pending'}),
-                    0,
-                    datetime.now()
+                    Json({'status': 'pending'})
                 )
             )
             record_id = self.cursor.fetchone()
             self.conn.commit()
+            if record_id:
+                recent_writes.mark([record_id[0]])
             return True, record_id[0] if record_id else None
         except Exception as e:
             logger.error(f"Failed to store transcription: {str(e)}")
@@ -137,22 +316,17 @@ class DatabaseHandler:
             bool: Success status
         """
         try:
-            self.cursor.execute("""
-                UPDATE voice_evaluations 
-                SET evaluation = %s::jsonb,
-                    mark = %s
-                WHERE id = %s
-                """, 
-                (
-                    Json(evaluation_data),
-                    evaluation_data.get('mark', 0),
-                    record_id
-                )
+            self.cursor.execute(STORE_EVALUATION_PAYLOAD_SQL,
+                (Json(evaluation_data), record_id)
             )
             if self.cursor.rowcount == 0:
                 self.conn.rollback()
                 return False
+            self.cursor.execute(STORE_EVALUATION_META_SQL,
+                (evaluation_data.get('mark', 0), datetime.now(), record_id)
+            )
             self.conn.commit()
+            recent_writes.mark([record_id])
             return True
         except Exception as e:
             logger.error(f"Failed to store evaluation: {str(e)}")
@@ -161,11 +335,16 @@ class DatabaseHandler:
             return False
 
     def close(self):
-        """Close database connection and cursor"""
+        """Close database connection and cursor; replica connections go back to their pool"""
         try:
             if self.cursor:
                 self.cursor.close()
-            if self.conn:
+            if self.conn and self._read_pool is not None:
+                self._read_pool.putconn(self.conn)
+                self._read_pool = None
+                self.conn = None
+                self.cursor = None
+            elif self.conn:
                 self.conn.close()
             logger.info("Database connection closed successfully")
         except Exception as e:
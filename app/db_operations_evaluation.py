@@ -1,9 +1,16 @@
 from typing import Dict, Optional, Tuple, List
 import logging
 from datetime import datetime
-from app.db_handler import DatabaseHandler
-from psycopg2.extras import Json
+from app.db_handler import (
+    DatabaseHandler, STORE_EVALUATION_PAYLOAD_SQL, STORE_EVALUATION_META_SQL, recent_writes
+)
+from psycopg2.extras import Json, execute_values
 import json
+import os
+
+# Evaluation queue settings
+LEASE_SECONDS = int(os.getenv('EVAL_LEASE_SECONDS', '900'))
+MAX_ATTEMPTS = int(os.getenv('EVAL_MAX_ATTEMPTS', '3'))
 
 # Configure logging with UTF-8 support
 logging.basicConfig(
@@ -55,20 +62,9 @@ class DatabaseOperationsEvaluation:
                 logger.error("Database connection failed during store_evaluation")
                 return False
 
-            # Update evaluation fields using created_at instead of updated_at
-            self.db.cursor.execute("""
-                UPDATE voice_evaluations 
-                SET evaluation = %s::jsonb,
-                    mark = %s,
-                    created_at = %s
-                WHERE id = %s
-                """, 
-                (
-                    Json(evaluation_data),         # Convert to JSONB
-                    evaluation_data.get('mark', 0),# Get mark or default to 0
-                    datetime.now(),                # Update timestamp
-                    record_id
-                )
+            # Store the evaluation document in the payload row
+            self.db.cursor.execute(STORE_EVALUATION_PAYLOAD_SQL,
+                (Json(evaluation_data), record_id)  # Convert to JSONB
             )
             
             if self.db.cursor.rowcount == 0:
@@ -76,7 +72,18 @@ class DatabaseOperationsEvaluation:
                 self.db.conn.rollback()
                 return False
 
+            # Update metadata, recording the evaluation time in evaluated_at
+            # and releasing any queue lease held on the record
+            self.db.cursor.execute(STORE_EVALUATION_META_SQL,
+                (
+                    evaluation_data.get('mark', 0),# Get mark or default to 0
+                    datetime.now(),                # Evaluation timestamp
+                    record_id
+                )
+            )
+
             self.db.conn.commit()
+            recent_writes.mark([record_id])
             logger.info(f"Successfully stored evaluation for ID: {record_id}")
             return True
 
@@ -88,27 +95,124 @@ class DatabaseOperationsEvaluation:
         finally:
             self.db.close()
 
-    def get_evaluation(self, record_id: int) -> Optional[Dict]:
+    def store_evaluations(self, results: List[Tuple[int, Dict]], page_size: int = 100,
+                          worker_id: Optional[str] = None) -> List[int]:
+        """
+        Store evaluation results for many records in one transaction.
+        Payload and metadata rows are updated with one statement per page
+        instead of two round trips per record.
+
+        Args:
+            results (List[Tuple[int, Dict]]): (record_id, evaluation_data) pairs,
+                evaluation_data as for store_evaluation
+            page_size (int): Rows sent per statement
+            worker_id (str, optional): Only store records still claimed by this
+                worker; a record whose lease expired and was claimed by another
+                worker is left to that worker
+
+        Returns:
+            List[int]: IDs of the records that were updated
+        """
+        if not results:
+            return []
+        try:
+            if not self.db.connect():
+                logger.error("Database connection failed during store_evaluations")
+                return []
+
+            evaluated_at = datetime.now()
+            values = [
+                (record_id, json.dumps(evaluation_data),
+                 evaluation_data.get('mark', 0), evaluated_at, worker_id)
+                for record_id, evaluation_data in results
+            ]
+
+            # Metadata is only updated for records whose payload row exists,
+            # matching the missing-record check of store_evaluation. Rows
+            # claimed by another worker are locked out of both updates.
+            rows = execute_values(
+                self.db.cursor,
+                """
+                WITH items AS (
+                    SELECT * FROM (VALUES %s) AS t(id, evaluation, mark, evaluated_at, worker_id)
+                ),
+                owned AS (
+                    SELECT v.id
+                    FROM voice_evaluations v
+                    JOIN items ON items.id = v.id
+                    WHERE items.worker_id IS NULL
+                       OR (v.status = 'processing' AND v.claimed_by = items.worker_id)
+                    FOR UPDATE OF v
+                ),
+                payloads AS (
+                    UPDATE voice_evaluation_payloads p
+                    SET evaluation = items.evaluation
+                    FROM items
+                    WHERE p.id = items.id
+                      AND p.id IN (SELECT id FROM owned)
+                    RETURNING p.id
+                )
+                UPDATE voice_evaluations v
+                SET mark = items.mark,
+                    evaluated_at = items.evaluated_at,
+                    status = 'completed',
+                    claimed_by = NULL,
+                    lease_expires_at = NULL
+                FROM items
+                WHERE v.id = items.id
+                  AND v.id IN (SELECT id FROM payloads)
+                RETURNING v.id
+                """,
+                values,
+                template="(%s::integer, %s::jsonb, %s::integer, %s::timestamptz, %s::text)",
+                page_size=page_size,
+                fetch=True
+            )
+
+            self.db.conn.commit()
+            stored = [row[0] for row in rows]
+            recent_writes.mark(stored)
+            missing = len(results) - len(stored)
+            if missing:
+                logger.error(f"{missing} of {len(results)} evaluation records were not found "
+                             f"or no longer claimed")
+            logger.info(f"Successfully stored {len(stored)} evaluations")
+            return stored
+
+        except Exception as e:
+            logger.error(f"Failed to store evaluations: {str(e)}")
+            if self.db.conn:
+                self.db.conn.rollback()
+            return []
+        finally:
+            self.db.close()
+
+    def get_evaluation(self, record_id: int, include_payload: bool = True) -> Optional[Dict]:
         """
         Retrieve evaluation data by ID.
         
         Args:
             record_id (int): Database record ID
+            include_payload (bool): Also fetch speech and evaluation documents;
+                when False only the slim metadata row is read
             
         Returns:
             Optional[Dict]: Evaluation data if found, including:
-                - speech: Speech data dictionary
-                - evaluation: Evaluation data dictionary
+                - speech: Speech data dictionary (with include_payload)
+                - evaluation: Evaluation data dictionary (with include_payload)
                 - mark: Numeric score
-                - created_at: Timestamp
+                - created_at: Ingest timestamp
+                - evaluated_at: Evaluation timestamp, None until completed
+                - status: Queue status (pending, processing, completed, failed)
         """
         try:
-            if not self.db.connect():
+            # Records written moments ago may not have reached the replica yet
+            if not self.db.connect(read_only=not recent_writes.contains(record_id)):
                 logger.error("Database connection failed during get_evaluation")
                 return None
 
             self.db.cursor.execute("""
-                SELECT speech, evaluation, mark, created_at 
+                SELECT mark, created_at, status, evaluated_at
                 FROM voice_evaluations 
                 WHERE id = %s
             """, (record_id,))
@@ -119,15 +223,25 @@ class DatabaseOperationsEvaluation:
                 return None
 
             # Convert datetime to ISO format string for JSON serialization
-            created_at = result[3].isoformat() if result[3] else None
-                
-            return {
-                'speech': result[0],
-                'evaluation': result[1],
-                'mark': result[2],
-                'created_at': created_at
+            record = {
+                'mark': result[0],
+                'created_at': result[1].isoformat() if result[1] else None,
+                'status': result[2],
+                'evaluated_at': result[3].isoformat() if result[3] else None
             }
 
+            if include_payload:
+                self.db.cursor.execute("""
+                    SELECT speech, evaluation
+                    FROM voice_evaluation_payloads
+                    WHERE id = %s
+                """, (record_id,))
+                payload = self.db.cursor.fetchone()
+                record['speech'] = payload[0] if payload else None
+                record['evaluation'] = payload[1] if payload else None
+
+            return record
+
         except Exception as e:
             logger.error(f"Failed to retrieve evaluation: {str(e)}")
             return None
@@ -145,13 +259,13 @@ class DatabaseOperationsEvaluation:
             Optional[Dict]: Speech data if found
         """
         try:
-            if not self.db.connect():
+            if not self.db.connect(read_only=not recent_writes.contains(record_id)):
                 logger.error("Database connection failed during get_transcription")
                 return None
 
             self.db.cursor.execute("""
                 SELECT speech 
-                FROM voice_evaluations 
+                FROM voice_evaluation_payloads 
                 WHERE id = %s
             """, (record_id,))
             
@@ -164,6 +278,174 @@ class DatabaseOperationsEvaluation:
         finally:
             self.db.close()
 
+    def claim_pending(self, worker_id: str, batch_size: int = 1,
+                      lease_seconds: int = LEASE_SECONDS) -> List[Dict]:
+        """
+        Claim pending records for evaluation using FOR UPDATE SKIP LOCKED.
+        Concurrent workers never receive the same record; records whose
+        lease has expired (crashed worker) become claimable again.
+        
+        Args:
+            worker_id (str): Identifier of the claiming worker
+            batch_size (int): Maximum number of records to claim
+            lease_seconds (int): Lease duration before the claim expires
+            
+        Returns:
+            List[Dict]: Claimed records, each containing:
+                - id: Record ID
+                - speech: Speech data dictionary
+                - attempts: Attempt number including this claim
+        """
+        try:
+            if not self.db.connect():
+                logger.error("Database connection failed during claim_pending")
+                return []
+
+            # Leases that expired on the final attempt are not claimable
+            # again; fail them instead of leaving them in processing
+            self.db.cursor.execute("""
+                UPDATE voice_evaluations
+                SET status = 'failed',
+                    claimed_by = NULL,
+                    lease_expires_at = NULL
+                WHERE status = 'processing'
+                  AND lease_expires_at < NOW()
+                  AND attempts >= %s
+                RETURNING id
+            """, (MAX_ATTEMPTS,))
+            exhausted = [row[0] for row in self.db.cursor.fetchall()]
+            if exhausted:
+                logger.warning(f"Marked {len(exhausted)} record(s) failed after {MAX_ATTEMPTS} expired attempts")
+
+            # The claim scans only the slim metadata table; transcripts
+            # are read from the payload table for the claimed rows only
+            self.db.cursor.execute("""
+                WITH claimed AS (
+                    UPDATE voice_evaluations v
+                    SET status = 'processing',
+                        claimed_by = %s,
+                        lease_expires_at = NOW() + make_interval(secs => %s),
+                        attempts = v.attempts + 1
+                    WHERE v.id IN (
+                        SELECT id
+                        FROM voice_evaluations
+                        WHERE (status = 'pending'
+                               OR (status = 'processing' AND lease_expires_at < NOW()))
+                          AND attempts < %s
+                        ORDER BY id
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING v.id, v.created_at, v.attempts
+                )
+                SELECT claimed.id, p.speech, claimed.attempts
+                FROM claimed
+                JOIN voice_evaluation_payloads p
+                  ON p.id = claimed.id AND p.created_at = claimed.created_at
+                ORDER BY claimed.id
+            """, (worker_id, lease_seconds, MAX_ATTEMPTS, batch_size))
+
+            claimed = [
+                {'id': row[0], 'speech': row[1], 'attempts': row[2]}
+                for row in self.db.cursor.fetchall()
+            ]
+            self.db.conn.commit()
+            recent_writes.mark(exhausted + [row['id'] for row in claimed])
+            if claimed:
+                logger.info(f"Worker {worker_id} claimed {len(claimed)} record(s)")
+            return claimed
+
+        except Exception as e:
+            logger.error(f"Failed to claim pending evaluations: {str(e)}")
+            if self.db.conn:
+                self.db.conn.rollback()
+            return []
+        finally:
+            self.db.close()
+
+    def renew_lease(self, record_ids: List[int], worker_id: str,
+                    lease_seconds: int = LEASE_SECONDS) -> List[int]:
+        """
+        Extend the lease of records still claimed by a worker.
+
+        Args:
+            record_ids (List[int]): Claimed record IDs
+            worker_id (str): Identifier of the worker holding the claims
+            lease_seconds (int): New lease duration from now
+
+        Returns:
+            List[int]: IDs whose lease was extended; records missing from the
+            result were reclaimed by another worker after their lease expired
+        """
+        if not record_ids:
+            return []
+        try:
+            if not self.db.connect():
+                logger.error("Database connection failed during renew_lease")
+                return []
+
+            self.db.cursor.execute("""
+                UPDATE voice_evaluations
+                SET lease_expires_at = NOW() + make_interval(secs => %s)
+                WHERE id = ANY(%s)
+                  AND status = 'processing'
+                  AND claimed_by = %s
+                RETURNING id
+            """, (lease_seconds, list(record_ids), worker_id))
+
+            renewed = [row[0] for row in self.db.cursor.fetchall()]
+            self.db.conn.commit()
+            return renewed
+
+        except Exception as e:
+            logger.error(f"Failed to renew lease: {str(e)}")
+            if self.db.conn:
+                self.db.conn.rollback()
+            return []
+        finally:
+            self.db.close()
+
+    def release_claim(self, record_id: int, worker_id: str) -> bool:
+        """
+        Give up a claim after a failed evaluation.
+        The record returns to the queue, or is marked failed once
+        it has used up MAX_ATTEMPTS.
+        
+        Args:
+            record_id (int): Database record ID
+            worker_id (str): Identifier of the worker holding the claim
+            
+        Returns:
+            bool: True if the claim was released, False otherwise
+        """
+        try:
+            if not self.db.connect():
+                logger.error("Database connection failed during release_claim")
+                return False
+
+            self.db.cursor.execute("""
+                UPDATE voice_evaluations
+                SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                    claimed_by = NULL,
+                    lease_expires_at = NULL
+                WHERE id = %s
+                  AND status = 'processing'
+                  AND claimed_by = %s
+            """, (MAX_ATTEMPTS, record_id, worker_id))
+
+            released = self.db.cursor.rowcount > 0
+            self.db.conn.commit()
+            recent_writes.mark([record_id])
+            return released
+
+        except Exception as e:
+            logger.error(f"Failed to release claim: {str(e)}")
+            if self.db.conn:
+                self.db.conn.rollback()
+            return False
+        finally:
+            self.db.close()
+
     def get_all_transcriptions(self) -> List[Dict]:
         """
         Retrieve all transcription records from the database with evaluations.
@@ -177,20 +459,22 @@ class DatabaseOperationsEvaluation:
                 - created_at: Timestamp of creation
         """
         try:
-            if not self.db.connect():
+            if not self.db.connect(read_only=True):
                 logger.error("Database connection failed during get_all_transcriptions")
                 return []
 
             # Query all records with JSONB fields properly extracted
             self.db.cursor.execute("""
                 SELECT 
-                    id,
-                    speech_data->>'text' as text,
-                    evaluation,
-                    mark,
-                    created_at
-                FROM voice_evaluations 
-                ORDER BY created_at DESC
+                    v.id,
+                    p.speech->>'text' as text,
+                    p.evaluation,
+                    v.mark,
+                    v.created_at
+                FROM voice_evaluations v
+                JOIN voice_evaluation_payloads p
+                  ON p.id = v.id AND p.created_at = v.created_at
+                ORDER BY v.created_at DESC
             """)
             
             # Fetch all records
@@ -201,7 +485,7 @@ class DatabaseOperationsEvaluation:
             for record in records:
                 result.append({
                     'id': record[0],
-                    'text': record[1],        # From speech_data JSONB
+                    'text': record[1],        # From speech JSONB
                     'evaluation': record[2],   # Already JSONB
                     'mark': record[3],
                     'created_at': record[4]
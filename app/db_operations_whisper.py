@@ -1,8 +1,8 @@
 from typing import Dict, Optional, Tuple, List
 import logging
 from datetime import datetime
-from app.db_handler import DatabaseHandler
-from psycopg2.extras import Json
+from app.db_handler import DatabaseHandler, STORE_TRANSCRIPTION_SQL, recent_writes, speech_metadata
+from psycopg2.extras import Json, execute_values
 
 # Configure logging
 logging.basicConfig(
@@ -53,18 +53,19 @@ class DatabaseOperations:
                 logger.error("Database connection failed during store_transcription")
                 return False, None
 
-            # Store transcription with pending evaluation status
-            self.db.cursor.execute("""
-                INSERT INTO voice_evaluations 
-                (speech, evaluation, mark, created_at) 
-                VALUES (%s::jsonb, %s::jsonb, %s, %s)
-                RETURNING id;
-                """, 
+            # Store metadata and payload rows with pending evaluation status
+            metadata = speech_metadata(speech_data)
+            self.db.cursor.execute(STORE_TRANSCRIPTION_SQL, 
                 (
+                    datetime.now(),                 # Creation timestamp
+                    metadata['content_hash'],       # Transcript hash
+                    metadata['duration_seconds'],   # Audio duration if known
+                    metadata['language'],           # Detected language if known
+                    metadata['word_count'],         # Words in the transcript
+                    metadata['processing_seconds'], # Transcription time if known
+                    metadata['audio_hash'],         # Archived audio if kept
                     Json(speech_data),              # Speech data as JSONB
-                    Json({'status': 'pending'}),    # Initial evaluation status
-                    0,                              # Initial mark
-                    datetime.now()                  # Creation timestamp
+                    Json({'status': 'pending'})     # Initial evaluation status
                 )
             )
             
@@ -76,6 +77,7 @@ class DatabaseOperations:
                 return False, None
 
             self.db.conn.commit()
+            recent_writes.mark([record_id[0]])
             logger.info(f"Successfully stored transcription with ID: {record_id[0]}")
             
             return True, record_id[0]
@@ -88,6 +90,91 @@ class DatabaseOperations:
         finally:
             self.db.close()
 
+    def store_transcriptions(self, speech_items: List[Dict],
+                             page_size: int = 1000) -> Tuple[bool, List[int]]:
+        """
+        Store many transcriptions in a single transaction.
+        Rows are written with multi-row INSERT statements of up to
+        page_size rows each instead of one round trip per record.
+        
+        Args:
+            speech_items (List[Dict]): Speech data dictionaries, as for store_transcription
+            page_size (int): Rows per INSERT statement
+            
+        Returns:
+            Tuple[bool, List[int]]: (success status, record IDs in input order)
+        """
+        if not speech_items:
+            return True, []
+
+        try:
+            if not self.db.connect():
+                logger.error("Database connection failed during store_transcriptions")
+                return False, []
+
+            values = []
+            for position, speech_data in enumerate(speech_items):
+                metadata = speech_metadata(speech_data)
+                values.append((
+                    position,
+                    Json(speech_data),
+                    metadata['content_hash'],
+                    metadata['duration_seconds'],
+                    metadata['language'],
+                    metadata['word_count'],
+                    metadata['processing_seconds'],
+                    metadata['audio_hash']
+                ))
+
+            # IDs are drawn up front so metadata and payload rows can be
+            # written from the same VALUES list in one statement per page
+            rows = execute_values(
+                self.db.cursor,
+                """
+                WITH items AS (
+                    SELECT nextval('voice_evaluations_id_seq')::integer AS id, t.*
+                    FROM (VALUES %s) AS t(position, speech, content_hash, duration_seconds,
+                                          language, word_count, processing_seconds, audio_hash)
+                ),
+                meta AS (
+                    INSERT INTO voice_evaluations
+                    (id, created_at, content_hash, duration_seconds, language,
+                     word_count, processing_seconds, audio_hash, status, mark)
+                    SELECT id, NOW(), content_hash, duration_seconds, language,
+                           word_count, processing_seconds, audio_hash, 'pending', 0
+                    FROM items
+                )
+                INSERT INTO voice_evaluation_payloads (id, created_at, speech, evaluation)
+                SELECT id, NOW(), speech, '{"status": "pending"}'::jsonb
+                FROM items
+                ORDER BY position
+                RETURNING id
+                """,
+                values,
+                template="(%s, %s::jsonb, %s, %s::real, %s::text, %s::integer, %s::real, %s::text)",
+                page_size=page_size,
+                fetch=True
+            )
+            record_ids = [row[0] for row in rows]
+
+            if len(record_ids) != len(speech_items):
+                logger.error(f"Expected {len(speech_items)} IDs, got {len(record_ids)}")
+                self.db.conn.rollback()
+                return False, []
+
+            self.db.conn.commit()
+            recent_writes.mark(record_ids)
+            logger.info(f"Successfully stored {len(record_ids)} transcriptions in one batch")
+            return True, record_ids
+
+        except Exception as e:
+            logger.error(f"Database operation failed in store_transcriptions: {str(e)}")
+            if self.db.conn:
+                self.db.conn.rollback()
+            return False, []
+        finally:
+            self.db.close()
+
     def get_transcription(self, record_id: int) -> Optional[Dict]:
         """
         Retrieve transcription data by ID.
@@ -103,13 +190,13 @@ class DatabaseOperations:
                 - processed_at: Processing timestamp
         """
         try:
-            if not self.db.connect():
+            if not self.db.connect(read_only=not recent_writes.contains(record_id)):
                 logger.error("Database connection failed during get_transcription")
                 return None
 
             self.db.cursor.execute("""
                 SELECT speech 
-                FROM voice_evaluations 
+                FROM voice_evaluation_payloads 
                 WHERE id = %s
             """, (record_id,))
             
@@ -122,6 +209,114 @@ class DatabaseOperations:
         finally:
             self.db.close()
 
+    def get_archived_records(self, record_ids: Optional[List[int]] = None,
+                             after_id: int = 0, limit: int = 100) -> List[Dict]:
+        """
+        Page through records whose original audio is archived.
+        Uses keyset pagination on id so the whole corpus can be walked
+        without OFFSET scans.
+        
+        Args:
+            record_ids (List[int], optional): Restrict to these records
+            after_id (int): Return records with a larger ID
+            limit (int): Page size
+            
+        Returns:
+            List[Dict]: Records with id, audio_hash and speech, in ID order
+        """
+        try:
+            if not self.db.connect(read_only=True):
+                logger.error("Database connection failed during get_archived_records")
+                return []
+
+            self.db.cursor.execute("""
+                SELECT v.id, v.audio_hash, p.speech
+                FROM voice_evaluations v
+                JOIN voice_evaluation_payloads p
+                  ON p.id = v.id AND p.created_at = v.created_at
+                WHERE v.audio_hash IS NOT NULL
+                  AND v.id > %s
+                  AND (%s::integer[] IS NULL OR v.id = ANY(%s::integer[]))
+                ORDER BY v.id
+                LIMIT %s
+            """, (after_id, record_ids, record_ids, limit))
+
+            return [
+                {'id': row[0], 'audio_hash': row[1], 'speech': row[2]}
+                for row in self.db.cursor.fetchall()
+            ]
+
+        except Exception as e:
+            logger.error(f"Failed to get archived records: {str(e)}")
+            return []
+        finally:
+            self.db.close()
+
+    def replace_transcription(self, record_id: int, speech_data: Dict) -> bool:
+        """
+        Replace the transcription of an existing record after reprocessing.
+        Derived metadata is updated and the record returns to the evaluation
+        queue, since the previous evaluation no longer matches the text.
+        Records currently being evaluated are left alone.
+        
+        Args:
+            record_id (int): Database record ID
+            speech_data (Dict): New speech data, as for store_transcription
+            
+        Returns:
+            bool: True if the record was updated
+        """
+        try:
+            if not self.db.connect():
+                logger.error("Database connection failed during replace_transcription")
+                return False
+
+            metadata = speech_metadata(speech_data)
+            self.db.cursor.execute("""
+                UPDATE voice_evaluations
+                SET content_hash = %s,
+                    duration_seconds = %s,
+                    language = %s,
+                    word_count = %s,
+                    processing_seconds = %s,
+                    status = 'pending',
+                    mark = 0,
+                    evaluated_at = NULL,
+                    attempts = 0
+                WHERE id = %s
+                  AND status <> 'processing'
+            """, (
+                metadata['content_hash'],
+                metadata['duration_seconds'],
+                metadata['language'],
+                metadata['word_count'],
+                metadata['processing_seconds'],
+                record_id
+            ))
+            if self.db.cursor.rowcount == 0:
+                logger.warning(f"Record {record_id} not found or being evaluated, not replaced")
+                self.db.conn.rollback()
+                return False
+
+            self.db.cursor.execute("""
+                UPDATE voice_evaluation_payloads
+                SET speech = %s,
+                    evaluation = %s
+                WHERE id = %s
+            """, (Json(speech_data), Json({'status': 'pending'}), record_id))
+
+            self.db.conn.commit()
+            recent_writes.mark([record_id])
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to replace transcription: {str(e)}")
+            if self.db.conn:
+                self.db.conn.rollback()
+            return False
+        finally:
+            self.db.close()
+
     def get_all_transcriptions(self) -> List[Dict]:
         """
         Retrieve all transcription records from the database.
@@ -135,20 +330,22 @@ class DatabaseOperations:
                 - created_at: Timestamp of creation
         """
         try:
-            if not self.db.connect():
+            if not self.db.connect(read_only=True):
                 logger.error("Database connection failed during get_all_transcriptions")
                 return []
 
             # Query all records, extracting fields from JSONB speech column
             self.db.cursor.execute("""
                 SELECT 
-                    id,
-                    speech->>'text' as text,
-                    speech->>'source_file' as filename,
-                    speech->>'file_type' as file_type,
-                    created_at
-                FROM voice_evaluations 
-                ORDER BY created_at DESC
+                    v.id,
+                    p.speech->>'text' as text,
+                    p.speech->>'source_file' as filename,
+                    p.speech->>'file_type' as file_type,
+                    v.created_at
+                FROM voice_evaluations v
+                JOIN voice_evaluation_payloads p
+                  ON p.id = v.id AND p.created_at = v.created_at
+                ORDER BY v.created_at DESC
             """)
             
             # Fetch all records
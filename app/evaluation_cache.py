@@ -0,0 +1,208 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Dict, Optional, Tuple
+from app.db_handler import DatabaseHandler, content_hash
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Set to 0 to always run the model, e.g. when comparing prompt changes
+EVAL_RESULT_CACHE_ENABLED = os.getenv('EVAL_RESULT_CACHE', '1') != '0'
+
+class EvaluationResultCache:
+    """
+    Persistent cache of LLM evaluations in the evaluation_result_cache table.
+    Entries are keyed by transcript hash, model file and prompt version;
+    bumping the prompt version or switching models makes existing entries
+    unreachable, and purge_stale removes them. Lookup failures are treated
+    as misses so the cache can never block an evaluation.
+    """
+
+    def __init__(self, enabled: bool = EVAL_RESULT_CACHE_ENABLED):
+        """
+        Initialize counters.
+
+        Args:
+            enabled (bool): Whether lookups and stores touch the database
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _count(self, field: str):
+        """Increment a counter; evaluations may run on several threads"""
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get(self, text: str, model: str, prompt_version: str) -> Optional[Tuple[str, int]]:
+        """
+        Look up a cached evaluation.
+
+        Args:
+            text (str): Transcript text
+            model (str): Model file name
+            prompt_version (str): Evaluation prompt version
+
+        Returns:
+            Optional[Tuple[str, int]]: (evaluation_text, mark), or None on a miss
+        """
+        if not self.enabled:
+            return None
+        db = DatabaseHandler()
+        try:
+            if not db.connect():
+                self._count('misses')
+                return None
+            db.cursor.execute("""
+                UPDATE evaluation_result_cache
+                SET hits = hits + 1,
+                    last_hit_at = NOW()
+                WHERE content_hash = %s
+                  AND model = %s
+                  AND prompt_version = %s
+                RETURNING evaluation_text, mark
+            """, (content_hash(text), model, prompt_version))
+            row = db.cursor.fetchone()
+            db.conn.commit()
+            if row is None:
+                self._count('misses')
+                return None
+            self._count('hits')
+            logger.info(f"Evaluation cache hit for transcript {content_hash(text)[:12]}")
+            return row[0], row[1]
+        except Exception as e:
+            logger.error(f"Evaluation cache lookup failed: {str(e)}")
+            if db.conn:
+                db.conn.rollback()
+            self._count('misses')
+            return None
+        finally:
+            db.close()
+
+    def set(self, text: str, model: str, prompt_version: str,
+            evaluation_text: str, mark: int) -> bool:
+        """
+        Store an evaluation, replacing any entry with the same key.
+
+        Returns:
+            bool: True if the entry was stored
+        """
+        if not self.enabled:
+            return False
+        db = DatabaseHandler()
+        try:
+            if not db.connect():
+                return False
+            db.cursor.execute("""
+                INSERT INTO evaluation_result_cache
+                (content_hash, model, prompt_version, evaluation_text, mark)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (content_hash, model, prompt_version) DO UPDATE
+                SET evaluation_text = EXCLUDED.evaluation_text,
+                    mark = EXCLUDED.mark,
+                    created_at = NOW()
+            """, (content_hash(text), model, prompt_version, evaluation_text, mark))
+            db.conn.commit()
+            self._count('stores')
+            return True
+        except Exception as e:
+            logger.error(f"Failed to store cached evaluation: {str(e)}")
+            if db.conn:
+                db.conn.rollback()
+            return False
+        finally:
+            db.close()
+
+    def purge_stale(self, model: str, prompt_version: str) -> int:
+        """
+        Delete entries for other models or prompt versions.
+
+        Returns:
+            int: Number of deleted entries, -1 on failure
+        """
+        db = DatabaseHandler()
+        try:
+            if not db.connect():
+                return -1
+            db.cursor.execute("""
+                DELETE FROM evaluation_result_cache
+                WHERE model <> %s OR prompt_version <> %s
+            """, (model, prompt_version))
+            deleted = db.cursor.rowcount
+            db.conn.commit()
+            logger.info(f"Purged {deleted} stale cached evaluations")
+            return deleted
+        except Exception as e:
+            logger.error(f"Failed to purge cached evaluations: {str(e)}")
+            if db.conn:
+                db.conn.rollback()
+            return -1
+        finally:
+            db.close()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters of this process"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'stores': self.stores
+            }
+
+    def table_stats(self) -> Dict:
+        """
+        Entry and lifetime hit counts per model and prompt version.
+
+        Returns:
+            Dict: Keyed by 'model@prompt_version'
+        """
+        db = DatabaseHandler()
+        try:
+            if not db.connect(read_only=True):
+                return {}
+            db.cursor.execute("""
+                SELECT model, prompt_version, COUNT(*), COALESCE(SUM(hits), 0), MAX(last_hit_at)
+                FROM evaluation_result_cache
+                GROUP BY model, prompt_version
+                ORDER BY model, prompt_version
+            """)
+            return {
+                f"{row[0]}@{row[1]}": {
+                    'entries': row[2],
+                    'hits': int(row[3]),
+                    'last_hit_at': row[4].isoformat() if row[4] else None
+                }
+                for row in db.cursor.fetchall()
+            }
+        except Exception as e:
+            logger.error(f"Failed to read evaluation cache statistics: {str(e)}")
+            return {}
+        finally:
+            db.close()
+
+evaluation_result_cache = EvaluationResultCache()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Inspect or purge the evaluation result cache')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='Entries and lifetime hits per model and prompt version')
+    subparsers.add_parser('purge', help='Delete entries for other models or prompt versions')
+
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        print(json.dumps(evaluation_result_cache.table_stats(), indent=2), flush=True)
+    else:
+        from app.fast_inference import MODEL_NAME, PROMPT_VERSION
+        if evaluation_result_cache.purge_stale(MODEL_NAME, PROMPT_VERSION) < 0:
+            sys.exit(1)
@@ -0,0 +1,294 @@
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from app.db_async import async_db
+from app.db_operations_evaluation import LEASE_SECONDS, MAX_ATTEMPTS
+from app.evaluator_pool import get_evaluator_pool
+from app.fast_inference import evaluate_single, stream_single
+from app.scheduler import Job, estimate_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Identifier stored in claimed_by for evaluations started by this API process
+API_WORKER_ID = f"api:{socket.gethostname()}:{os.getpid()}"
+
+# How often to re-check a record that another process is evaluating
+WAIT_POLL_SECONDS = float(os.getenv('EVAL_WAIT_POLL_SECONDS', '1.0'))
+
+# How long a request waits for another process's evaluation before it gets
+# the record still 'processing'; kept below client and proxy timeouts
+WAIT_MAX_SECONDS = float(os.getenv('EVAL_WAIT_MAX_SECONDS', '5.0'))
+
+class SingleFlight:
+    """
+    Coalesce concurrent async calls that share a key.
+    The first caller starts the work; later callers await the same task
+    until it finishes, after which the key is free again.
+    """
+
+    def __init__(self):
+        """Initialize the table of in-flight tasks"""
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def is_inflight(self, key: Hashable) -> bool:
+        """Check whether work for the key is currently running"""
+        task = self._inflight.get(key)
+        return task is not None and not task.done()
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        """Remove a finished task, unless newer work took its key"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                    fresh: bool = False) -> Tuple[asyncio.Task, bool]:
+        """
+        Start fn for the key, or find the work already running for it.
+        The check and the registration happen without an await in between,
+        so concurrent callers can never both start work for one key.
+
+        Args:
+            key: Deduplication key
+            fn: Coroutine factory performing the work
+            fresh: Do not join work that was running before this call; wait
+                for it to finish, then start new work
+
+        Returns:
+            Tuple[asyncio.Task, bool]: The task for the key, and whether
+            this call started it
+        """
+        if fresh:
+            while self.is_inflight(key):
+                with contextlib.suppress(Exception):
+                    await asyncio.shield(self._inflight[key])
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            logger.info(f"Joining in-flight evaluation for key {key}")
+            return task, False
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return task, True
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], fresh: bool = False) -> Any:
+        """
+        Run fn once per key across concurrent callers.
+
+        Args:
+            key: Deduplication key
+            fn: Coroutine factory performing the work
+            fresh: As for start
+
+        Returns:
+            Any: Result of the shared task
+        """
+        task, _ = await self.start(key, fn, fresh)
+        # Shield so a disconnecting client does not cancel work others wait on
+        return await asyncio.shield(task)
+
+evaluation_flight = SingleFlight()
+
+async def _wait_for_other_process(record_id: int) -> Optional[Dict]:
+    """
+    Wait for a record claimed by another process to leave 'processing'.
+    Gives up after WAIT_MAX_SECONDS and returns the latest state, so the
+    client can follow /events/ or retry instead of holding the request open.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + WAIT_MAX_SECONDS
+    result = await async_db.get_evaluation(record_id, include_payload=False)
+    while result and result.get('status') == 'processing' and loop.time() < deadline:
+        await asyncio.sleep(min(WAIT_POLL_SECONDS, max(0.0, deadline - loop.time())))
+        result = await async_db.get_evaluation(record_id, include_payload=False)
+    return await async_db.get_evaluation(record_id) if result else None
+
+async def _unclaimed_result(record_id: int) -> Optional[Dict]:
+    """
+    Result of a record this process could not claim: the stored evaluation,
+    after waiting for the process that is evaluating it, if any.
+    """
+    # Status check only needs the slim metadata row
+    result = await async_db.get_evaluation(record_id, include_payload=False)
+    if result and result.get('status') == 'processing':
+        logger.info(f"Record {record_id} is being evaluated elsewhere, waiting for result")
+        return await _wait_for_other_process(record_id)
+    return await async_db.get_evaluation(record_id) if result else None
+
+async def _evaluate(record_id: int, force: bool) -> Optional[Dict]:
+    """
+    Claim the record in the database and evaluate it, or wait for the
+    process that already holds the claim.
+    """
+    claimed = await async_db.claim_record(
+        record_id, API_WORKER_ID, LEASE_SECONDS, include_finished=force
+    )
+    if not claimed:
+        return await _unclaimed_result(record_id)
+
+    # Empty transcripts are decided by the pre-screen rules without the model
+    text = (claimed.get('speech') or {}).get('text') or ''
+
+    # Model inference is blocking; keep it off the event loop. The pool
+    # is created on first use, which also loads tokenizers
+    job = Job('interactive', cost=estimate_tokens(text))
+    evaluation_result = await run_in_threadpool(lambda: evaluate_single(text, get_evaluator_pool(), job))
+
+    if not evaluation_result:
+        logger.error(f"Evaluation failed for record {record_id}")
+        await async_db.release_claim(record_id, API_WORKER_ID, MAX_ATTEMPTS)
+        return None
+
+    evaluation_data = {
+        'text': evaluation_result.get('evaluation', ''),
+        'mark': evaluation_result.get('score', 0),
+        'evaluated_at': datetime.now().isoformat(),
+        'status': 'completed'
+    }
+    if evaluation_result.get('prescreen'):
+        evaluation_data['prescreen'] = evaluation_result['prescreen']
+    if not await async_db.store_evaluation(record_id, evaluation_data):
+        await async_db.release_claim(record_id, API_WORKER_ID, MAX_ATTEMPTS)
+        return None
+
+    return await async_db.get_evaluation(record_id)
+
+async def evaluate_record(record_id: int, force: bool = False) -> Optional[Dict]:
+    """
+    Evaluate a record at most once at a time across requests and processes.
+
+    Concurrent requests in this process share one task; across processes
+    the claim row in voice_evaluations decides which one runs the model
+    and the others wait for the stored result. A forced request never
+    joins an evaluation that was already running when it arrived.
+
+    Args:
+        record_id: Database record ID
+        force: Re-evaluate records that are already completed or failed
+
+    Returns:
+        Optional[Dict]: Evaluation record as returned by get_evaluation,
+        or None if the evaluation failed
+    """
+    return await evaluation_flight.do(record_id, lambda: _evaluate(record_id, force), fresh=force)
+
+async def _stream_and_store(record_id: int, text: str, queue: asyncio.Queue) -> Optional[Dict]:
+    """
+    Run a streaming evaluation of a claimed record, forwarding mark and
+    token items to queue, then store the final result. Runs to completion
+    even if the streaming client disconnects.
+    """
+    loop = asyncio.get_running_loop()
+    job = Job('interactive', cost=estimate_tokens(text))
+
+    def produce() -> Optional[Dict]:
+        # Model inference is blocking; items are handed to the event loop
+        final = None
+        for item in stream_single(text, get_evaluator_pool(), job):
+            if item['type'] == 'done':
+                final = item
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        return final
+
+    try:
+        final = await run_in_threadpool(produce)
+    except Exception as e:
+        logger.error(f"Streaming evaluation failed for record {record_id}: {str(e)}")
+        final = None
+
+    evaluation_data = None
+    if final and final.get('text'):
+        evaluation_data = {
+            'text': final['text'],
+            'mark': final['mark'],
+            'evaluated_at': datetime.now().isoformat(),
+            'status': 'completed'
+        }
+        if final.get('prescreen'):
+            evaluation_data['prescreen'] = final['prescreen']
+    if not evaluation_data or not await async_db.store_evaluation(record_id, evaluation_data):
+        logger.error(f"Evaluation failed for record {record_id}")
+        await async_db.release_claim(record_id, API_WORKER_ID, MAX_ATTEMPTS)
+        queue.put_nowait({'type': 'error', 'detail': 'Evaluation failed'})
+        return None
+
+    queue.put_nowait({'type': 'done', **evaluation_data})
+    return await async_db.get_evaluation(record_id)
+
+def _result_items(result: Optional[Dict]) -> List[Dict]:
+    """Stream items for a stored evaluation record"""
+    if result and result.get('status') == 'processing':
+        return [{'type': 'error', 'detail': 'Record is being evaluated by another process, retry later'}]
+    if not result or result.get('status') != 'completed':
+        return [{'type': 'error', 'detail': 'Evaluation failed'}]
+    return [
+        {'type': 'mark', 'mark': result.get('mark', 0)},
+        {'type': 'done', **(result.get('evaluation') or {})}
+    ]
+
+async def _claim_and_stream(record_id: int, force: bool, queue: asyncio.Queue) -> Optional[Dict]:
+    """
+    Claim a record and stream its evaluation to queue. Records that cannot
+    be claimed (already evaluated, or being evaluated by another process)
+    put their stored result instead.
+    """
+    try:
+        claimed = await async_db.claim_record(
+            record_id, API_WORKER_ID, LEASE_SECONDS, include_finished=force
+        )
+        if not claimed:
+            result = await _unclaimed_result(record_id)
+            if result is None:
+                queue.put_nowait({'type': 'error', 'detail': 'Record not found'})
+            else:
+                for item in _result_items(result):
+                    queue.put_nowait(item)
+            return result
+
+        # Empty transcripts are decided by the pre-screen rules without the model
+        text = (claimed.get('speech') or {}).get('text') or ''
+        return await _stream_and_store(record_id, text, queue)
+    except Exception as e:
+        # The streaming client waits for a final item whatever happens
+        logger.error(f"Streaming evaluation failed for record {record_id}: {str(e)}")
+        queue.put_nowait({'type': 'error', 'detail': 'Evaluation failed'})
+        return None
+
+async def stream_evaluation(record_id: int, force: bool = False) -> AsyncIterator[Dict]:
+    """
+    Evaluate a record, yielding the mark as soon as it is generated and
+    then the explanation token by token. Records that are already
+    evaluated, or being evaluated elsewhere, yield their stored result.
+
+    Args:
+        record_id: Database record ID
+        force: Re-evaluate records that are already completed or failed
+
+    Yields:
+        Dict: {'type': 'mark'}, {'type': 'token'} items, then one
+        {'type': 'done'} with the stored evaluation or {'type': 'error'}
+    """
+    # The flight is registered before the claim is attempted, so requests
+    # for the record arriving meanwhile join it instead of racing the claim
+    queue: asyncio.Queue = asyncio.Queue()
+    task, started = await evaluation_flight.start(
+        record_id, lambda: _claim_and_stream(record_id, force, queue), fresh=force
+    )
+    if not started:
+        # Another request is evaluating the record; wait for its stored result
+        for item in _result_items(await asyncio.shield(task)):
+            yield item
+        return
+
+    while True:
+        item = await queue.get()
+        yield item
+        if item['type'] in ('done', 'error'):
+            break
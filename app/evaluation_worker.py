@@ -0,0 +1,240 @@
+import logging
+import os
+import socket
+import sys
+import time
+import argparse
+from datetime import datetime
+from typing import Optional, Dict, List
+from app.db_operations_evaluation import DatabaseOperationsEvaluation, LEASE_SECONDS
+from app.evaluation_cache import evaluation_result_cache
+from app.fast_inference import LlamaEvaluator, get_cached_evaluation
+from app.prescreen import prescreen, prescreen_stats
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+class EvaluationWorker:
+    """
+    Background worker that drains the pending-evaluation queue.
+    Records are claimed with FOR UPDATE SKIP LOCKED, so any number of
+    workers can run in parallel without double-processing a record.
+    The LlamaEvaluator is loaded once and kept resident between records;
+    with batch_size > 1 records are claimed and stored in batches.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None,
+                 lease_seconds: int = LEASE_SECONDS,
+                 poll_interval: float = 5.0,
+                 batch_size: int = 1):
+        """
+        Initialize worker settings; the model is loaded on first claim.
+
+        Args:
+            worker_id (str, optional): Identifier stored with claims (default: host:pid)
+            lease_seconds (int): Lease duration for claimed records; must cover
+                evaluating a whole batch
+            poll_interval (float): Seconds to sleep when the queue is empty
+            batch_size (int): Records claimed and stored per round trip
+        """
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.batch_size = max(1, batch_size)
+        self.db = DatabaseOperationsEvaluation()
+        self.evaluator = None
+        self.evaluated = 0
+        self.failed = 0
+        self.completion_tokens = 0
+        self.busy_seconds = 0.0
+
+    def _ensure_evaluator(self):
+        """Load the evaluation model if it is not resident yet"""
+        if self.evaluator is None:
+            self.evaluator = LlamaEvaluator()
+
+    def evaluate_record(self, record: Dict) -> Optional[Dict]:
+        """
+        Evaluate a claimed record without storing the result.
+        The claim is released when no evaluation could be produced.
+
+        Args:
+            record (Dict): Claimed record with id and speech data
+
+        Returns:
+            Optional[Dict]: Evaluation data ready for storage, None on failure
+        """
+        record_id = record['id']
+        text = (record.get('speech') or {}).get('text')
+
+        # Empty, silent and voicemail transcripts never reach the model
+        decision = prescreen(text)
+        if decision:
+            return {
+                'text': decision['text'],
+                'mark': decision['mark'],
+                'prescreen': decision['prescreen'],
+                'evaluated_at': datetime.now().isoformat(),
+                'status': 'completed'
+            }
+
+        # Cache hits never load the model, so a fully cached backlog costs no inference
+        cached = get_cached_evaluation(text)
+        if cached:
+            evaluation_text, mark = cached
+        else:
+            self._ensure_evaluator()
+            evaluation_text, mark = self.evaluator.evaluate_conversation(text, check_cache=False)
+            self.completion_tokens += self.evaluator.last_usage.get('completion_tokens', 0)
+        if not evaluation_text:
+            logger.error(f"Evaluation failed to produce text for record {record_id}")
+            self.db.release_claim(record_id, self.worker_id)
+            return None
+
+        return {
+            'text': evaluation_text,
+            'mark': mark,
+            'evaluated_at': datetime.now().isoformat(),
+            'status': 'completed'
+        }
+
+    def process_record(self, record: Dict) -> bool:
+        """
+        Evaluate a claimed record and store the result.
+
+        Args:
+            record (Dict): Claimed record with id and speech data
+
+        Returns:
+            bool: True if the evaluation was stored, False otherwise
+        """
+        return self.process_batch([record]) == 1
+
+    def process_batch(self, records: List[Dict]) -> int:
+        """
+        Evaluate claimed records and store all results in one transaction.
+
+        Args:
+            records (List[Dict]): Claimed records with id and speech data
+
+        Returns:
+            int: Number of evaluations stored
+        """
+        started = time.monotonic()
+        results = []
+        # Shortest transcripts first, so the model's context grows in
+        # order and a batch never reloads it for a smaller size
+        pending = sorted(records, key=lambda r: len((r.get('speech') or {}).get('text') or ''))
+        for index, record in enumerate(pending):
+            if index:
+                # Keep the rest of the batch claimed however long earlier
+                # records took; records reclaimed elsewhere are skipped
+                held = set(self.db.renew_lease([r['id'] for r in pending[index:]],
+                                               self.worker_id, self.lease_seconds))
+                if record['id'] not in held:
+                    logger.warning(f"Lease on record {record['id']} was lost, skipping it")
+                    self.failed += 1
+                    continue
+            evaluation_data = self.evaluate_record(record)
+            if evaluation_data:
+                results.append((record['id'], evaluation_data))
+            else:
+                self.failed += 1
+
+        stored = set(self.db.store_evaluations(results, worker_id=self.worker_id)) if results else set()
+        for record_id, evaluation_data in results:
+            if record_id in stored:
+                logger.info(f"Worker {self.worker_id} evaluated record {record_id} "
+                            f"with mark {evaluation_data['mark']}")
+            else:
+                self.db.release_claim(record_id, self.worker_id)
+                self.failed += 1
+
+        self.evaluated += len(stored)
+        self.busy_seconds += time.monotonic() - started
+        return len(stored)
+
+    def throughput(self) -> Dict:
+        """Counts and rates since the worker started, measured over busy time"""
+        seconds = self.busy_seconds
+        return {
+            'evaluated': self.evaluated,
+            'failed': self.failed,
+            'busy_seconds': round(seconds, 1),
+            'records_per_minute': round(self.evaluated * 60 / seconds, 2) if seconds else 0.0,
+            'tokens_per_second': round(self.completion_tokens / seconds, 2) if seconds else 0.0,
+            'cache_hit_rate': evaluation_result_cache.stats()['hit_rate'],
+            'llm_calls_avoided': prescreen_stats.stats()['llm_calls_avoided']
+        }
+
+    def run_once(self) -> bool:
+        """
+        Claim and process one batch of records.
+
+        Returns:
+            bool: True if records were claimed, False if the queue was empty
+        """
+        claimed = self.db.claim_pending(self.worker_id, self.batch_size, self.lease_seconds)
+        if not claimed:
+            return False
+        self.process_batch(claimed)
+        stats = self.throughput()
+        logger.info(f"Worker {self.worker_id}: {stats['evaluated']} evaluated, "
+                    f"{stats['failed']} failed, {stats['records_per_minute']} records/min, "
+                    f"{stats['tokens_per_second']} tokens/s, "
+                    f"cache hit rate {stats['cache_hit_rate']}, "
+                    f"{stats['llm_calls_avoided']} LLM calls avoided by pre-screen")
+        return True
+
+    def run(self, drain_only: bool = False):
+        """
+        Process records until stopped.
+
+        Args:
+            drain_only (bool): Exit once the queue is empty instead of polling
+        """
+        logger.info(f"Evaluation worker {self.worker_id} started (batch size {self.batch_size})")
+        try:
+            while True:
+                if self.run_once():
+                    continue
+                if drain_only:
+                    logger.info("Pending queue drained")
+                    break
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            logger.info("Evaluation worker interrupted")
+        finally:
+            if self.evaluator:
+                self.evaluator.cleanup()
+            logger.info(f"Evaluation worker {self.worker_id} stopped: {self.throughput()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Drain pending evaluations from the database queue'
+    )
+    parser.add_argument('--worker-id', help='Worker identifier (default: host:pid)')
+    parser.add_argument('--lease-seconds', type=int, default=LEASE_SECONDS,
+                        help='Lease duration for claimed records')
+    parser.add_argument('--poll-interval', type=float, default=5.0,
+                        help='Seconds to wait when the queue is empty')
+    parser.add_argument('--drain', action='store_true',
+                        help='Exit when no pending records remain')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Records claimed and stored per batch (default: 1)')
+
+    args = parser.parse_args()
+
+    worker = EvaluationWorker(
+        worker_id=args.worker_id,
+        lease_seconds=args.lease_seconds,
+        poll_interval=args.poll_interval,
+        batch_size=args.batch_size
+    )
+    worker.run(drain_only=args.drain)
+    sys.exit(0)
@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from app.fast_inference import LlamaEvaluator
+from app.scheduler import Job, PriorityGate
+from app.tuning import llama_settings
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Number of llama.cpp contexts serving evaluations concurrently
+# (default: from the tuning profile)
+LLAMA_POOL_SIZE = int(os.getenv('LLAMA_POOL_SIZE', str(llama_settings()['pool_size'])))
+
+# CPU threads shared by all contexts; each context gets an equal share
+LLAMA_TOTAL_THREADS = int(os.getenv('LLAMA_TOTAL_THREADS', str(llama_settings()['total_threads'])))
+
+class EvaluatorSlot:
+    """One llama.cpp context in the pool and its usage counters"""
+
+    def __init__(self, index: int, n_threads: int):
+        """
+        Create the slot's evaluator; the model is loaded on first use.
+
+        Args:
+            index (int): Slot number reported in statistics
+            n_threads (int): CPU threads used by this context
+        """
+        self.index = index
+        self.n_threads = n_threads
+        self.evaluator = LlamaEvaluator(n_threads=n_threads)
+        self.busy = False
+        self.evaluations = 0
+        self.busy_seconds = 0.0
+        self.completion_tokens = 0
+        self.last_used = None
+
+    def stats(self) -> Dict:
+        """Usage counters of this slot"""
+        return {
+            'slot': self.index,
+            'n_threads': self.n_threads,
+            'n_ctx': self.evaluator.n_ctx,
+            'busy': self.busy,
+            'evaluations': self.evaluations,
+            'busy_seconds': round(self.busy_seconds, 1),
+            'completion_tokens': self.completion_tokens,
+            'last_used': self.last_used
+        }
+
+class EvaluatorPool:
+    """
+    Fixed set of LlamaEvaluator contexts for concurrent evaluations.
+
+    Every context maps the same model file with use_mmap, so the weights
+    are held once in the page cache however many contexts exist; each
+    context only adds its own KV cache. CPU threads are divided between
+    contexts so parallel evaluations do not oversubscribe the cores.
+    Layers offloaded to the GPU are not shared: every context uploads its
+    own copy to VRAM, so with GPU offload the pool has a single context.
+    Callers waiting for a context are admitted by a PriorityGate: by
+    priority class, then shortest job first.
+    """
+
+    def __init__(self, size: int = LLAMA_POOL_SIZE, total_threads: int = LLAMA_TOTAL_THREADS):
+        """
+        Create the pool's slots.
+
+        Args:
+            size (int): Number of contexts
+            total_threads (int): CPU threads split across contexts
+        """
+        size = max(1, size)
+        if llama_settings()['n_gpu_layers'] > 0 and size > 1:
+            logger.warning(f"GPU offload is enabled; using 1 evaluator context instead of {size}, "
+                           f"since each context would hold its own copy of the offloaded layers")
+            size = 1
+        n_threads = max(1, total_threads // size)
+        self.slots: List[EvaluatorSlot] = [EvaluatorSlot(i, n_threads) for i in range(size)]
+        self._free: deque = deque(self.slots)
+        self._lock = threading.Lock()
+        self.gate = PriorityGate('llama', size)
+        logger.info(f"Evaluator pool created with {size} contexts x {n_threads} threads")
+
+    @contextmanager
+    def slot(self, job: Optional[Job] = None) -> Iterator[LlamaEvaluator]:
+        """
+        Hold one context for the duration of the block.
+        Generation stops once the job's deadline has passed.
+
+        Args:
+            job (Job, optional): Scheduling attributes (default: interactive)
+
+        Yields:
+            LlamaEvaluator: Evaluator of the acquired slot
+
+        Raises:
+            DeadlineExceeded: The deadline passed while waiting
+        """
+        job = job or Job('interactive')
+        with self.gate.admit(job):
+            with self._lock:
+                slot = self._free.popleft()
+            slot.busy = True
+            slot.evaluator.job = job
+            started = time.monotonic()
+            try:
+                yield slot.evaluator
+            finally:
+                slot.busy = False
+                slot.evaluator.job = None
+                slot.evaluations += 1
+                slot.busy_seconds += time.monotonic() - started
+                slot.completion_tokens += slot.evaluator.last_usage.get('completion_tokens', 0)
+                slot.last_used = time.strftime('%Y-%m-%dT%H:%M:%S')
+                with self._lock:
+                    self._free.append(slot)
+
+    def stats(self) -> Dict:
+        """Queue and per-slot statistics"""
+        with self._lock:
+            free = len(self._free)
+        return {
+            'size': len(self.slots),
+            'free': free,
+            'queue': self.gate.stats(),
+            'slots': [slot.stats() for slot in self.slots]
+        }
+
+    def close(self):
+        """Free all contexts"""
+        for slot in self.slots:
+            slot.evaluator.cleanup()
+
+_pool: Optional[EvaluatorPool] = None
+_pool_lock = threading.Lock()
+
+def get_evaluator_pool() -> EvaluatorPool:
+    """Process-wide evaluator pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = EvaluatorPool()
+        return _pool
+
+def evaluator_pool_stats() -> Dict:
+    """Pool statistics without creating the pool"""
+    with _pool_lock:
+        pool = _pool
+    if pool is None:
+        return {'size': 0, 'configured_size': LLAMA_POOL_SIZE, 'total_threads': LLAMA_TOTAL_THREADS}
+    return pool.stats()
+
+def close_evaluator_pool():
+    """Free the pool's contexts if it was created"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
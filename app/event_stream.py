@@ -0,0 +1,120 @@
+import asyncio
+import asyncpg
+import json
+import logging
+from typing import AsyncIterator, Dict, Optional, Set
+from app.db_async import AsyncDatabaseHandler
+from app.init_db import EVENTS_CHANNEL
+from app.record_cache import invalidate_record
+from app.http_cache import data_version
+from app.db_handler import recent_writes
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class EventBroadcaster:
+    """
+    Fan out Postgres NOTIFY events to Server-Sent Events subscribers.
+    One dedicated LISTEN connection per API worker feeds an in-memory
+    queue per connected client, so browsers no longer poll the heavy
+    list and statistics endpoints.
+    """
+
+    def __init__(self, queue_size: int = 100, reconnect_delay: float = 5.0):
+        """
+        Initialize broadcaster state; the listener starts in start().
+
+        Args:
+            queue_size (int): Buffered events per client before new ones are dropped
+            reconnect_delay (float): Seconds between LISTEN reconnection attempts
+        """
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self.subscribers: Set[asyncio.Queue] = set()
+        self._conn = None
+        self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        """Deliver a notification to every subscriber queue"""
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.error(f"Ignoring malformed notification payload: {payload}")
+            return
+        # Writes from workers and other API processes arrive here too
+        data_version.bump()
+        if event.get('id') is not None:
+            recent_writes.mark([event['id']])
+            invalidate_record(event['id'])
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow client; it will resync on its next full fetch
+                pass
+
+    async def _listen(self):
+        """Keep a LISTEN connection open, reconnecting when it drops"""
+        params = AsyncDatabaseHandler().db_params
+        while True:
+            try:
+                self._conn = await asyncpg.connect(**params)
+                await self._conn.add_listener(EVENTS_CHANNEL, self._on_notify)
+                logger.info(f"Listening for notifications on {EVENTS_CHANNEL}")
+                data_version.set_live(True)
+                while not self._conn.is_closed():
+                    await asyncio.sleep(self.reconnect_delay)
+                data_version.set_live(False)
+                logger.warning("Notification connection closed, reconnecting")
+            except asyncio.CancelledError:
+                data_version.set_live(False)
+                raise
+            except Exception as e:
+                data_version.set_live(False)
+                logger.error(f"Notification listener failed: {str(e)}")
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self):
+        """Start the background LISTEN task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop listening and close the dedicated connection"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    async def subscribe(self, record_id: Optional[int] = None,
+                        heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """
+        Yield events as they arrive, or None every heartbeat seconds
+        so the caller can keep the HTTP connection alive.
+
+        Args:
+            record_id (int, optional): Only yield events for this record
+            heartbeat (float): Seconds of silence before yielding None
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if record_id is None or event.get('id') == record_id:
+                    yield event
+        finally:
+            self.subscribers.discard(queue)
+
+broadcaster = EventBroadcaster()
@@ -1,16 +1,23 @@
-from llama_cpp import Llama
+from llama_cpp import Llama, LlamaGrammar, StoppingCriteriaList
+import argparse
 import logging
 import os
 import sys
 from pathlib import Path
 import gc
 import warnings
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterator, List
 import re
+from contextlib import contextmanager
 from app.db_operations_evaluation import DatabaseOperationsEvaluation
 import json
 from datetime import datetime
 import torch
+from app.evaluation_cache import evaluation_result_cache
+from app.tuning import llama_settings
+from app.speculative import LLAMA_SPECULATIVE, build_draft_model
+from app.scheduler import DeadlineExceeded, Job
+from app.prescreen import prescreen
 
 # Suppress all warnings for cleaner output
 warnings.filterwarnings('ignore')
@@ -23,16 +30,153 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Ukrainian-optimized evaluation model in the models directory
+MODEL_NAME = "Mistral-7B-Instruct-Ukrainian.i1-Q4_K_S.gguf"
+
+# Bump whenever the evaluation prompt or sampling parameters change, so
+# results cached for the previous prompt are no longer served
+PROMPT_VERSION = "2"
+
+# Longest explanation the output grammar allows after the mark
+EVALUATION_MAX_CHARS = int(os.getenv('EVALUATION_MAX_CHARS', '1000'))
+
+# Shape enforced by the output grammar: mark, space, one-line explanation
+OUTPUT_PATTERN = re.compile(r'^(10|[1-9]) (.+)$')
+
+def build_output_grammar(max_chars: int = EVALUATION_MAX_CHARS) -> str:
+    """
+    GBNF grammar for "<1-10> <text of 1..max_chars characters>".
+    The explanation is one line without brackets, so instruction tags and
+    bracketed scale or criteria quotes cannot be produced.
+    """
+    return "\n".join([
+        'root ::= mark " " text',
+        'mark ::= "10" | [1-9]',
+        f'text ::= [^\\n\\r\\[\\]]{{1,{max_chars}}}',
+    ])
+
+# Largest context the evaluator may allocate; longer prompts are split.
+# An evaluator starts with the smallest context size that fits its first
+# request, since the KV cache is allocated for the full context, and grows
+# to a larger size only when a request needs it.
+LLAMA_N_CTX_MAX = int(os.getenv('LLAMA_N_CTX_MAX', '8192'))
+CONTEXT_SIZES = tuple(size for size in (2048, 4096, 8192, 16384, 32768) if size < LLAMA_N_CTX_MAX) + (LLAMA_N_CTX_MAX,)
+
+# Upper bound on generated tokens per completion
+MAX_EVALUATION_TOKENS = 500
+
+def build_evaluation_prompt(conversation_text: str) -> str:
+    """Scoring prompt for a whole conversation or one segment of it"""
+    return f"""[INST]Ви — максимально суворий та критичний аудитор контролю якості в контакт-центрі в компанії "MDM". 
+
+ВАЖЛИВО: 
+1. Відповідь має бути В ОДНОМУ РЯДКУ
+2. Всі відповіді надавати ВИКЛЮЧНО українською мовою
+3. Оцінювати МАКСИМАЛЬНО СУВОРО та КРИТИЧНО
+4. НЕ більше 1000 символів відповіді
+5. ТIЛЬКИ підсумок з оцінкою, НЕ треба обгрунтовувати вiдповiдь
+6. КРИТЕРІЇ ЗНИЖЕННЯ ОЦІНКИ, ЇХ НЕ МОЖНА ПОКАЗУВАТИ ОПЕРАТОРУ
+7. ПРИКЛАДИ ВІДПОВІДІ яким треба слідувати:
+    8 Оператор продемонстрував високий рівень професіоналізму, чудово вирішив питання клієнта, проявив емпатію та дотримувався стандартів. Незначні помилки в мові не вплинули на якість обслуговування.
+    5 Оператор частково вирішив питання клієнта, допустив кілька мовних помилок, не проявив достатньої емпатії, відповіді були неповними, але загальний підхід до обслуговування був задовільним.
+    2 Оператор не вирішив питання клієнта, проявив агресію у спілкуванні, допустив численні мовні помилки, порушив стандарти обслуговування, відповіді були неточними та неповними.
+
+
+ШКАЛА ОЦІНЮВАННЯ:
+1. Оцінка 10 - практично НЕМОЖЛИВА, бо ідеальних діалогів не буває
+2. Оцінка 9 - виключно для діалогів найвищої якості (менше 0.1% випадків)
+3. Оцінка 8 - відмінне обслуговування з мінімальними недоліками (менше 1% випадків)
+4. Оцінка 7 - дуже добре обслуговування з незначними помилками (до 5% випадків)
+5. Оцінка 6 - добре обслуговування з кількома помилками (до 10% випадків)
+6. Оцінка 5 - задовільне обслуговування з помітними недоліками (до 20% випадків)
+7. Оцінка 4 - прийнятне обслуговування зі значними помилками (до 30% випадків)
+8. Оцінка 3 - слабке обслуговування з суттєвими порушеннями (до 20% випадків)
+9. Оцінка 2 - погане обслуговування з критичними помилками (до 10% випадків)
+10. Оцінка 1 - неприйнятне обслуговування з грубими порушеннями (до 5% випадків)
+
+КРИТЕРІЇ ЗНИЖЕННЯ ОЦІНКИ, ЇХ НЕ МОЖНА ПОКАЗУВАТИ ОПЕРАТОРУ.  :
+- Будь-які помилки в мові (-2 бал за кожну)
+- Неповні або неточні відповіді (-2 бал)
+- Відсутність емпатії (-2 бал)
+- Агресивний стиль спілкування (-2 бали)
+- Порушення стандартів (-2 бали)
+- Невирішене питання клієнта (-3 бали)
+
+Оцініть максимально критично наступний діалог та надайте ТIЛЬКИ підсумок на Укр. мові з оцінкою, НЕ треба обгрунтовувати вiдповiдь:
+
+{conversation_text}
+ПРИКЛАДИ ВІДПОВІДІ яким треба слідувати:
+8 Оператор продемонстрував високий рівень професіоналізму, чудово вирішив питання клієнта, проявив емпатію та дотримувався стандартів. Незначні помилки в мові не вплинули на якість обслуговування.
+5 Оператор частково вирішив питання клієнта, допустив кілька мовних помилок, не проявив достатньої емпатії, відповіді були неповними, але загальний підхід до обслуговування був задовільним.
+2 Оператор не вирішив питання клієнта, проявив агресію у спілкуванні, допустив численні мовні помилки, порушив стандарти обслуговування, відповіді були неточними та неповними.
+
+Формат відповіді (все в одному рядку) НЕ більше 1300 символів, УКРАЇНСЬКОЮ МОВОЮ, можно менше:
+[число] [пояснення чому знижена оцінка, своїми словами, НЕ використовуй ШКАЛУ ОЦІНЮВАННЯ, забудь про ШКАЛУ ОЦІНЮВАННЯ]
+[/INST]"""
+
+def build_reduce_prompt(partials: List[tuple[str, int]]) -> str:
+    """Prompt merging evaluations of consecutive segments of one conversation"""
+    parts = "\n".join(
+        f"Частина {index}: {mark} {text}" for index, (text, mark) in enumerate(partials, 1)
+    )
+    return f"""[INST]Ви — максимально суворий та критичний аудитор контролю якості в контакт-центрі в компанії "MDM".
+
+Діалог був занадто довгим, тому його послідовні частини оцінено окремо:
+
+{parts}
+
+Об'єднайте ці оцінки в ОДНУ підсумкову оцінку всього діалогу. Помилка в будь-якій частині знижує загальну оцінку.
+Формат відповіді (все в одному рядку) НЕ більше 1300 символів, УКРАЇНСЬКОЮ МОВОЮ, можно менше:
+[число] [пояснення чому знижена оцінка, своїми словами]
+[/INST]"""
+
+def get_cached_evaluation(conversation_text: str) -> Optional[tuple[str, int]]:
+    """
+    Look up a stored evaluation of identical text by the current model and prompt.
+
+    Args:
+        conversation_text: The text to evaluate
+
+    Returns:
+        Optional[tuple[str, int]]: (evaluation_text, mark), or None on a miss
+    """
+    if not conversation_text:
+        return None
+    return evaluation_result_cache.get(conversation_text, MODEL_NAME, PROMPT_VERSION)
+
+def _complete_result_items(evaluation_text: Optional[str], mark: int,
+                           prescreen: Optional[Dict] = None) -> Iterator[Dict]:
+    """Stream items for an evaluation that is already complete"""
+    if evaluation_text:
+        match = OUTPUT_PATTERN.match(evaluation_text)
+        yield {'type': 'mark', 'mark': mark}
+        yield {'type': 'token', 'text': match.group(2) if match else evaluation_text}
+    done = {'type': 'done', 'text': evaluation_text, 'mark': mark}
+    if prescreen:
+        done['prescreen'] = prescreen
+    yield done
+
 class LlamaEvaluator:
-    def __init__(self) -> None:
+    def __init__(self, n_threads: Optional[int] = None, speculative: Optional[str] = None) -> None:
         """
         Initialize Mistral-7B-Instruct-Ukrainian model for conversation evaluation.
         This model is specifically fine-tuned for Ukrainian language tasks with Q4_K_S quantization,
         providing optimal balance between performance and resource usage.
+
+        Args:
+            n_threads: CPU threads used by this evaluator's context
+                (default: from the tuning profile)
+            speculative: Speculative decoding mode, one of 'off',
+                'prompt-lookup', 'draft-model' (default: LLAMA_SPECULATIVE)
         """
         try:
+            # Thread, batch and GPU offload settings tuned for this machine
+            self.settings = llama_settings()
+            self.n_threads = n_threads or self.settings['n_threads']
+            self.speculative = speculative or LLAMA_SPECULATIVE
+
             # Define the model name and directory
-            model_name = "Mistral-7B-Instruct-Ukrainian.i1-Q4_K_S.gguf"  # Ukrainian-optimized model
+            model_name = MODEL_NAME
             models_dir = Path("models")  # Directory where models are stored
             model_path = models_dir / model_name  # Full path to the model file
 
@@ -65,21 +209,18 @@ class LlamaEvaluator:
                 logger.error(f"Cannot read model file: {str(read_error)}")
                 raise
 
-            logger.info("Initializing Mistral-7B-Instruct-Ukrainian model with optimized parameters...")
-
-            # Initialize the model with parameters optimized for Ukrainian language processing
-            self.model = Llama(
-                model_path=str(model_path.resolve()),  # Absolute path to model
-                n_ctx=8048,          # Context window size for conversation analysis
-                n_threads=8,         # CPU threads for parallel processing
-                n_gpu_layers=35,     # GPU layers for optimal 7B model performance
-                n_batch=512,         # Batch size for efficient processing
-                seed=42,             # Fixed seed for consistent evaluations
-                verbose=True,        # Enable detailed logging for monitoring
-                use_mlock=False,     # Disable memory locking for stability
-                use_mmap=True        # Enable memory mapping for better performance
-            )
-            logger.info("Mistral-7B-Instruct-Ukrainian model initialized successfully")
+            self.model_path = str(model_path.resolve())
+
+            # Vocabulary-only instance for counting tokens before a context
+            # size is chosen; the full model is loaded on first evaluation
+            self.tokenizer = Llama(model_path=self.model_path, vocab_only=True, verbose=False)
+            self.grammar = LlamaGrammar.from_string(build_output_grammar(), verbose=False)
+            self.model = None
+            self.n_ctx = 0
+            self.last_usage = {}
+            # Scheduler job being served; generation stops at its deadline
+            self.job = None
+            logger.info("Mistral-7B-Instruct-Ukrainian tokenizer initialized successfully")
 
         except FileNotFoundError as fnf_error:
             # Handle missing file errors with specific error messages
@@ -90,13 +231,65 @@ class LlamaEvaluator:
             logger.error(f"Mistral-7B-Instruct-Ukrainian model initialization failed: {str(e)}")
             raise
 
-    def evaluate_conversation(self, conversation_text: str) -> tuple[Optional[str], int]:
+    def _load_model(self, n_ctx: int):
+        """
+        Load the model with the given context size.
+        Weights are memory-mapped, so reloading for a different context
+        size reads them from the page cache rather than from disk.
+        """
+        if self.model is not None:
+            del self.model
+            self.model = None
+            gc.collect()
+
+        logger.info(f"Initializing Mistral-7B-Instruct-Ukrainian model with n_ctx={n_ctx}, "
+                    f"speculative decoding {self.speculative}...")
+
+        # Initialize the model with parameters optimized for Ukrainian language processing
+        self.model = Llama(
+            model_path=self.model_path,  # Absolute path to model
+            n_ctx=n_ctx,         # Context window size chosen for the request
+            n_threads=self.n_threads,  # CPU threads for parallel processing
+            n_gpu_layers=self.settings['n_gpu_layers'],  # 0 on CPU-only machines
+            n_batch=self.settings['n_batch'],            # Prompt batch size
+            seed=42,             # Fixed seed for consistent evaluations
+            verbose=True,        # Enable detailed logging for monitoring
+            use_mlock=False,     # Disable memory locking for stability
+            use_mmap=True,       # Enable memory mapping for better performance
+            draft_model=build_draft_model(self.speculative, n_ctx, self.n_threads)
+        )
+        self.n_ctx = n_ctx
+        logger.info("Mistral-7B-Instruct-Ukrainian model initialized successfully")
+
+    def _ensure_context(self, n_tokens: int):
+        """
+        Make sure the loaded context holds n_tokens. The model starts with
+        the smallest context size that fits and only ever grows: a loaded
+        context is kept for shorter prompts, so mixed-length traffic
+        reloads the model at most once per context size.
+        """
+        if self.model is not None and self.n_ctx >= min(n_tokens, LLAMA_N_CTX_MAX):
+            return
+        n_ctx = next((size for size in CONTEXT_SIZES if size >= n_tokens), LLAMA_N_CTX_MAX)
+        self._load_model(n_ctx)
+
+    def count_tokens(self, text: str, add_bos: bool = True) -> int:
+        """Number of model tokens in text"""
+        return len(self.tokenizer.tokenize(text.encode('utf-8'), add_bos=add_bos))
+
+    def evaluate_conversation(self, conversation_text: str,
+                              check_cache: bool = True) -> tuple[Optional[str], int]:
         """
         Evaluate a conversation and generate a strict score with explanation.
-        Returns both the evaluation text and the numeric mark.
+        Returns both the evaluation text and the numeric mark. Text evaluated
+        before with the same model and prompt is served from the result cache.
+        Conversations too long for the largest context are scored in
+        segments whose evaluations are then merged.
 
         Args:
             conversation_text: The text to evaluate
+            check_cache: Look up the result cache first; callers that already
+                missed pass False
 
         Returns:
             tuple[Optional[str], int]: Tuple containing (evaluation_text, mark)
@@ -106,142 +299,237 @@ class LlamaEvaluator:
                 logger.warning("Empty conversation text provided")
                 return None, 0
 
-            # Construct the evaluation prompt with strict criteria
-            prompt = f"""[INST]Ви — максимально суворий та критичний аудитор контролю якості в контакт-центрі в компанії "MDM". 
+            self.last_usage = {}
+            if check_cache:
+                cached = get_cached_evaluation(conversation_text)
+                if cached:
+                    return cached
 
-ВАЖЛИВО: 
-1. Відповідь має бути В ОДНОМУ РЯДКУ
-2. Всі відповіді надавати ВИКЛЮЧНО українською мовою
-3. Оцінювати МАКСИМАЛЬНО СУВОРО та КРИТИЧНО
-4. НЕ більше 1000 символів відповіді
-5. ТIЛЬКИ підсумок з оцінкою, НЕ треба обгрунтовувати вiдповiдь
-6. КРИТЕРІЇ ЗНИЖЕННЯ ОЦІНКИ, ЇХ НЕ МОЖНА ПОКАЗУВАТИ ОПЕРАТОРУ
-7. ПРИКЛАДИ ВІДПОВІДІ яким треба слідувати:
-    8 Оператор продемонстрував високий рівень професіоналізму, чудово вирішив питання клієнта, проявив емпатію та дотримувався стандартів. Незначні помилки в мові не вплинули на якість обслуговування.
-    5 Оператор частково вирішив питання клієнта, допустив кілька мовних помилок, не проявив достатньої емпатії, відповіді були неповними, але загальний підхід до обслуговування був задовільним.
-    2 Оператор не вирішив питання клієнта, проявив агресію у спілкуванні, допустив численні мовні помилки, порушив стандарти обслуговування, відповіді були неточними та неповними.
+            prompt = build_evaluation_prompt(conversation_text)
 
+            if self.count_tokens(prompt) + MAX_EVALUATION_TOKENS <= LLAMA_N_CTX_MAX:
+                evaluation_text, mark = self._generate(prompt)
+            else:
+                # Prompt and answer do not fit the largest context
+                evaluation_text, mark = self._evaluate_segments(conversation_text)
 
-ШКАЛА ОЦІНЮВАННЯ:
-1. Оцінка 10 - практично НЕМОЖЛИВА, бо ідеальних діалогів не буває
-2. Оцінка 9 - виключно для діалогів найвищої якості (менше 0.1% випадків)
-3. Оцінка 8 - відмінне обслуговування з мінімальними недоліками (менше 1% випадків)
-4. Оцінка 7 - дуже добре обслуговування з незначними помилками (до 5% випадків)
-5. Оцінка 6 - добре обслуговування з кількома помилками (до 10% випадків)
-6. Оцінка 5 - задовільне обслуговування з помітними недоліками (до 20% випадків)
-7. Оцінка 4 - прийнятне обслуговування зі значними помилками (до 30% випадків)
-8. Оцінка 3 - слабке обслуговування з суттєвими порушеннями (до 20% випадків)
-9. Оцінка 2 - погане обслуговування з критичними помилками (до 10% випадків)
-10. Оцінка 1 - неприйнятне обслуговування з грубими порушеннями (до 5% випадків)
+            # Results without a mark are not cached so they are retried
+            if evaluation_text and mark:
+                evaluation_result_cache.set(
+                    conversation_text, MODEL_NAME, PROMPT_VERSION, evaluation_text, mark
+                )
+            return evaluation_text, mark
 
-КРИТЕРІЇ ЗНИЖЕННЯ ОЦІНКИ, ЇХ НЕ МОЖНА ПОКАЗУВАТИ ОПЕРАТОРУ.  :
-- Будь-які помилки в мові (-2 бал за кожну)
-- Неповні або неточні відповіді (-2 бал)
-- Відсутність емпатії (-2 бал)
-- Агресивний стиль спілкування (-2 бали)
-- Порушення стандартів (-2 бали)
-- Невирішене питання клієнта (-3 бали)
+        except DeadlineExceeded as e:
+            logger.error(f"Evaluation cancelled: {str(e)}")
+            return None, 0
+        except Exception as e:
+            logger.error(f"Evaluation generation failed: {str(e)}")
+            return None, 0
 
-Оцініть максимально критично наступний діалог та надайте ТIЛЬКИ підсумок на Укр. мові з оцінкою, НЕ треба обгрунтовувати вiдповiдь:
+    def _generate(self, prompt: str) -> tuple[str, int]:
+        """
+        Run one completion and extract the evaluation text and mark.
+        The output grammar guarantees the "<mark> <text>" shape, so the
+        mark is always at the start and generation ends with the answer.
 
-{conversation_text}
-ПРИКЛАДИ ВІДПОВІДІ яким треба слідувати:
-8 Оператор продемонстрував високий рівень професіоналізму, чудово вирішив питання клієнта, проявив емпатію та дотримувався стандартів. Незначні помилки в мові не вплинули на якість обслуговування.
-5 Оператор частково вирішив питання клієнта, допустив кілька мовних помилок, не проявив достатньої емпатії, відповіді були неповними, але загальний підхід до обслуговування був задовільним.
-2 Оператор не вирішив питання клієнта, проявив агресію у спілкуванні, допустив численні мовні помилки, порушив стандарти обслуговування, відповіді були неточними та неповними.
+        Args:
+            prompt: Complete instruction prompt
 
-Формат відповіді (все в одному рядку) НЕ більше 1300 символів, УКРАЇНСЬКОЮ МОВОЮ, можно менше:
-[число] [пояснення чому знижена оцінка, своїми словами, НЕ використовуй ШКАЛУ ОЦІНЮВАННЯ, забудь про ШКАЛУ ОЦІНЮВАННЯ]
-[/INST]"""
+        Returns:
+            tuple[str, int]: Evaluation text and mark (0 if none was found)
 
-            logger.info("Sending prompt to Mistral model for evaluation")
-
-            # Generate evaluation with strict parameters for consistent single response
-            response = self.model.create_completion(
-                prompt,
-                max_tokens=500,             # Limit response length
-                temperature=0.1,            # Very low temperature for consistency
-                top_p=0.1,                 # Reduced for more focused sampling
-                repeat_penalty=1.5,         # Increased to prevent repetition
-                top_k=10,                  # Reduced for more focused output
-                stop=["\n", "[INST]"]      # Stop at newlines or instruction tags
-            )
+        Raises:
+            DeadlineExceeded: The job's deadline passed before or during generation
+        """
+        self._check_deadline()
 
-            logger.debug(f"Raw response from model: {response}")
-
-            # Extract and clean the response text
-            evaluation_text = response['choices'][0]['text'].strip()
-            logger.debug(f"Raw evaluation text: {evaluation_text}")
-
-            # Enhanced cleaning process with specific text filtering
-            evaluation_text = (evaluation_text
-                .replace("[INST]", "")
-                .replace("[/INST]", "")
-                .replace("\n", " ")         # Replace newlines with spaces
-                .replace("\r", " ")         # Replace carriage returns
-                .replace("\t", " ")         # Replace tabs
-                .replace("[REDACTED]", "")
-                .replace("'", "")
-                .replace('"', '')
-                .strip())
-
-            # Remove scale and criteria mentions with case variations
-            for pattern in [
-                "ШКАЛА ОЦІНЮВАННЯ",
-                "шкала оцінювання",
-                "Шкала оцінювання",
-                "ШКАЛУ ОЦІНЮВАННЯ",
-                "шкалу оцінювання",
-                "Шкалу оцінювання",
-                "КРИТЕРІЇ ЗНИЖЕННЯ",
-                "критерії зниження",
-                "Критерії зниження"
-            ]:
-                evaluation_text = re.sub(
-                    f'\\[.*?{pattern}.*?\\]',  # Match any text in brackets containing the pattern
-                    '',                         # Replace with empty string
-                    evaluation_text            
-                )
+        # Parameters first: they load the model, so self.model is only read afterwards
+        params = self._completion_params(prompt)
+
+        # Generate evaluation with strict parameters for consistent single response
+        response = self.model.create_completion(prompt, **params)
+
+        logger.debug(f"Raw response from model: {response}")
+
+        # Token counts summed over the calls of one evaluation, used for throughput reporting
+        for key, value in (response.get('usage') or {}).items():
+            self.last_usage[key] = self.last_usage.get(key, 0) + value
 
-            # Clean up multiple spaces after filtering
-            evaluation_text = " ".join(evaluation_text.split())
+        # Output cut off at the deadline is incomplete; never parse or cache it
+        self._check_deadline()
 
-            logger.debug(f"Cleaned evaluation text: {evaluation_text}")
+        return self._parse_output(response['choices'][0]['text'])
 
-            # Remove specific unwanted text pattern
-            unwanted_text = "Для отримання допомоги з питань навчання можна писати до нашої команди в Telegram: @EduGuru_UA або спробуйте у своєму бронюванні самостійно вирішити запитання, переглянувши інформацію у розділі Навчання сайту https://support.example.com/uk/learning. Там є багато корисної інформації щодо нашої платформи та порад з використання програмного забезпечення."
-            evaluation_text = evaluation_text.replace(unwanted_text, "").strip()
+    def _completion_params(self, prompt: str) -> Dict:
+        """Sampling parameters shared by regular and streaming completions"""
+        self._ensure_context(self.count_tokens(prompt) + MAX_EVALUATION_TOKENS)
+        logger.info(f"Sending prompt to Mistral model for evaluation (n_ctx={self.n_ctx})")
+        return {
+            'max_tokens': MAX_EVALUATION_TOKENS,  # Safety bound; the grammar ends the answer first
+            'temperature': 0.1,        # Very low temperature for consistency
+            'top_p': 0.1,              # Reduced for more focused sampling
+            'repeat_penalty': 1.5,     # Increased to prevent repetition
+            'top_k': 10,               # Reduced for more focused output
+            'grammar': self.grammar,   # Constrain output to "<1-10> <text>"
+            'stopping_criteria': StoppingCriteriaList([self._deadline_reached])
+        }
+
+    def _deadline_reached(self, input_ids, logits) -> bool:
+        """Stopping criterion: end generation once the job's deadline has passed"""
+        return self.job is not None and self.job.expired()
+
+    def _check_deadline(self):
+        """Raise DeadlineExceeded if the current job's deadline has passed"""
+        if self.job is not None:
+            self.job.check_deadline()
+
+    def _parse_output(self, raw_text: str) -> tuple[str, int]:
+        """
+        Normalize generated text and read the leading mark.
 
-            # First try to extract standalone number at start
-            mark_match = re.match(r'^\s*(\d+)\s+', evaluation_text)
-            if mark_match:
-                mark = int(mark_match.group(1))
-                logger.info(f"Extracted mark from start of text: {mark}")
+        Returns:
+            tuple[str, int]: Evaluation text and mark (0 if none was found)
+        """
+        # Remove specific unwanted text pattern
+        unwanted_text = "Для отримання допомоги з питань навчання можна писати до нашої команди в Telegram: @EduGuru_UA або спробуйте у своєму бронюванні самостійно вирішити запитання, переглянувши інформацію у розділі Навчання сайту https://support.example.com/uk/learning. Там є багато корисної інформації щодо нашої платформи та порад з використання програмного забезпечення."
+        evaluation_text = " ".join(raw_text.replace(unwanted_text, "").split())
+
+        mark_match = OUTPUT_PATTERN.match(evaluation_text)
+        if mark_match:
+            mark = int(mark_match.group(1))
+            logger.info(f"Extracted mark: {mark}")
+        else:
+            # Only possible if generation hit max_tokens before the mark
+            mark = 0
+            logger.warning(f"Output did not match the grammar: {evaluation_text[:100]}")
+
+        logger.info(f"Final evaluation text: {evaluation_text}")
+        return evaluation_text, mark
+
+    def stream_conversation(self, conversation_text: str,
+                            check_cache: bool = True) -> Iterator[Dict]:
+        """
+        Evaluate a conversation, yielding output while it is generated.
+        The grammar puts the mark first, so it is yielded as soon as its
+        digits are complete; explanation text follows token by token.
+        Cached results and map-reduced long transcripts are yielded whole.
+
+        Args:
+            conversation_text: The text to evaluate
+            check_cache: Look up the result cache first
+
+        Yields:
+            Dict: {'type': 'mark', 'mark': int}, then {'type': 'token', 'text': str}
+            items, then {'type': 'done', 'text': str, 'mark': int}; 'done' has
+            text None if the evaluation failed
+
+        Raises:
+            DeadlineExceeded: The job's deadline passed during generation
+        """
+        self.last_usage = {}
+        cached = get_cached_evaluation(conversation_text) if check_cache else None
+        prompt = build_evaluation_prompt(conversation_text)
+        if cached or self.count_tokens(prompt) + MAX_EVALUATION_TOKENS > LLAMA_N_CTX_MAX:
+            evaluation_text, mark = cached or self.evaluate_conversation(conversation_text, check_cache=False)
+            yield from _complete_result_items(evaluation_text, mark)
+            return
+
+        self._check_deadline()
+        raw_text = ''
+        mark_sent = False
+        params = self._completion_params(prompt)
+        for chunk in self.model.create_completion(prompt, stream=True, **params):
+            raw_text += chunk['choices'][0]['text']
+            if not mark_sent:
+                # The mark is complete once the separating space is generated
+                head, separator, rest = raw_text.lstrip().partition(' ')
+                if not separator:
+                    continue
+                mark_sent = True
+                yield {'type': 'mark', 'mark': int(head) if head.isdigit() else 0}
+                if rest:
+                    yield {'type': 'token', 'text': rest}
             else:
-                # Fallback patterns if no leading number found
-                mark_patterns = [
-                    r'Оцінка\s*:\s*(\d+)',
-                    r'Оцінка\s*(\d+)',
-                    r'(\d+)\s*балів',
-                    r'(\d+)\s*бал'
-                ]
-                
-                for pattern in mark_patterns:
-                    match = re.search(pattern, evaluation_text)
-                    if match:
-                        mark = int(match.group(1))
-                        logger.info(f"Extracted mark using pattern: {mark}")
-                        break
-                else:
-                    mark = 0
-                    logger.warning("No mark found in evaluation text")
-
-            logger.info(f"Final evaluation text: {evaluation_text}")
-            return evaluation_text, mark
+                yield {'type': 'token', 'text': chunk['choices'][0]['text']}
 
-        except Exception as e:
-            logger.error(f"Evaluation generation failed: {str(e)}")
+        self._check_deadline()
+        evaluation_text, mark = self._parse_output(raw_text)
+        if evaluation_text and mark:
+            evaluation_result_cache.set(
+                conversation_text, MODEL_NAME, PROMPT_VERSION, evaluation_text, mark
+            )
+        yield {'type': 'done', 'text': evaluation_text or None, 'mark': mark}
+
+    def _split_segments(self, conversation_text: str, budget: int) -> List[str]:
+        """
+        Split a transcript into segments of at most budget tokens.
+        Segments end on sentence boundaries; sentences longer than the
+        budget are cut on token boundaries.
+        """
+        segments = []
+        current, current_tokens = [], 0
+        for sentence in re.split(r'(?<=[.!?…])\s+', conversation_text):
+            tokens = self.count_tokens(sentence, add_bos=False)
+            if tokens > budget:
+                pieces = self.tokenizer.tokenize(sentence.encode('utf-8'), add_bos=False)
+                for start in range(0, len(pieces), budget):
+                    window = pieces[start:start + budget]
+                    if current:
+                        segments.append(' '.join(current))
+                        current, current_tokens = [], 0
+                    segments.append(self.tokenizer.detokenize(window).decode('utf-8', errors='ignore'))
+                continue
+            if current and current_tokens + tokens > budget:
+                segments.append(' '.join(current))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += tokens + 1
+        if current:
+            segments.append(' '.join(current))
+        return segments
+
+    def _evaluate_segments(self, conversation_text: str) -> tuple[Optional[str], int]:
+        """
+        Map-reduce evaluation of a transcript longer than the context:
+        each token-budgeted segment is scored with the regular prompt,
+        then the segment evaluations are merged by a reduce prompt.
+        """
+        template_tokens = self.count_tokens(build_evaluation_prompt(''))
+        budget = LLAMA_N_CTX_MAX - template_tokens - MAX_EVALUATION_TOKENS
+        segments = self._split_segments(conversation_text, budget)
+        logger.info(f"Transcript exceeds the context, evaluating {len(segments)} segments")
+
+        partials = []
+        for index, segment in enumerate(segments, 1):
+            evaluation_text, mark = self._generate(build_evaluation_prompt(segment))
+            if evaluation_text and mark:
+                partials.append((evaluation_text, mark))
+            else:
+                logger.warning(f"Segment {index} of {len(segments)} produced no mark")
+
+        if not partials:
             return None, 0
+        if len(partials) == 1:
+            return partials[0]
+        return self._reduce(partials)
+
+    def _reduce(self, partials: List[tuple[str, int]]) -> tuple[str, int]:
+        """
+        Merge segment evaluations into one. When the reduce prompt itself
+        would not fit, halves are merged first.
+        """
+        prompt = build_reduce_prompt(partials)
+        if len(partials) > 2 and self.count_tokens(prompt) + MAX_EVALUATION_TOKENS > LLAMA_N_CTX_MAX:
+            middle = len(partials) // 2
+            return self._reduce([self._reduce(partials[:middle]), self._reduce(partials[middle:])])
+
+        evaluation_text, mark = self._generate(prompt)
+        if not evaluation_text or not mark:
+            # Fall back to the strictest reading of the segment marks
+            logger.warning("Reduce step produced no mark, using the lowest segment evaluation")
+            return min(partials, key=lambda partial: partial[1])
+        return evaluation_text, mark
 
     def cleanup(self):
         """
@@ -252,6 +540,8 @@ class LlamaEvaluator:
             # Free up GPU memory if the model is loaded
             if hasattr(self, 'model'):
                 del self.model
+            if hasattr(self, 'tokenizer'):
+                del self.tokenizer
             gc.collect()  # Perform garbage collection to free up memory
 
             # If CUDA is available, clear the GPU cache
@@ -261,25 +551,64 @@ class LlamaEvaluator:
         except Exception as e:
             logger.error(f"Cleanup failed: {str(e)}")
 
-def evaluate_single(conversation_text: str) -> Optional[Dict]:
+@contextmanager
+def evaluator_session(pool=None, job: Optional[Job] = None) -> Iterator[LlamaEvaluator]:
+    """
+    Provide an evaluator for one evaluation: a context borrowed from pool
+    (an EvaluatorPool) in the order set by job, or a dedicated evaluator
+    freed afterwards. Generation stops at the job's deadline either way.
+    """
+    if pool is not None:
+        with pool.slot(job) as evaluator:
+            yield evaluator
+        return
+    evaluator = LlamaEvaluator()
+    evaluator.job = job
+    try:
+        yield evaluator
+    finally:
+        evaluator.cleanup()
+
+def evaluate_single(conversation_text: str, pool=None, job: Optional[Job] = None) -> Optional[Dict]:
     """
     Evaluate a single conversation and return the evaluation results.
 
     Args:
         conversation_text: The text to evaluate
+        pool: EvaluatorPool to borrow a context from; without one the
+            model is loaded for this call only
+        job: Scheduler priority and deadline (default: interactive)
 
     Returns:
         Optional[Dict]: Evaluation results including original text and evaluation
     """
-    evaluator = None
     try:
         logger.info("Starting single conversation evaluation")
 
-        # Initialize the evaluator
-        evaluator = LlamaEvaluator()
-
-        # Perform the evaluation
-        evaluation_text, mark = evaluator.evaluate_conversation(conversation_text)
+        # Empty, silent and voicemail transcripts are decided by rules
+        decision = prescreen(conversation_text)
+        if decision:
+            return {
+                'original_text': conversation_text,
+                'evaluation': decision['text'],
+                'score': decision['mark'],
+                'prescreen': decision['prescreen'],
+                'evaluation_data': {
+                    'text': decision['text'],
+                    'mark': decision['mark'],
+                    'prescreen': decision['prescreen'],
+                    'evaluated_at': datetime.now().isoformat()
+                }
+            }
+
+        # Identical text was scored before; skip loading the model
+        cached = get_cached_evaluation(conversation_text)
+        if cached:
+            evaluation_text, mark = cached
+        else:
+            # Perform the evaluation
+            with evaluator_session(pool, job) as evaluator:
+                evaluation_text, mark = evaluator.evaluate_conversation(conversation_text, check_cache=False)
 
         if not evaluation_text:
             logger.error("Single conversation evaluation failed")
@@ -305,10 +634,39 @@ def evaluate_single(conversation_text: str) -> Optional[Dict]:
     except Exception as e:
         logger.error(f"Single conversation evaluation failed: {str(e)}")
         return None
-    finally:
-        # Cleanup resources to free up memory
-        if evaluator:
-            evaluator.cleanup()
+
+def stream_single(conversation_text: str, pool=None, job: Optional[Job] = None) -> Iterator[Dict]:
+    """
+    Evaluate a single conversation, yielding output as it is generated.
+    Pre-screened and cached results are yielded without loading the model.
+
+    Args:
+        conversation_text: The text to evaluate
+        pool: EvaluatorPool to borrow a context from
+        job: Scheduler priority and deadline (default: interactive)
+
+    Yields:
+        Dict: Items as produced by LlamaEvaluator.stream_conversation
+    """
+    decision = prescreen(conversation_text)
+    if decision:
+        yield from _complete_result_items(decision['text'], decision['mark'], decision['prescreen'])
+        return
+
+    cached = get_cached_evaluation(conversation_text)
+    if cached:
+        yield from _complete_result_items(*cached)
+        return
+
+    try:
+        with evaluator_session(pool, job) as evaluator:
+            yield from evaluator.stream_conversation(conversation_text, check_cache=False)
+    except DeadlineExceeded as e:
+        logger.error(f"Streaming evaluation cancelled: {str(e)}")
+        yield {'type': 'done', 'text': None, 'mark': 0}
+    except Exception as e:
+        logger.error(f"Streaming evaluation failed: {str(e)}")
+        yield {'type': 'done', 'text': None, 'mark': 0}
 
 def evaluate_from_database(record_id: int) -> Optional[Dict]:
     """
@@ -337,9 +695,21 @@ def evaluate_from_database(record_id: int) -> Optional[Dict]:
             logger.error(f"No text found in speech data for record {record_id}")
             return None
 
-        # Initialize evaluator and perform evaluation
-        evaluator = LlamaEvaluator()
-        evaluation_text, mark = evaluator.evaluate_conversation(text)
+        decision = prescreen(text)
+        if decision:
+            return {
+                'evaluation': decision['text'],
+                'score': decision['mark'],
+                'prescreen': decision['prescreen']
+            }
+
+        # Initialize evaluator and perform evaluation, unless the text was scored before
+        cached = get_cached_evaluation(text)
+        if cached:
+            evaluation_text, mark = cached
+        else:
+            evaluator = LlamaEvaluator()
+            evaluation_text, mark = evaluator.evaluate_conversation(text, check_cache=False)
 
         if not evaluation_text:
             logger.error("Evaluation failed to produce text")
@@ -380,16 +750,42 @@ def get_evaluation(evaluation_id: int) -> Optional[Dict]:
         logger.error(f"Failed to get evaluation: {str(e)}")
         return None
 
+def setup_utf8_encoding():
+    """Force UTF-8 on stdout/stderr so Ukrainian output survives non-UTF-8 consoles"""
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, 'reconfigure'):
+            stream.reconfigure(encoding='utf-8')
+
 # Command-line interface
 if __name__ == "__main__":
     setup_utf8_encoding()
-    
-    if len(sys.argv) < 2:
-        print("Usage: python fast_inference.py <record_id>", file=sys.stderr)
+
+    parser = argparse.ArgumentParser(
+        description='Evaluate a single record, or drain pending records in batches'
+    )
+    parser.add_argument('record_id', nargs='?', type=int, help='Record ID to evaluate')
+    parser.add_argument('--batch', action='store_true',
+                        help='Run the batch evaluator until the pending queue is empty')
+    parser.add_argument('--batch-size', type=int, default=16,
+                        help='Records claimed and stored per batch (default: 16)')
+    parser.add_argument('--follow', action='store_true',
+                        help='With --batch, keep polling for new records instead of exiting')
+
+    args = parser.parse_args()
+
+    if args.batch:
+        from app.evaluation_worker import EvaluationWorker
+        worker = EvaluationWorker(batch_size=args.batch_size)
+        worker.run(drain_only=not args.follow)
+        print(json.dumps(worker.throughput(), ensure_ascii=False), flush=True)
+        sys.exit(0)
+
+    if args.record_id is None:
+        parser.print_usage(sys.stderr)
         sys.exit(1)
 
     try:
-        record_id = int(sys.argv[1])
+        record_id = args.record_id
         result = evaluate_from_database(record_id)
         
         if result:
@@ -398,9 +794,6 @@ if __name__ == "__main__":
             print("Evaluation failed", file=sys.stderr, flush=True)
             sys.exit(1)
 
-    except ValueError:
-        print("Please provide a valid record ID", file=sys.stderr)
-        sys.exit(1)
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr, flush=True)
         sys.exit(1) 
\ No newline at end of file
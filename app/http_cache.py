@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+from fastapi import Request, Response
+from starlette.middleware.gzip import GZipMiddleware
+from app.db_handler import recent_writes, replica_params
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+
+# Streaming endpoints that must not be buffered by the compressor
+UNCOMPRESSED_PATHS = {'/events/'}
+UNCOMPRESSED_SUFFIXES = ('/stream',)
+
+# Collection reads are served by the replica when one is configured
+READ_REPLICA_CONFIGURED = replica_params() is not None
+
+class DataVersion:
+    """
+    Process-wide version token for collection endpoints.
+
+    The token changes on every change notification from Postgres, so an
+    unchanged token means list and statistics results are unchanged and
+    a conditional request can be answered without querying. While the
+    notification listener is disconnected changes could be missed, so no
+    token is issued until it is back. With a read replica no token is
+    issued right after a write either, so a response read from a lagging
+    replica is never cached under the new version.
+    """
+
+    def __init__(self):
+        """Start with a token unique to this process"""
+        self._epoch = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.live = False
+
+    def bump(self):
+        """Record that data changed"""
+        self._counter += 1
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def set_live(self, live: bool):
+        """Mark whether change notifications are being received"""
+        if live and not self.live:
+            # Changes made while disconnected were not seen
+            self.bump()
+        self.live = live
+
+    @property
+    def token(self) -> Optional[str]:
+        """Current version token, or None when it cannot be trusted"""
+        if not self.live:
+            return None
+        if READ_REPLICA_CONFIGURED and not recent_writes.settled():
+            return None
+        return f"{self._epoch}-{self._counter}"
+
+data_version = DataVersion()
+
+def make_etag(*parts) -> str:
+    """Build a weak ETag from the given version components"""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+def _settled(last_modified: datetime) -> bool:
+    """
+    Whether last_modified lies before the current second. HTTP dates have
+    one-second resolution, so a later write within the same second would
+    not change Last-Modified; such a timestamp cannot validate a response.
+    """
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    return last_modified.replace(microsecond=0) < now
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the current version.
+    If-None-Match takes precedence when both are sent (RFC 9110).
+    If-Modified-Since is only honoured once the current second has passed.
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        candidates = {tag.strip() for tag in if_none_match.split(',')}
+        # Weak comparison: W/"x" matches "x"
+        normalized = {tag[2:] if tag.startswith('W/') else tag for tag in candidates}
+        return '*' in candidates or etag[2:] in normalized
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _settled(last_modified) and last_modified.replace(microsecond=0) <= since
+    return False
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    Validator headers; no-cache makes browsers revalidate on every use.
+    Last-Modified is left out while it is within the current second, as a
+    write later in that second would not change it.
+    """
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if last_modified is not None and _settled(last_modified):
+        headers['Last-Modified'] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Empty 304 response carrying the current validators"""
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
+
+def _build_compressor(app):
+    """Prefer Brotli with gzip fallback when brotli-asgi is installed"""
+    try:
+        from brotli_asgi import BrotliMiddleware
+        return BrotliMiddleware(app, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+    except ImportError:
+        logger.info("brotli-asgi not installed, compressing responses with gzip only")
+        return GZipMiddleware(app, minimum_size=COMPRESSION_MIN_SIZE)
+
+class CompressionMiddleware:
+    """
+    Compress large responses with Brotli or gzip, leaving Server-Sent
+    Events untouched because compressors buffer small chunks.
+    """
+
+    def __init__(self, app):
+        """Wrap the application with the available compressor"""
+        self.app = app
+        self.compressor = _build_compressor(app)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get('path', '')
+        if (scope['type'] == 'http' and path not in UNCOMPRESSED_PATHS
+                and not path.endswith(UNCOMPRESSED_SUFFIXES)):
+            await self.compressor(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -1,6 +1,7 @@
 import psycopg2
 import logging
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from app.partitioning import PARTITIONED_TABLES, ensure_partitions, has_column, is_partitioned
 
 # Configure detailed logging
 logging.basicConfig(
@@ -9,6 +10,302 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# LISTEN/NOTIFY channel used to push record changes to API clients
+EVENTS_CHANNEL = 'voice_evaluation_events'
+
+# Text search configuration used for transcript search
+TEXT_SEARCH_CONFIG = 'ukrainian'
+
+def backfill_metadata(cursor):
+    """
+    Fill metadata columns of rows stored before they existed, from the
+    payload documents. Idempotent; also run by the partitioning migration
+    after legacy rows are copied.
+
+    Args:
+        cursor: Open psycopg2 cursor on the voice database
+    """
+    # Fill derived audio metadata for rows ingested before it was
+    # captured, from the speech document where available
+    logger.info("Backfilling derived audio metadata...")
+    cursor.execute("""
+        UPDATE voice_evaluations v
+        SET word_count = COALESCE(
+                (p.speech->>'word_count')::integer,
+                array_length(regexp_split_to_array(NULLIF(btrim(p.speech->>'text'), ''), '\\s+'), 1),
+                0),
+            duration_seconds = COALESCE(v.duration_seconds, (p.speech->>'duration_seconds')::real),
+            language = COALESCE(v.language, p.speech->>'language'),
+            processing_seconds = COALESCE(v.processing_seconds, (p.speech->>'processing_seconds')::real)
+        FROM voice_evaluation_payloads p
+        WHERE p.id = v.id AND p.created_at = v.created_at
+          AND v.word_count IS NULL;
+    """)
+
+    # Fill evaluated_at for evaluations stored before the column
+    # existed, from the evaluation document's timestamp
+    cursor.execute("""
+        UPDATE voice_evaluations v
+        SET evaluated_at = COALESCE((p.evaluation->>'evaluated_at')::timestamptz, v.created_at)
+        FROM voice_evaluation_payloads p
+        WHERE p.id = v.id AND p.created_at = v.created_at
+          AND v.status = 'completed'
+          AND v.evaluated_at IS NULL;
+    """)
+
+def create_schema(cursor):
+    """
+    Create or upgrade all schema objects in the voice database.
+    Every statement is idempotent, so this is safe to run on each deploy
+    and is reused by the partitioning migration.
+    
+    Args:
+        cursor: Open psycopg2 cursor on the voice database
+    """
+    # Step 3a: Create a text search configuration for Ukrainian transcripts.
+    # PostgreSQL ships no Ukrainian stemmer, so the configuration is based
+    # on 'simple' (lowercasing, no stop words) and upgraded to a Hunspell
+    # dictionary when uk_ua.dict/uk_ua.affix are installed on the server.
+    logger.info("Ensuring Ukrainian text search configuration...")
+    cursor.execute(f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{TEXT_SEARCH_CONFIG}') THEN
+                CREATE TEXT SEARCH CONFIGURATION {TEXT_SEARCH_CONFIG} (COPY = simple);
+                BEGIN
+                    CREATE TEXT SEARCH DICTIONARY ukrainian_hunspell (
+                        TEMPLATE = ispell,
+                        DictFile = uk_ua,
+                        AffFile = uk_ua
+                    );
+                    ALTER TEXT SEARCH CONFIGURATION {TEXT_SEARCH_CONFIG}
+                        ALTER MAPPING FOR word, hword, hword_part
+                        WITH ukrainian_hunspell, simple;
+                EXCEPTION WHEN OTHERS THEN
+                    RAISE NOTICE 'Hunspell dictionary for Ukrainian not available, using simple';
+                END;
+            END IF;
+        END
+        $$;
+    """)
+
+    # Step 4: Create voice_evaluations metadata table, range-partitioned by
+    # month on created_at. It holds only small, fixed-width columns so list,
+    # stats and queue scans touch few pages; transcripts and evaluation text
+    # live in voice_evaluation_payloads. The primary key must include the
+    # partition key. Tables created before partitioning stay as they are
+    # until converted with `python -m app.partitioning migrate`.
+    logger.info("Creating voice_evaluations table...")
+    cursor.execute("""
+        CREATE SEQUENCE IF NOT EXISTS voice_evaluations_id_seq;
+
+        CREATE TABLE IF NOT EXISTS voice_evaluations (
+            id INTEGER NOT NULL                       -- Auto-incrementing record ID
+                DEFAULT nextval('voice_evaluations_id_seq'),
+            created_at TIMESTAMP WITH TIME ZONE       -- Creation timestamp (partition key)
+                NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            evaluated_at TIMESTAMP WITH TIME ZONE,    -- Completion time of the latest evaluation
+            content_hash TEXT,                        -- SHA-256 of the transcript text
+            status TEXT NOT NULL DEFAULT 'pending'    -- Evaluation queue state
+                CHECK (status IN ('pending', 'processing', 'completed', 'failed')),
+            mark INTEGER NOT NULL DEFAULT 0           -- Evaluation score
+                CHECK (mark >= 0 AND mark <= 10),    -- Score range constraint
+            duration_seconds REAL,                    -- Audio duration
+            language TEXT,                            -- Detected language code
+            word_count INTEGER,                       -- Words in the transcript
+            processing_seconds REAL,                  -- Transcription wall time
+            audio_hash TEXT,                          -- SHA-256 of archived original audio
+            claimed_by TEXT,                          -- Worker holding the lease
+            lease_expires_at TIMESTAMP WITH TIME ZONE,-- Lease deadline for processing rows
+            attempts INTEGER NOT NULL DEFAULT 0,      -- Number of evaluation attempts
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at);
+
+        ALTER SEQUENCE voice_evaluations_id_seq OWNED BY voice_evaluations.id;
+    """)
+
+    # Step 4a: Upgrade tables created before the evaluation queue existed
+    logger.info("Ensuring evaluation queue and metadata columns exist...")
+    cursor.execute("""
+        ALTER TABLE voice_evaluations
+            ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'pending'
+                CHECK (status IN ('pending', 'processing', 'completed', 'failed')),
+            ADD COLUMN IF NOT EXISTS claimed_by TEXT,
+            ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE,
+            ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS content_hash TEXT,
+            ADD COLUMN IF NOT EXISTS duration_seconds REAL,
+            ADD COLUMN IF NOT EXISTS language TEXT,
+            ADD COLUMN IF NOT EXISTS word_count INTEGER,
+            ADD COLUMN IF NOT EXISTS processing_seconds REAL,
+            ADD COLUMN IF NOT EXISTS audio_hash TEXT,
+            ADD COLUMN IF NOT EXISTS evaluated_at TIMESTAMP WITH TIME ZONE;
+    """)
+    if has_column(cursor, 'voice_evaluations', 'evaluation'):
+        # Rows evaluated before the status column existed carry a
+        # non-pending evaluation document; mark them as completed
+        cursor.execute("""
+            UPDATE voice_evaluations
+            SET status = 'completed'
+            WHERE status = 'pending'
+              AND COALESCE(evaluation->>'status', '') <> 'pending';
+        """)
+
+    if not is_partitioned(cursor, 'voice_evaluations'):
+        logger.warning("voice_evaluations is not partitioned; run 'python -m app.partitioning migrate'")
+        return
+
+    # Step 4b: Create the payload table for transcripts and evaluation text,
+    # partitioned like voice_evaluations so retention drops both together
+    logger.info("Creating voice_evaluation_payloads table...")
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS voice_evaluation_payloads (
+            id INTEGER NOT NULL,                      -- Record ID in voice_evaluations
+            created_at TIMESTAMP WITH TIME ZONE       -- Partition key, same as voice_evaluations
+                NOT NULL,
+            speech JSONB NOT NULL,                    -- Speech data in JSONB format
+            evaluation JSONB NOT NULL,                -- Evaluation data in JSONB format
+            speech_tsv TSVECTOR GENERATED ALWAYS AS   -- Full-text search vector of transcript
+                (to_tsvector('{TEXT_SEARCH_CONFIG}', COALESCE(speech->>'text', ''))) STORED,
+            PRIMARY KEY (id, created_at),
+            FOREIGN KEY (id, created_at) REFERENCES voice_evaluations (id, created_at)
+                ON UPDATE CASCADE ON DELETE CASCADE
+        ) PARTITION BY RANGE (created_at);
+    """)
+
+    # Step 4c: Create monthly partitions for the current and upcoming months
+    for table in PARTITIONED_TABLES:
+        ensure_partitions(cursor, table)
+
+    # Step 4d: Move payloads out of tables created before the split
+    if has_column(cursor, 'voice_evaluations', 'speech'):
+        logger.info("Moving speech and evaluation payloads out of voice_evaluations...")
+        cursor.execute("SELECT MIN(created_at) FROM voice_evaluations")
+        oldest = cursor.fetchone()[0]
+        if oldest:
+            ensure_partitions(cursor, 'voice_evaluation_payloads', start=oldest.date())
+        cursor.execute("""
+            INSERT INTO voice_evaluation_payloads (id, created_at, speech, evaluation)
+            SELECT id, created_at, speech, evaluation
+            FROM voice_evaluations
+            ON CONFLICT DO NOTHING;
+
+            UPDATE voice_evaluations
+            SET content_hash = encode(sha256(convert_to(COALESCE(speech->>'text', ''), 'UTF8')), 'hex')
+            WHERE content_hash IS NULL;
+
+            ALTER TABLE voice_evaluations
+                DROP COLUMN IF EXISTS speech_tsv,
+                DROP COLUMN IF EXISTS speech,
+                DROP COLUMN IF EXISTS evaluation;
+        """)
+
+    # Steps 4e-4f: Fill metadata of rows stored before it was captured
+    backfill_metadata(cursor)
+
+    # Step 5: Create indexes for better query performance
+    logger.info("Creating performance indexes...")
+    cursor.execute("""
+        -- Index for evaluation-time range scans (trend statistics)
+        CREATE INDEX IF NOT EXISTS idx_voice_eval_evaluated
+        ON voice_evaluations(evaluated_at);
+
+        -- Index for searching by mark
+        CREATE INDEX IF NOT EXISTS idx_voice_eval_mark 
+        ON voice_evaluations(mark);
+        
+        -- Index for timestamp-based queries
+        CREATE INDEX IF NOT EXISTS idx_voice_eval_created 
+        ON voice_evaluations(created_at);
+
+        -- Index for finding records with identical transcripts
+        CREATE INDEX IF NOT EXISTS idx_voice_eval_content_hash
+        ON voice_evaluations(content_hash);
+
+        -- Indexes for filtering and grouping by derived audio metadata
+        CREATE INDEX IF NOT EXISTS idx_voice_eval_language
+        ON voice_evaluations(language);
+
+        CREATE INDEX IF NOT EXISTS idx_voice_eval_duration
+        ON voice_evaluations(duration_seconds);
+
+        CREATE INDEX IF NOT EXISTS idx_voice_eval_word_count
+        ON voice_evaluations(word_count);
+
+        -- Partial index over records whose audio is archived, for reprocessing
+        CREATE INDEX IF NOT EXISTS idx_voice_eval_audio_hash
+        ON voice_evaluations(audio_hash) WHERE audio_hash IS NOT NULL;
+
+        -- Partial index over the pending backlog used by queue claims
+        CREATE INDEX IF NOT EXISTS idx_voice_eval_pending
+        ON voice_evaluations(id) WHERE status = 'pending';
+
+        -- Partial index for reclaiming rows whose lease has expired
+        CREATE INDEX IF NOT EXISTS idx_voice_eval_lease
+        ON voice_evaluations(lease_expires_at) WHERE status = 'processing';
+        
+        -- Index for single-record payload lookups by ID
+        CREATE INDEX IF NOT EXISTS idx_voice_payload_id
+        ON voice_evaluation_payloads(id);
+
+        -- GIN index for efficient JSONB searches on speech data
+        CREATE INDEX IF NOT EXISTS idx_voice_payload_speech 
+        ON voice_evaluation_payloads USING GIN (speech jsonb_path_ops);
+        
+        -- GIN index for full-text search over transcripts
+        CREATE INDEX IF NOT EXISTS idx_voice_payload_speech_tsv
+        ON voice_evaluation_payloads USING GIN (speech_tsv);
+        
+        -- GIN index for efficient JSONB searches on evaluation data
+        CREATE INDEX IF NOT EXISTS idx_voice_payload_evaluation 
+        ON voice_evaluation_payloads USING GIN (evaluation jsonb_path_ops);
+    """)
+
+    # Step 6: Notify listeners when records are created or change status.
+    # A trigger covers every writer (API, workers, bulk ingestion) and the
+    # notification is only delivered once the writing transaction commits.
+    logger.info("Creating change notification trigger...")
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION notify_voice_evaluation_change()
+        RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('{EVENTS_CHANNEL}', json_build_object(
+                'event', CASE WHEN TG_OP = 'INSERT'
+                              THEN 'transcription_stored'
+                              ELSE 'evaluation_' || NEW.status END,
+                'id', NEW.id,
+                'status', NEW.status,
+                'mark', NEW.mark
+            )::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS trg_voice_eval_notify ON voice_evaluations;
+        CREATE TRIGGER trg_voice_eval_notify
+        AFTER INSERT OR UPDATE OF status, mark ON voice_evaluations
+        FOR EACH ROW
+        EXECUTE FUNCTION notify_voice_evaluation_change();
+    """)
+
+    # Step 7: Create the persistent LLM result cache. Entries are keyed by
+    # transcript hash, model file and prompt version, so identical
+    # transcripts are scored once per model and prompt.
+    logger.info("Creating evaluation result cache table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS evaluation_result_cache (
+            content_hash TEXT NOT NULL,               -- SHA-256 of the transcript text
+            model TEXT NOT NULL,                      -- Model file name
+            prompt_version TEXT NOT NULL,             -- Version of the evaluation prompt
+            evaluation_text TEXT NOT NULL,
+            mark INTEGER NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            hits INTEGER NOT NULL DEFAULT 0,
+            last_hit_at TIMESTAMP WITH TIME ZONE,
+            PRIMARY KEY (content_hash, model, prompt_version)
+        );
+    """)
+
 def init_database():
     """
     Initialize database and create required tables.
@@ -65,39 +362,8 @@ def init_database():
         conn = psycopg2.connect(**voice_conn_params)
         cursor = conn.cursor()
 
-        # Step 4: Create voice_evaluations table with JSONB type
-        logger.info("Creating voice_evaluations table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS voice_evaluations (
-                id SERIAL PRIMARY KEY,                    -- Auto-incrementing primary key
-                speech JSONB NOT NULL,                    -- Speech data in JSONB format
-                evaluation JSONB NOT NULL,                -- Evaluation data in JSONB format
-                mark INTEGER NOT NULL                     -- Evaluation score
-                    CHECK (mark >= 0 AND mark <= 10),    -- Score range constraint
-                created_at TIMESTAMP WITH TIME ZONE       -- Creation timestamp
-                    DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-
-        # Step 5: Create indexes for better query performance
-        logger.info("Creating performance indexes...")
-        cursor.execute("""
-            -- Index for searching by mark
-            CREATE INDEX IF NOT EXISTS idx_voice_eval_mark 
-            ON voice_evaluations(mark);
-            
-            -- Index for timestamp-based queries
-            CREATE INDEX IF NOT EXISTS idx_voice_eval_created 
-            ON voice_evaluations(created_at);
-            
-            -- GIN index for efficient JSONB searches on speech data
-            CREATE INDEX IF NOT EXISTS idx_voice_eval_speech 
-            ON voice_evaluations USING GIN (speech jsonb_path_ops);
-            
-            -- GIN index for efficient JSONB searches on evaluation data
-            CREATE INDEX IF NOT EXISTS idx_voice_eval_evaluation 
-            ON voice_evaluations USING GIN (evaluation jsonb_path_ops);
-        """)
+        # Steps 3a-7: Create schema objects
+        create_schema(cursor)
 
         # Commit all changes
         conn.commit()
@@ -1,16 +1,36 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Depends, Request, Response, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, List
 import tempfile
 import os
+import json
+import asyncio
 import logging
-from datetime import datetime
-from app.db_operations_whisper import DatabaseOperations as WhisperDB
-from app.db_operations_evaluation import DatabaseOperationsEvaluation as EvalDB
-from app.fast_inference import evaluate_from_database
+from datetime import datetime, timedelta, timezone
+from app.evaluation_coordinator import evaluate_record, stream_evaluation
+from app.evaluator_pool import close_evaluator_pool, evaluator_pool_stats
+from app.tuning import load_profile
+from app.scheduler import whisper_gate
 from app.whisper_transcribe import WhisperTranscriber
-from app.data_retrieval import get_all_evaluations, get_evaluation_statistics
+from app.bulk_ingest import build_speech_data
+from app.audio_archive import archive_audio, archive_enabled
+from app.reprocess import reprocess_jobs, run_job, start_job
+from app.data_retrieval import iter_evaluations_export
+from app.query_filters import VALID_STATUSES
+from app.event_stream import broadcaster
+from app.partitioning import maintain_partitions
+from fastapi.concurrency import run_in_threadpool
+from app.db_async import async_db
+from app.record_cache import cache_stats
+from app.evaluation_cache import evaluation_result_cache
+from app.prescreen import prescreen_stats, table_stats as prescreen_table_stats
+from app.trends import BUCKET_SIZES, TRENDS_TIMEZONE, get_trends, trend_cache
+from app.http_cache import (
+    CompressionMiddleware, cache_headers, data_version, is_not_modified,
+    make_etag, not_modified_response
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,9 +50,17 @@ app = FastAPI(
     
     ## Endpoints
     * `/transcribe/` - Upload and transcribe audio files
+    * `/transcribe/batch/` - Upload and transcribe many audio files at once
+    * `/transcriptions/bulk/` - Ingest archived transcripts in one batch
+    * `/reprocess/` - Re-transcribe archived audio in the background
+    * `/evaluate/{record_id}/stream` - Evaluate with the mark and explanation streamed over SSE
     * `/evaluation/{record_id}` - Get evaluation for specific record
     * `/evaluations/` - List all evaluations
+    * `/evaluations/export` - Stream evaluations as NDJSON or CSV
+    * `/search/` - Full-text search over transcripts
     * `/statistics/` - Get evaluation statistics
+    * `/statistics/trends` - Daily, weekly or monthly volumes and average marks
+    * `/events/` - Server-Sent Events stream of record changes
     
     Features:
     * Upload audio files for transcription
@@ -58,15 +86,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
 
+# Brotli/gzip for large JSON responses
+app.add_middleware(CompressionMiddleware)
+
+class TranscriptItem(BaseModel):
+    """Archived transcript submitted for bulk ingestion"""
+    text: str
+    filename: str = ''
+    processed_at: Optional[str] = None
+    language: Optional[str] = None
+    duration_seconds: Optional[float] = None
+
+class ReprocessRequest(BaseModel):
+    """Records to re-transcribe from the audio archive"""
+    record_ids: Optional[List[int]] = None
+    model: Optional[str] = None
+
+async def partition_maintenance_loop():
+    """Keep future monthly partitions of voice_evaluations in place"""
+    while True:
+        await run_in_threadpool(maintain_partitions)
+        await asyncio.sleep(24 * 60 * 60)
+
+@app.on_event("startup")
+async def startup_event():
+    """Open the async connection pool and start background tasks"""
+    load_profile()
+    if not await async_db.connect():
+        logger.error("Async database pool could not be created at startup")
+    await broadcaster.start()
+    app.state.partition_task = asyncio.create_task(partition_maintenance_loop())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks and close the async connection pool"""
+    app.state.partition_task.cancel()
+    await broadcaster.stop()
+    await async_db.close()
+    await run_in_threadpool(close_evaluator_pool)
+
 @app.post("/transcribe/", response_model=Dict)
 async def transcribe_audio(
     file: UploadFile = File(..., description="Audio file (mp3, wav, m4a, ogg)")
 ):
     """
     Handle audio file upload and transcription.
-    Uses WhisperDB for storing transcription results.
+    Stores transcription results through the async database layer.
     """
     temp_path = None
     try:
@@ -75,19 +143,19 @@ async def transcribe_audio(
         
         # Initialize transcriber and perform transcription
         transcriber = WhisperTranscriber()
-        transcription = transcriber.process_audio(temp_path)
+        result = await run_in_threadpool(transcriber.transcribe_scheduled, temp_path, 'interactive')
         
-        if not transcription:
+        if not result or not result['text']:
             raise HTTPException(status_code=500, detail="Transcription failed")
+        transcription = result['text']
+
+        # Keep the original audio for later reprocessing when archiving is enabled
+        result['audio_hash'] = await run_in_threadpool(archive_audio, temp_path, file.filename)
         
-        # Store in database using WhisperDB
-        db_ops = WhisperDB()
-        success, record_id = db_ops.store_transcription({
-            'text': transcription,
-            'filename': file.filename,
-            'file_type': os.path.splitext(file.filename)[1].lstrip('.'),
-            'processed_at': datetime.now().isoformat()
-        })
+        # Store in database through the async pool
+        success, record_id = await async_db.store_transcription(
+            build_speech_data(transcription, file.filename, metadata=result)
+        )
 
         if not success or record_id is None:
             raise HTTPException(status_code=500, detail="Failed to store transcription")
@@ -105,40 +173,111 @@ async def transcribe_audio(
         if temp_path and os.path.exists(temp_path):
             os.unlink(temp_path)
 
-@app.post("/evaluate/{record_id}", response_model=Dict)
-async def evaluate_speech(record_id: int):
+@app.post("/transcribe/batch/", response_model=Dict)
+async def transcribe_audio_batch(
+    files: List[UploadFile] = File(..., description="Audio files (mp3, wav, m4a, ogg)")
+):
     """
-    Evaluate transcribed speech for given record ID.
-    Uses EvalDB for storing evaluation results.
+    Transcribe many audio files with one loaded Whisper model and store
+    all transcriptions in a single batch insert.
     """
+    temp_paths = []
     try:
-        # Get evaluation result
-        evaluation_result = evaluate_from_database(record_id)
-        if not evaluation_result:
-            raise HTTPException(
-                status_code=500,
-                detail="Evaluation failed"
-            )
+        for file in files:
+            temp_paths.append(await handle_file_upload(file))
 
-        # Prepare evaluation data
-        evaluation_data = {
-            'text': evaluation_result.get('evaluation', ''),
-            'mark': evaluation_result.get('score', 0),
-            'evaluated_at': datetime.now().isoformat()
+        transcriber = WhisperTranscriber()
+        speech_items = []
+        failed = []
+        for file, temp_path in zip(files, temp_paths):
+            result = await run_in_threadpool(transcriber.transcribe_scheduled, temp_path, 'batch')
+            if not result or not result['text']:
+                failed.append(file.filename)
+                continue
+            result['audio_hash'] = await run_in_threadpool(archive_audio, temp_path, file.filename)
+            speech_items.append(build_speech_data(result['text'], file.filename, metadata=result))
+
+        success, record_ids = await async_db.store_transcriptions(speech_items)
+        if not success:
+            raise HTTPException(status_code=500, detail="Failed to store transcriptions")
+
+        return {
+            'stored': len(record_ids),
+            'evaluation_ids': record_ids,
+            'failed': failed
         }
 
-        # Store evaluation using EvalDB
-        eval_db = EvalDB()
-        success = eval_db.store_evaluation(record_id, evaluation_data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch transcription failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
 
-        if not success:
+@app.post("/transcriptions/bulk/", response_model=Dict)
+async def ingest_transcriptions(items: List[TranscriptItem]):
+    """
+    Store archived transcripts in one transaction and return all record IDs.
+    """
+    speech_items = [
+        build_speech_data(item.text, item.filename, item.processed_at, item.dict())
+        for item in items
+    ]
+    success, record_ids = await async_db.store_transcriptions(speech_items)
+    if not success:
+        raise HTTPException(status_code=500, detail="Failed to store transcriptions")
+
+    return {
+        'stored': len(record_ids),
+        'evaluation_ids': record_ids
+    }
+
+@app.post("/reprocess/", response_model=Dict, status_code=202)
+async def reprocess_audio(request: ReprocessRequest, background_tasks: BackgroundTasks):
+    """
+    Re-transcribe archived audio and replace the stored transcripts.
+    Omit record_ids to reprocess every archived record. Runs in the
+    background; poll /reprocess/{job_id} for progress.
+    """
+    if not archive_enabled():
+        raise HTTPException(status_code=400, detail="Audio archive is not enabled")
+    job_id = start_job(request.record_ids, request.model)
+    if job_id is None:
+        raise HTTPException(status_code=409, detail="A reprocessing job is already running")
+    background_tasks.add_task(run_job, job_id)
+    return reprocess_jobs[job_id]
+
+@app.get("/reprocess/{job_id}", response_model=Dict)
+async def get_reprocess_job(job_id: str):
+    """Status and counts of a reprocessing job"""
+    job = reprocess_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Reprocessing job not found")
+    return job
+
+@app.post("/evaluate/{record_id}", response_model=Dict)
+async def evaluate_speech(record_id: int):
+    """
+    Evaluate transcribed speech for given record ID.
+    Concurrent requests for the same record share a single evaluation.
+    """
+    try:
+        result = await evaluate_record(record_id, force=True)
+        if not result:
             raise HTTPException(
                 status_code=500,
-                detail="Failed to store evaluation results"
+                detail="Evaluation failed"
             )
 
+        evaluation_data = result.get('evaluation') or {}
         logger.info(f"Successfully evaluated record {record_id}")
-        return evaluation_result
+        return {
+            'evaluation': evaluation_data.get('text', ''),
+            'score': result.get('mark', 0)
+        }
 
     except HTTPException:
         raise
@@ -146,11 +285,49 @@ async def evaluate_speech(record_id: int):
         logger.error(f"Evaluation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/evaluate/{record_id}/stream")
+async def stream_evaluate_speech(record_id: int, force: bool = False):
+    """
+    Evaluate a record over Server-Sent Events.
+    Sends a `mark` event as soon as the score is generated, `token` events
+    with the explanation as it is written, and a final `done` event with
+    the stored evaluation (or `error`). Already evaluated records get
+    their stored result unless force is set.
+    """
+    async def event_source():
+        async for item in stream_evaluation(record_id, force):
+            yield f"event: {item['type']}\ndata: {json.dumps(item, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _evaluation_validators(record_id: int, result: Dict):
+    """ETag and Last-Modified of a completed evaluation record"""
+    etag = make_etag('evaluation', record_id, result.get('status'),
+                     result.get('mark'), result.get('evaluated_at'))
+    last_modified = None
+    if result.get('evaluated_at'):
+        last_modified = datetime.fromisoformat(result['evaluated_at']).astimezone(timezone.utc)
+    return etag, last_modified
+
+def _collection_etag(request: Request, name: str) -> Optional[str]:
+    """ETag for a list or aggregate endpoint, varying with the query string"""
+    token = data_version.token
+    if token is None:
+        return None
+    return make_etag(name, token, request.url.query)
+
 @app.get("/evaluation/{record_id}", response_model=Dict)
-async def get_evaluation_result(record_id: int):
+async def get_evaluation_result(record_id: int, request: Request, response: Response):
     """
     Retrieve or create evaluation results for given record ID.
-    If status is 'pending', triggers new evaluation.
+    If status is 'pending', triggers new evaluation; if another request or
+    worker is already evaluating the record, waits for its result instead.
+    A record still being evaluated by another process after
+    EVAL_WAIT_MAX_SECONDS is returned with status 'processing'.
     
     Args:
         record_id: ID of the record to evaluate
@@ -160,8 +337,7 @@ async def get_evaluation_result(record_id: int):
     """
     try:
         # Get existing evaluation
-        eval_db = EvalDB()
-        result = eval_db.get_evaluation(record_id)
+        result = await async_db.get_evaluation(record_id)
         
         if not result:
             raise HTTPException(
@@ -169,37 +345,21 @@ async def get_evaluation_result(record_id: int):
                 detail=f"Record not found for ID: {record_id}"
             )
 
-        # Check if evaluation is pending
-        evaluation_data = result.get('evaluation', {})
-        if isinstance(evaluation_data, dict) and evaluation_data.get('status') == 'pending':
-            logger.info(f"Found pending evaluation for record {record_id}, triggering evaluation")
-            
-            # Perform evaluation
-            evaluation_result = evaluate_from_database(record_id)
-            if not evaluation_result:
+        # Evaluate pending records, or join the evaluation already in flight
+        if result.get('status') in ('pending', 'processing'):
+            logger.info(f"Record {record_id} is {result.get('status')}, waiting for evaluation")
+            result = await evaluate_record(record_id)
+            if not result:
                 raise HTTPException(
                     status_code=500,
                     detail="Evaluation failed"
                 )
 
-            # Store evaluation results
-            evaluation_data = {
-                'text': evaluation_result.get('evaluation', ''),
-                'mark': evaluation_result.get('score', 0),
-                'evaluated_at': datetime.now().isoformat(),
-                'status': 'completed'
-            }
-
-            # Update database with evaluation results
-            success = eval_db.store_evaluation(record_id, evaluation_data)
-            if not success:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to store evaluation results"
-                )
-
-            # Get updated result
-            result = eval_db.get_evaluation(record_id)
+        if result.get('status') == 'completed':
+            etag, last_modified = _evaluation_validators(record_id, result)
+            if is_not_modified(request, etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            response.headers.update(cache_headers(etag, last_modified))
             
         return result
 
@@ -228,13 +388,18 @@ async def handle_file_upload(file: UploadFile) -> str:
         return temp_file.name
 
 @app.get("/speech/{record_id}", response_model=Dict)
-async def get_speech_data(record_id: int):
+async def get_speech_data(record_id: int, request: Request, response: Response):
     """Get speech transcription data"""
-    db_ops = WhisperDB()
-    result = db_ops.get_transcription(record_id)
+    result = await async_db.get_transcription(record_id)
     
     if not result:
         raise HTTPException(status_code=404, detail="Speech record not found")
+
+    # Transcriptions only change when reprocessed, which sets a new processed_at
+    etag = make_etag('speech', record_id, result.get('processed_at'), result.get('model'))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers.update(cache_headers(etag))
     return result
 
 @app.get("/health")
@@ -242,15 +407,196 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/cache/stats", response_model=Dict)
+async def get_cache_stats():
+    """Hit/miss counters of the record, trend and evaluation result caches in this worker"""
+    return {
+        **cache_stats(),
+        trend_cache.name: trend_cache.stats(),
+        'evaluation_results': evaluation_result_cache.stats()
+    }
+
+@app.get("/evaluator/stats", response_model=Dict)
+async def get_evaluator_stats():
+    """Wait queue and per-context usage of the evaluator pool in this worker"""
+    return evaluator_pool_stats()
+
+@app.get("/prescreen/stats", response_model=Dict)
+async def get_prescreen_stats():
+    """LLM calls avoided by the pre-screen rules in this worker, and stored decisions per reason"""
+    return {
+        **prescreen_stats.stats(),
+        'stored': await run_in_threadpool(prescreen_table_stats)
+    }
+
+@app.get("/scheduler/stats", response_model=Dict)
+async def get_scheduler_stats():
+    """Per-class admissions, expirations and queue waits for Whisper and Llama work in this worker"""
+    return {
+        'whisper': whisper_gate.stats(),
+        'llama': evaluator_pool_stats().get('queue')
+    }
+
+def evaluation_filters(
+    status: Optional[str] = Query(None, description=f"One of: {', '.join(VALID_STATUSES)}"),
+    mark_min: Optional[int] = Query(None, ge=0, le=10),
+    mark_max: Optional[int] = Query(None, ge=0, le=10),
+    created_from: Optional[datetime] = Query(None, description="Inclusive lower bound on created_at"),
+    created_to: Optional[datetime] = Query(None, description="Exclusive upper bound on created_at"),
+    language: Optional[str] = Query(None, description="Detected language code, e.g. 'uk'"),
+    duration_min: Optional[float] = Query(None, ge=0, description="Minimum audio duration in seconds"),
+    duration_max: Optional[float] = Query(None, ge=0, description="Maximum audio duration in seconds")
+) -> Dict:
+    """Collect the filter query parameters shared by listing and export"""
+    if status is not None and status not in VALID_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Unknown status: {status}")
+    return {
+        'status': status,
+        'mark_min': mark_min,
+        'mark_max': mark_max,
+        'created_from': created_from,
+        'created_to': created_to,
+        'language': language,
+        'duration_min': duration_min,
+        'duration_max': duration_max
+    }
+
 @app.get("/evaluations/", response_model=List[Dict])
-async def list_evaluations():
-    """Get all evaluations with their transcriptions"""
-    return get_all_evaluations()
+async def list_evaluations(
+    request: Request,
+    response: Response,
+    filters: Dict = Depends(evaluation_filters),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Get evaluations with their transcriptions, optionally filtered and paginated.
+    Conditional requests are answered with 304 without querying while no
+    record has changed.
+    """
+    etag = _collection_etag(request, 'evaluations')
+    if etag and is_not_modified(request, etag, data_version.last_modified):
+        return not_modified_response(etag, data_version.last_modified)
+    evaluations = await async_db.get_all_evaluations(filters, limit, offset)
+    if etag:
+        response.headers.update(cache_headers(etag, data_version.last_modified))
+    return evaluations
+
+@app.get("/evaluations/export")
+async def export_evaluations(
+    filters: Dict = Depends(evaluation_filters),
+    format: str = Query('ndjson', regex='^(ndjson|csv)$')
+):
+    """
+    Stream evaluations as NDJSON or CSV.
+    Rows are read from a server-side cursor and sent with chunked transfer
+    encoding, so memory use does not grow with the size of the export.
+    """
+    # Connect and start the query before any response is sent, so an
+    # unavailable database is reported as an error instead of a cut-off file
+    try:
+        chunks = await run_in_threadpool(iter_evaluations_export, filters, format)
+    except Exception as e:
+        logger.error(f"Export failed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Export is unavailable")
+
+    media_type = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+    filename = f"evaluations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/search/", response_model=Dict)
+async def search_transcriptions(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, description="Words or phrases to find in transcripts"),
+    filters: Dict = Depends(evaluation_filters),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """Search transcripts by words, returning ranked hits with highlighted snippets"""
+    etag = _collection_etag(request, 'search')
+    if etag and is_not_modified(request, etag, data_version.last_modified):
+        return not_modified_response(etag, data_version.last_modified)
+    hits = await async_db.search_transcriptions(q, filters, limit, offset)
+    if etag:
+        response.headers.update(cache_headers(etag, data_version.last_modified))
+    return {
+        'query': q,
+        'limit': limit,
+        'offset': offset,
+        'results': hits
+    }
 
 @app.get("/statistics/", response_model=Dict)
-async def get_statistics():
-    """Get evaluation statistics"""
-    return get_evaluation_statistics()
+async def get_statistics(request: Request, response: Response):
+    """Get evaluation statistics; 304 while no record has changed"""
+    etag = _collection_etag(request, 'statistics')
+    if etag and is_not_modified(request, etag, data_version.last_modified):
+        return not_modified_response(etag, data_version.last_modified)
+    statistics = await async_db.get_evaluation_statistics()
+    if etag:
+        response.headers.update(cache_headers(etag, data_version.last_modified))
+    return statistics
+
+@app.get("/statistics/trends", response_model=Dict)
+async def get_statistics_trends(
+    request: Request,
+    response: Response,
+    date_from: Optional[datetime] = Query(None, description="Range start (default: 30 days ago)"),
+    date_to: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    bucket: str = Query('day', description=f"One of: {', '.join(BUCKET_SIZES)}"),
+    tz: str = Query(TRENDS_TIMEZONE, description="IANA time zone for bucket boundaries"),
+    language: Optional[str] = Query(None, description="Detected language code, e.g. 'uk'")
+):
+    """
+    Per-bucket ingest volume, evaluation counts, average marks and mark
+    histograms over a date range. Evaluations are bucketed by evaluated_at.
+    """
+    # The default range moves with the clock, so the hour is part of the version
+    etag = _collection_etag(request, f"trends:{datetime.now(timezone.utc):%Y%m%d%H}")
+    if etag and is_not_modified(request, etag, data_version.last_modified):
+        return not_modified_response(etag, data_version.last_modified)
+
+    date_to = date_to or datetime.now(timezone.utc)
+    date_from = date_from or date_to - timedelta(days=30)
+    try:
+        trends = await get_trends(date_from, date_to, bucket, tz, language)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to compute trends: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if etag:
+        response.headers.update(cache_headers(etag, data_version.last_modified))
+    return trends
+
+@app.get("/events/")
+async def stream_events(request: Request, record_id: Optional[int] = None):
+    """
+    Server-Sent Events stream of record changes.
+    Emits one JSON message per created record or status change, fed by
+    Postgres LISTEN/NOTIFY; pass record_id to follow a single record.
+    """
+    async def event_source():
+        yield "retry: 3000\n\n"
+        async for event in broadcaster.subscribe(record_id):
+            if await request.is_disconnected():
+                break
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 if __name__ == "__main__":
     import uvicorn
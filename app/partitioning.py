@@ -0,0 +1,383 @@
+import argparse
+import logging
+import os
+import sys
+from datetime import date
+from typing import List, Optional, Tuple
+from app.db_handler import DatabaseHandler
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# Tables range-partitioned by month on created_at. Payloads reference
+# voice_evaluations, so they come first when partitions are detached.
+PARTITIONED_TABLES = ['voice_evaluation_payloads', 'voice_evaluations']
+
+# Number of future monthly partitions kept ready for inserts
+MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+
+def add_months(month: date, count: int) -> date:
+    """Return the first day of the month count months after month"""
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def month_start(day: date) -> date:
+    """Return the first day of the month containing day"""
+    return day.replace(day=1)
+
+def partition_name(table: str, month: date) -> str:
+    """Name of the monthly partition, e.g. voice_evaluations_2024_05"""
+    return f"{table}_{month.year:04d}_{month.month:02d}"
+
+def is_partitioned(cursor, table: str) -> bool:
+    """Check whether a table exists as a partitioned table"""
+    cursor.execute("""
+        SELECT c.relkind = 'p'
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relname = %s AND n.nspname = current_schema()
+    """, (table,))
+    result = cursor.fetchone()
+    return bool(result and result[0])
+
+def has_column(cursor, table: str, column: str) -> bool:
+    """Check whether a table in the current schema has a column"""
+    cursor.execute("""
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = %s
+          AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone() is not None
+
+def ensure_partitions(cursor, table: str, months_ahead: int = MONTHS_AHEAD,
+                      start: Optional[date] = None) -> List[str]:
+    """
+    Create monthly partitions from start up to months_ahead after today.
+
+    Args:
+        cursor: Open psycopg2 cursor
+        table (str): Partitioned parent table
+        months_ahead (int): Future months to create beyond the current one
+        start (date, optional): First month to cover (default: current month)
+
+    Returns:
+        List[str]: Names of all partitions in the covered range
+    """
+    month = month_start(start or date.today())
+    last = add_months(month_start(date.today()), months_ahead)
+    names = []
+    while month <= last:
+        name = partition_name(table, month)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {name}
+            PARTITION OF {table}
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')
+        """)
+        names.append(name)
+        month = add_months(month, 1)
+    logger.info(f"Ensured {len(names)} monthly partitions of {table} through {last:%Y-%m}")
+    return names
+
+def list_partitions(cursor, table: str) -> List[Tuple[str, date]]:
+    """
+    List attached monthly partitions of a table with their month.
+
+    Returns:
+        List[Tuple[str, date]]: (partition name, first day of month), oldest first
+    """
+    cursor.execute("""
+        SELECT child.relname
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = %s
+    """, (table,))
+    partitions = []
+    for (name,) in cursor.fetchall():
+        suffix = name[len(table) + 1:]
+        try:
+            year, month = suffix.split('_')
+            partitions.append((name, date(int(year), int(month), 1)))
+        except ValueError:
+            logger.warning(f"Skipping partition with unexpected name: {name}")
+    return sorted(partitions, key=lambda item: item[1])
+
+def drop_foreign_keys(cursor, table: str) -> List[str]:
+    """
+    Drop the foreign key constraints of a standalone table.
+
+    Returns:
+        List[str]: Names of the dropped constraints
+    """
+    cursor.execute("""
+        SELECT conname
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = 'f'
+    """, (table,))
+    names = [row[0] for row in cursor.fetchall()]
+    for name in names:
+        cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+    return names
+
+def maintain_partitions(months_ahead: int = MONTHS_AHEAD) -> bool:
+    """
+    Create upcoming partitions for every partitioned table.
+    Called on API startup and periodically afterwards.
+
+    Returns:
+        bool: True if maintenance succeeded
+    """
+    db = DatabaseHandler()
+    if not db.connect():
+        logger.error("Database connection failed during partition maintenance")
+        return False
+    try:
+        for table in PARTITIONED_TABLES:
+            if is_partitioned(db.cursor, table):
+                ensure_partitions(db.cursor, table, months_ahead)
+        db.conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Partition maintenance failed: {str(e)}")
+        db.conn.rollback()
+        return False
+    finally:
+        db.close()
+
+def apply_retention(keep_months: int, drop: bool = False) -> List[str]:
+    """
+    Detach (and optionally drop) partitions older than keep_months.
+    Detached partitions remain as standalone tables that can be archived
+    with pg_dump and dropped later; removing a month is a catalog change
+    instead of a bulk DELETE. Detached payload partitions lose their
+    foreign key to voice_evaluations, which would otherwise block
+    detaching the matching metadata partition.
+
+    Args:
+        keep_months (int): Number of most recent months to keep, including the current one
+        drop (bool): Drop partitions instead of only detaching them
+
+    Returns:
+        List[str]: Names of partitions that were detached or dropped
+
+    Raises:
+        ValueError: keep_months is less than 1
+    """
+    if keep_months < 1:
+        raise ValueError("keep_months must be at least 1")
+    cutoff = add_months(month_start(date.today()), -(keep_months - 1))
+    db = DatabaseHandler()
+    if not db.connect():
+        raise ConnectionError("Database connection failed during retention")
+
+    removed = []
+    try:
+        for table in PARTITIONED_TABLES:
+            for name, month in list_partitions(db.cursor, table):
+                if month >= cutoff:
+                    continue
+                db.cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                if drop:
+                    db.cursor.execute(f"DROP TABLE {name}")
+                else:
+                    drop_foreign_keys(db.cursor, name)
+                removed.append(name)
+                logger.info(f"{'Dropped' if drop else 'Detached'} partition {name}")
+        db.conn.commit()
+        return removed
+    except Exception:
+        db.conn.rollback()
+        raise
+    finally:
+        db.close()
+
+def migrate_to_partitioned(drop_legacy: bool = False):
+    """
+    Convert an unpartitioned voice_evaluations table into the partitioned layout.
+
+    The existing table is renamed to voice_evaluations_legacy, the partitioned
+    table is created with partitions covering all existing rows, and rows are
+    copied in one transaction. Record IDs and the ID sequence are preserved.
+
+    Args:
+        drop_legacy (bool): Drop the legacy table after a successful copy
+    """
+    from app.init_db import backfill_metadata, create_schema
+
+    db = DatabaseHandler()
+    if not db.connect():
+        raise ConnectionError("Database connection failed during migration")
+
+    cursor = db.cursor
+    try:
+        if is_partitioned(cursor, 'voice_evaluations'):
+            logger.info("voice_evaluations is already partitioned, nothing to migrate")
+            return
+
+        # Bring the legacy table up to the current column set before copying
+        create_schema(cursor)
+
+        logger.info("Renaming voice_evaluations to voice_evaluations_legacy...")
+        cursor.execute("""
+            ALTER TABLE voice_evaluations RENAME TO voice_evaluations_legacy;
+            ALTER TABLE voice_evaluations_legacy ALTER COLUMN id DROP DEFAULT;
+            ALTER SEQUENCE voice_evaluations_id_seq OWNED BY NONE;
+            DROP TRIGGER IF EXISTS trg_voice_eval_notify ON voice_evaluations_legacy;
+        """)
+
+        # Index names are schema-wide; move legacy ones out of the way
+        cursor.execute("""
+            SELECT indexname FROM pg_indexes
+            WHERE tablename = 'voice_evaluations_legacy'
+        """)
+        for (index_name,) in cursor.fetchall():
+            cursor.execute(f"ALTER INDEX {index_name} RENAME TO {index_name}_legacy")
+
+        cursor.execute("SELECT MIN(created_at) FROM voice_evaluations_legacy")
+        oldest = cursor.fetchone()[0]
+
+        logger.info("Creating partitioned voice_evaluations tables...")
+        create_schema(cursor)
+        if oldest:
+            for table in PARTITIONED_TABLES:
+                ensure_partitions(cursor, table, start=oldest.date())
+
+        logger.info("Copying rows into partitions...")
+        cursor.execute("""
+            CREATE TEMPORARY TABLE legacy_rows ON COMMIT DROP AS
+            SELECT *, COALESCE(created_at, NOW()) AS partition_created_at
+            FROM voice_evaluations_legacy;
+
+            INSERT INTO voice_evaluations
+                (id, created_at, evaluated_at, content_hash, duration_seconds, language,
+                 word_count, processing_seconds, audio_hash, status, mark,
+                 claimed_by, lease_expires_at, attempts)
+            SELECT id, partition_created_at, evaluated_at,
+                   encode(sha256(convert_to(COALESCE(speech->>'text', ''), 'UTF8')), 'hex'),
+                   duration_seconds, language, word_count, processing_seconds, audio_hash,
+                   status, mark, claimed_by, lease_expires_at, attempts
+            FROM legacy_rows;
+
+            INSERT INTO voice_evaluation_payloads (id, created_at, speech, evaluation)
+            SELECT id, partition_created_at, speech, evaluation
+            FROM legacy_rows;
+        """)
+        cursor.execute("SELECT COUNT(*) FROM legacy_rows")
+        logger.info(f"Copied {cursor.fetchone()[0]} rows")
+
+        # create_schema backfilled the then-empty tables; fill the copied rows
+        backfill_metadata(cursor)
+
+        if drop_legacy:
+            cursor.execute("DROP TABLE voice_evaluations_legacy")
+            logger.info("Dropped voice_evaluations_legacy")
+
+        db.conn.commit()
+        logger.info("Migration to partitioned voice_evaluations completed")
+
+    except Exception as e:
+        logger.error(f"Migration failed: {str(e)}")
+        db.conn.rollback()
+        raise
+    finally:
+        db.close()
+
+def repair_created_at() -> int:
+    """
+    Restore the ingest time of records whose created_at was overwritten
+    with the evaluation time by earlier versions of store_evaluation.
+
+    A record is repaired when created_at lies within a minute after its
+    evaluation time and the speech document carries an earlier
+    processed_at. Rows move to the partition of their original month;
+    payload rows follow through the ON UPDATE CASCADE foreign key.
+
+    Returns:
+        int: Number of repaired records
+    """
+    db = DatabaseHandler()
+    if not db.connect():
+        raise ConnectionError("Database connection failed during created_at repair")
+
+    cursor = db.cursor
+    try:
+        cursor.execute("""
+            CREATE TEMPORARY TABLE created_at_repairs ON COMMIT DROP AS
+            SELECT v.id, v.created_at, (p.speech->>'processed_at')::timestamptz AS ingested_at
+            FROM voice_evaluations v
+            JOIN voice_evaluation_payloads p
+              ON p.id = v.id AND p.created_at = v.created_at
+            WHERE v.evaluated_at IS NOT NULL
+              AND v.created_at >= v.evaluated_at
+              AND v.created_at < v.evaluated_at + INTERVAL '1 minute'
+              AND p.speech ? 'processed_at'
+              AND (p.speech->>'processed_at')::timestamptz < v.evaluated_at;
+        """)
+        cursor.execute("SELECT MIN(ingested_at) FROM created_at_repairs")
+        oldest = cursor.fetchone()[0]
+        if oldest:
+            for table in PARTITIONED_TABLES:
+                ensure_partitions(cursor, table, start=oldest.date())
+
+        cursor.execute("""
+            UPDATE voice_evaluations v
+            SET created_at = r.ingested_at
+            FROM created_at_repairs r
+            WHERE v.id = r.id AND v.created_at = r.created_at
+        """)
+        repaired = cursor.rowcount
+        db.conn.commit()
+        logger.info(f"Restored created_at of {repaired} record(s)")
+        return repaired
+
+    except Exception as e:
+        logger.error(f"created_at repair failed: {str(e)}")
+        db.conn.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Manage monthly partitions of voice_evaluations'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ensure_parser = commands.add_parser('ensure', help='Create upcoming monthly partitions')
+    ensure_parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD)
+
+    retention_parser = commands.add_parser('retention', help='Detach or drop old partitions')
+    retention_parser.add_argument('--keep-months', type=int, required=True,
+                                  help='Months to keep, including the current one')
+    retention_parser.add_argument('--drop', action='store_true',
+                                  help='Drop old partitions instead of only detaching them')
+
+    migrate_parser = commands.add_parser('migrate', help='Convert an unpartitioned table')
+    migrate_parser.add_argument('--drop-legacy', action='store_true',
+                                help='Drop the old table after copying')
+
+    commands.add_parser('repair-created-at',
+                        help='Restore ingest times overwritten by earlier evaluations')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'ensure':
+            sys.exit(0 if maintain_partitions(args.months_ahead) else 1)
+        elif args.command == 'retention':
+            removed = apply_retention(args.keep_months, args.drop)
+            logger.info(f"Retention removed {len(removed)} partition(s)")
+        elif args.command == 'migrate':
+            migrate_to_partitioned(args.drop_legacy)
+        elif args.command == 'repair-created-at':
+            repair_created_at()
+    except Exception as e:
+        logger.error(f"Partition command failed: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,193 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from typing import Dict, Optional
+from app.db_handler import DatabaseHandler
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Set to 0 to send every transcript to the model
+PRESCREEN_ENABLED = os.getenv('PRESCREEN', '1') != '0'
+
+# Bump when rules change, so stored decisions can be told apart and re-evaluated
+PRESCREEN_VERSION = "3"
+
+# Transcripts with fewer words are too short to judge an operator on
+PRESCREEN_MIN_WORDS = int(os.getenv('PRESCREEN_MIN_WORDS', '8'))
+
+# Share of distinct words below which a transcript is a repetition loop,
+# checked from PRESCREEN_REPEAT_MIN_WORDS words on
+PRESCREEN_MIN_DISTINCT_RATIO = float(os.getenv('PRESCREEN_MIN_DISTINCT_RATIO', '0.2'))
+PRESCREEN_REPEAT_MIN_WORDS = 30
+
+# Reason code -> (outcome, evaluation text stored for the record).
+# 'skipped' records get mark 0 (not rated); 'review' records need a person.
+REASONS = {
+    'empty': ('skipped', "Транскрипт порожній: розмову не записано."),
+    'silence': ('skipped', "Запис містить лише тишу або шум, розмови з оператором немає."),
+    'voicemail': ('skipped', "Автовідповідач або голосова пошта, розмови з оператором немає."),
+    'too_short': ('review', "Розмова занадто коротка для автоматичної оцінки, потрібна перевірка."),
+    'repetitive': ('review', "Транскрипт складається з повторів, ймовірно помилка розпізнавання, потрібна перевірка.")
+}
+
+# Phrases Whisper produces on silence or noise (subtitle credits of its training
+# data). Credits name their author in at most a few words, so the tail after a
+# credit is bounded: "субтитри" inside real speech must not erase the rest.
+SILENCE_PATTERN = re.compile(
+    r"дякую за перегляд|дякуємо за перегляд|спасибо за просмотр|"
+    r"субтитр\w* (?:створ|зробл|зроби|підготов|сделал|сделан|создава|создан|подготов)\w*(?: [\w.@-]+){0,3}|"
+    r"редактор субтитр\w*(?: [\w.]+)?|корректор [\w.]+|"
+    r"продолжение следует|amara\.org|thanks for watching|"
+    r"підписуйтесь на канал|подписывайтесь на канал",
+    re.IGNORECASE
+)
+
+# Carrier announcements and mailbox greetings in Ukrainian, Russian and English
+VOICEMAIL_PATTERN = re.compile(
+    r"абонент (?:тимчасово )?(?:недоступний|поза зоною)|абонент (?:временно )?(?:недоступен|вне зоны)|"
+    r"залиште (?:своє |ваше )?повідомлення|оставьте (?:ваше |своё )?сообщение|"
+    r"після (?:звукового )?сигналу|после (?:звукового )?сигнала|"
+    r"номер (?:набрано|набран) неправильно|голосов\w+ пошт\w+|голосов\w+ почт\w+|"
+    r"leave (?:a|your) message|after the (?:tone|beep)|voicemail",
+    re.IGNORECASE
+)
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+class PrescreenStats:
+    """Decision counters of this process; every decision is one LLM call avoided"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.reasons = {reason: 0 for reason in REASONS}
+
+    def count(self, reason: Optional[str]):
+        """Record one screened transcript and its decision, if any"""
+        with self._lock:
+            self.checked += 1
+            if reason:
+                self.reasons[reason] += 1
+
+    def stats(self) -> Dict:
+        """Screened transcripts, avoided LLM calls and decisions per reason"""
+        with self._lock:
+            avoided = sum(self.reasons.values())
+            return {
+                'enabled': PRESCREEN_ENABLED,
+                'version': PRESCREEN_VERSION,
+                'checked': self.checked,
+                'llm_calls_avoided': avoided,
+                'avoided_rate': round(avoided / self.checked, 4) if self.checked else 0.0,
+                'reasons': dict(self.reasons)
+            }
+
+prescreen_stats = PrescreenStats()
+
+def classify(text: Optional[str]) -> Optional[str]:
+    """
+    Reason code for a transcript that should not reach the model.
+
+    Args:
+        text (str): Transcript text
+
+    Returns:
+        Optional[str]: A key of REASONS, or None for a real conversation
+    """
+    if not text or not text.strip():
+        return 'empty'
+    if not WORD_PATTERN.search(SILENCE_PATTERN.sub(' ', text)):
+        return 'silence'
+
+    words = [word.lower() for word in WORD_PATTERN.findall(text)]
+    # Checked before the length rule: greetings are short themselves, while
+    # a long call mentioning a voicemail is still evaluated
+    if len(words) < 4 * PRESCREEN_MIN_WORDS and VOICEMAIL_PATTERN.search(text):
+        return 'voicemail'
+    if len(words) < PRESCREEN_MIN_WORDS:
+        return 'too_short'
+    if len(words) >= PRESCREEN_REPEAT_MIN_WORDS and len(set(words)) / len(words) < PRESCREEN_MIN_DISTINCT_RATIO:
+        return 'repetitive'
+    return None
+
+def prescreen(text: Optional[str]) -> Optional[Dict]:
+    """
+    Decide trivial transcripts without the model.
+
+    Args:
+        text (str): Transcript text
+
+    Returns:
+        Optional[Dict]: None if the transcript needs an LLM evaluation, else
+        the decision: text and mark to store, and 'prescreen' with the
+        reason code, outcome ('skipped' or 'review') and rules version
+    """
+    if not PRESCREEN_ENABLED:
+        return None
+    reason = classify(text)
+    prescreen_stats.count(reason)
+    if reason is None:
+        return None
+
+    outcome, evaluation_text = REASONS[reason]
+    logger.info(f"Pre-screened transcript as {reason} ({outcome}), skipping the model")
+    return {
+        'text': evaluation_text,
+        'mark': 0,
+        'prescreen': {'reason': reason, 'outcome': outcome, 'version': PRESCREEN_VERSION}
+    }
+
+def table_stats() -> Dict:
+    """
+    Stored pre-screen decisions per reason code.
+
+    Returns:
+        Dict: Record counts keyed by reason code
+    """
+    db = DatabaseHandler()
+    try:
+        if not db.connect(read_only=True):
+            return {}
+        db.cursor.execute("""
+            SELECT evaluation->'prescreen'->>'reason', COUNT(*)
+            FROM voice_evaluation_payloads
+            WHERE evaluation ? 'prescreen'
+            GROUP BY 1
+            ORDER BY 1
+        """)
+        return {row[0]: row[1] for row in db.cursor.fetchall()}
+    except Exception as e:
+        logger.error(f"Failed to read pre-screen statistics: {str(e)}")
+        return {}
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check transcripts against the pre-screen rules')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='Stored decisions per reason code')
+    check_parser = subparsers.add_parser('check', help='Classify transcripts without storing anything')
+    check_parser.add_argument('--text', help='Transcript to classify')
+    check_parser.add_argument('--file', help='File with one transcript per line')
+
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        print(json.dumps(table_stats(), indent=2), flush=True)
+    else:
+        if args.file:
+            with open(args.file, 'r', encoding='utf-8') as f:
+                texts = [line.rstrip('\n') for line in f]
+        elif args.text is not None:
+            texts = [args.text]
+        else:
+            logger.error("Pass --text or --file")
+            sys.exit(1)
+        for text in texts:
+            print(json.dumps({'reason': classify(text), 'text': text[:80]}, ensure_ascii=False), flush=True)
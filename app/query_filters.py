@@ -0,0 +1,73 @@
+from typing import List, Optional, Tuple
+from datetime import datetime
+
+# Queue states accepted by the status filter
+VALID_STATUSES = ('pending', 'processing', 'completed', 'failed')
+
+def build_evaluation_filters(
+    status: Optional[str] = None,
+    mark_min: Optional[int] = None,
+    mark_max: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    language: Optional[str] = None,
+    duration_min: Optional[float] = None,
+    duration_max: Optional[float] = None,
+    placeholder: str = 'pyformat',
+    start_index: int = 1,
+    alias: str = ''
+) -> Tuple[str, List]:
+    """
+    Build the WHERE clause shared by listing and export queries.
+
+    Args:
+        status (str, optional): Queue status to match
+        mark_min (int, optional): Minimum mark (inclusive)
+        mark_max (int, optional): Maximum mark (inclusive)
+        created_from (datetime, optional): Lower bound on created_at (inclusive)
+        created_to (datetime, optional): Upper bound on created_at (exclusive)
+        language (str, optional): Detected language code
+        duration_min (float, optional): Minimum audio duration in seconds (inclusive)
+        duration_max (float, optional): Maximum audio duration in seconds (inclusive)
+        placeholder (str): 'pyformat' for psycopg2 (%s) or 'numeric' for asyncpg ($1)
+        start_index (int): First parameter number for 'numeric' placeholders
+        alias (str): Table alias for voice_evaluations columns in joined queries
+
+    Returns:
+        Tuple[str, List]: WHERE clause (empty if no filters) and its parameters
+    """
+    if status is not None and status not in VALID_STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+
+    conditions = []
+    params = []
+    prefix = f"{alias}." if alias else ''
+
+    def add(condition: str, value):
+        if placeholder == 'numeric':
+            marker = f"${start_index + len(params)}"
+        else:
+            marker = '%s'
+        conditions.append(prefix + condition.format(marker))
+        params.append(value)
+
+    if status is not None:
+        add("status = {}", status)
+    if mark_min is not None:
+        add("mark >= {}", mark_min)
+    if mark_max is not None:
+        add("mark <= {}", mark_max)
+    if created_from is not None:
+        add("created_at >= {}", created_from)
+    if created_to is not None:
+        add("created_at < {}", created_to)
+    if language is not None:
+        add("language = {}", language)
+    if duration_min is not None:
+        add("duration_seconds >= {}", duration_min)
+    if duration_max is not None:
+        add("duration_seconds <= {}", duration_max)
+
+    if not conditions:
+        return '', params
+    return 'WHERE ' + ' AND '.join(conditions), params
@@ -0,0 +1,124 @@
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Entries kept per cache; 0 disables caching
+RECORD_CACHE_SIZE = int(os.getenv('RECORD_CACHE_SIZE', '1024'))
+
+# Seconds an entry may be served before it is re-read from the database.
+# Bounds staleness for writes this process does not hear about.
+RECORD_CACHE_TTL = float(os.getenv('RECORD_CACHE_TTL', '300'))
+
+class RecordCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry.
+    Values are copied on the way in and out so callers can modify
+    returned records without corrupting the cached copy.
+    """
+
+    def __init__(self, name: str, max_size: int = RECORD_CACHE_SIZE,
+                 ttl: float = RECORD_CACHE_TTL):
+        """
+        Initialize an empty cache.
+
+        Args:
+            name (str): Name reported in statistics
+            max_size (int): Maximum number of entries before the least recently used is evicted
+            ttl (float): Seconds before an entry expires
+        """
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether entries are stored at all"""
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return a copy of the cached value, or None on a miss or expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key: Hashable, value: Any):
+        """Store a copy of value, evicting the least recently used entry when full"""
+        if not self.enabled:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop a single entry if present"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Return size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+# Speech documents only change when audio is reprocessed
+transcription_cache = RecordCache('transcriptions')
+
+# Only completed evaluations are cached; any status change invalidates them
+evaluation_cache = RecordCache('evaluations')
+
+def invalidate_record(record_id: int):
+    """Drop cached state for a record after it was written"""
+    transcription_cache.invalidate(record_id)
+    evaluation_cache.invalidate(record_id)
+
+def cache_stats() -> Dict:
+    """Statistics for all record caches"""
+    return {
+        cache.name: cache.stats()
+        for cache in (transcription_cache, evaluation_cache)
+    }
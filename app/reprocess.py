@@ -0,0 +1,148 @@
+import argparse
+import json
+import logging
+import sys
+import threading
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from app.audio_archive import archive_enabled, audio_path
+from app.bulk_ingest import build_speech_data
+from app.db_operations_whisper import DatabaseOperations
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# Reprocessing jobs started through the API, by job ID
+reprocess_jobs: Dict[str, Dict] = {}
+
+# One job at a time, so only one extra Whisper model is resident
+_job_lock = threading.Lock()
+
+def reprocess_records(record_ids: Optional[List[int]] = None,
+                      model_name: Optional[str] = None,
+                      page_size: int = 100,
+                      progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Re-run transcription on archived audio and replace stored transcripts.
+    One Whisper model is loaded for the whole run and records are streamed
+    in ID order, so the full corpus can be reprocessed from local disk.
+
+    Args:
+        record_ids (List[int], optional): Records to reprocess (default: all archived)
+        model_name (str, optional): Whisper model to use (default: WhisperTranscriber's)
+        page_size (int): Records fetched per database round trip
+        progress (Callable, optional): Called with the running counts after each record
+
+    Returns:
+        Dict: Counts of processed, failed, missing (audio not in archive)
+        and busy (being evaluated) records
+    """
+    from app.whisper_transcribe import WhisperTranscriber
+
+    transcriber = WhisperTranscriber(model_name) if model_name else WhisperTranscriber()
+    db_ops = DatabaseOperations()
+    counts = {'processed': 0, 'failed': 0, 'missing': 0, 'busy': 0}
+
+    after_id = 0
+    while True:
+        records = db_ops.get_archived_records(record_ids, after_id, page_size)
+        if not records:
+            break
+        for record in records:
+            after_id = record['id']
+            path = audio_path(record['audio_hash'])
+            if not path:
+                logger.warning(f"Audio for record {record['id']} is not in the archive")
+                counts['missing'] += 1
+                continue
+
+            # Backfill priority: queued behind interactive and batch uploads
+            result = transcriber.transcribe_scheduled(path, 'backfill')
+            if not result or not result['text']:
+                logger.error(f"Reprocessing failed for record {record['id']}")
+                counts['failed'] += 1
+                continue
+
+            previous = record['speech'] or {}
+            result['audio_hash'] = record['audio_hash']
+            speech_data = build_speech_data(
+                result['text'], previous.get('filename', ''), metadata=result
+            )
+            if db_ops.replace_transcription(record['id'], speech_data):
+                counts['processed'] += 1
+            else:
+                counts['busy'] += 1
+
+            if progress:
+                progress(counts)
+
+        logger.info(f"Reprocessed up to record {after_id}: {counts}")
+
+    return counts
+
+def start_job(record_ids: Optional[List[int]] = None, model_name: Optional[str] = None) -> Optional[str]:
+    """
+    Register a reprocessing job; run it with run_job.
+
+    Returns:
+        Optional[str]: Job ID, or None if another job is still running
+    """
+    if not _job_lock.acquire(blocking=False):
+        return None
+    job_id = uuid.uuid4().hex
+    reprocess_jobs[job_id] = {
+        'id': job_id,
+        'status': 'queued',
+        'record_ids': record_ids,
+        'model': model_name,
+        'started_at': datetime.now().isoformat(),
+        'finished_at': None,
+        'counts': {'processed': 0, 'failed': 0, 'missing': 0, 'busy': 0}
+    }
+    return job_id
+
+def run_job(job_id: str):
+    """Run a registered job to completion, updating its entry in reprocess_jobs"""
+    job = reprocess_jobs[job_id]
+    try:
+        job['status'] = 'running'
+        job['counts'] = reprocess_records(
+            job['record_ids'], job['model'],
+            progress=lambda counts: job.update(counts=dict(counts))
+        )
+        job['status'] = 'completed'
+    except Exception as e:
+        logger.error(f"Reprocessing job {job_id} failed: {str(e)}")
+        job['status'] = 'failed'
+        job['error'] = str(e)
+    finally:
+        job['finished_at'] = datetime.now().isoformat()
+        _job_lock.release()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Re-transcribe archived audio and replace stored transcripts'
+    )
+    parser.add_argument('--ids', type=int, nargs='+', help='Record IDs (default: all archived records)')
+    parser.add_argument('--model', help='Whisper model name, e.g. large-v3')
+    parser.add_argument('--page-size', type=int, default=100,
+                        help='Records fetched per query (default: 100)')
+
+    args = parser.parse_args()
+
+    if not archive_enabled():
+        logger.error("AUDIO_ARCHIVE_DIR is not set")
+        sys.exit(1)
+
+    try:
+        counts = reprocess_records(args.ids, args.model, args.page_size)
+        print(json.dumps(counts), flush=True)
+    except Exception as e:
+        logger.error(f"Reprocessing failed: {str(e)}")
+        sys.exit(1)
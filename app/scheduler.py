@@ -0,0 +1,177 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first: UI requests, API batch uploads,
+# and long-running backfills such as reprocessing jobs
+PRIORITIES = {'interactive': 0, 'batch': 1, 'backfill': 2}
+
+# Default deadline in seconds from submission per class; None waits forever.
+# Interactive work past its deadline is abandoned rather than finished late.
+DEFAULT_DEADLINES = {
+    'interactive': float(os.getenv('SCHEDULER_INTERACTIVE_DEADLINE', '300')),
+    'batch': float(os.getenv('SCHEDULER_BATCH_DEADLINE', '3600')),
+    'backfill': None
+}
+
+# A job waiting this long is treated as one class more urgent, so
+# lower classes are delayed but never starved
+SCHEDULER_AGING_SECONDS = float(os.getenv('SCHEDULER_AGING_SECONDS', '120'))
+
+class DeadlineExceeded(Exception):
+    """Raised when a job's deadline passes before or during execution"""
+
+class Job:
+    """Scheduling attributes of one unit of inference work"""
+
+    def __init__(self, priority: str = 'interactive', cost: float = 0.0,
+                 timeout: Optional[float] = -1):
+        """
+        Describe a job.
+
+        Args:
+            priority (str): One of PRIORITIES
+            cost (float): Estimated size (audio seconds, tokens); smaller runs first
+            timeout (float, optional): Seconds until the deadline; -1 uses the
+                class default, None means no deadline
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of: {', '.join(PRIORITIES)}")
+        if timeout == -1:
+            timeout = DEFAULT_DEADLINES[priority]
+        self.priority = priority
+        self.cost = cost
+        self.submitted_at = time.monotonic()
+        self.deadline = self.submitted_at + timeout if timeout else None
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed"""
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """Seconds until the deadline, None without one"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check_deadline(self):
+        """Raise DeadlineExceeded once the deadline has passed"""
+        if self.expired():
+            raise DeadlineExceeded(f"{self.priority} job exceeded its deadline")
+
+    def sort_key(self, now: float) -> tuple:
+        """Order by aged priority class, then shortest job, then arrival"""
+        aged = PRIORITIES[self.priority] - int((now - self.submitted_at) // SCHEDULER_AGING_SECONDS)
+        return (max(0, aged), self.cost, self.submitted_at)
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for ordering jobs, without loading a tokenizer"""
+    # The Mistral tokenizer averages about three characters per token on Ukrainian text
+    return len(text) // 3
+
+class PriorityGate:
+    """
+    Admission control for a fixed number of concurrent executions.
+
+    Waiting jobs are admitted by priority class, shortest job first within
+    a class, with aging. Jobs whose deadline passes while queued are
+    dropped with DeadlineExceeded instead of running late.
+    """
+
+    def __init__(self, name: str, capacity: int = 1):
+        """
+        Initialize an empty queue.
+
+        Args:
+            name (str): Name reported in statistics
+            capacity (int): Jobs allowed to run at the same time
+        """
+        self.name = name
+        self.capacity = max(1, capacity)
+        self._cond = threading.Condition()
+        self._queue: List[Job] = []
+        self._running = 0
+        self._stats = {
+            priority: {'admitted': 0, 'expired': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+            for priority in PRIORITIES
+        }
+
+    def _next(self) -> Optional[Job]:
+        """Job to admit next"""
+        now = time.monotonic()
+        return min(self._queue, key=lambda job: job.sort_key(now), default=None)
+
+    @contextmanager
+    def admit(self, job: Job) -> Iterator[Job]:
+        """
+        Wait for the job's turn and hold an execution slot for the block.
+
+        Raises:
+            DeadlineExceeded: The deadline passed while queued
+        """
+        with self._cond:
+            self._queue.append(job)
+            while True:
+                if job.expired():
+                    self._queue.remove(job)
+                    self._stats[job.priority]['expired'] += 1
+                    self._cond.notify_all()
+                    logger.warning(f"{self.name}: {job.priority} job expired after "
+                                   f"{time.monotonic() - job.submitted_at:.1f} s in queue")
+                    raise DeadlineExceeded(f"{job.priority} job expired while queued")
+                if self._running < self.capacity and self._next() is job:
+                    break
+                # Wake at the deadline or aging step even without a release
+                timeout = SCHEDULER_AGING_SECONDS
+                if job.deadline is not None:
+                    timeout = min(timeout, job.remaining())
+                self._cond.wait(timeout=timeout)
+            self._queue.remove(job)
+            self._running += 1
+            waited = time.monotonic() - job.submitted_at
+            stats = self._stats[job.priority]
+            stats['admitted'] += 1
+            stats['wait_seconds'] += waited
+            stats['max_wait_seconds'] = max(stats['max_wait_seconds'], waited)
+            # Another slot may still be free for the next job in line
+            self._cond.notify_all()
+        try:
+            yield job
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        """Queue length and per-class wait statistics"""
+        with self._cond:
+            waiting = {priority: 0 for priority in PRIORITIES}
+            for job in self._queue:
+                waiting[job.priority] += 1
+            return {
+                'capacity': self.capacity,
+                'running': self._running,
+                'waiting': waiting,
+                'classes': {
+                    priority: {
+                        'admitted': stats['admitted'],
+                        'expired': stats['expired'],
+                        'avg_wait_seconds': round(stats['wait_seconds'] / stats['admitted'], 3)
+                        if stats['admitted'] else 0.0,
+                        'max_wait_seconds': round(stats['max_wait_seconds'], 3)
+                    }
+                    for priority, stats in self._stats.items()
+                }
+            }
+
+# Whisper runs one transcription at a time per process; it already uses
+# all cores through torch threads
+WHISPER_CONCURRENCY = int(os.getenv('WHISPER_CONCURRENCY', '1'))
+whisper_gate = PriorityGate('whisper', WHISPER_CONCURRENCY)
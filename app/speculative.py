@@ -0,0 +1,166 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from llama_cpp import Llama
+from llama_cpp.llama_speculative import LlamaDraftModel, LlamaPromptLookupDecoding
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_MODES = ('off', 'prompt-lookup', 'draft-model')
+
+# Speculative decoding mode of the evaluator; 'off' decodes one token per step
+LLAMA_SPECULATIVE = os.getenv('LLAMA_SPECULATIVE', 'off')
+
+# Tokens drafted per step
+LLAMA_DRAFT_TOKENS = int(os.getenv('LLAMA_DRAFT_TOKENS', '10'))
+
+# Small GGUF model sharing the evaluator's vocabulary, for 'draft-model' mode
+LLAMA_DRAFT_MODEL = os.getenv('LLAMA_DRAFT_MODEL', '')
+
+class DraftModelDecoding(LlamaDraftModel):
+    """
+    Draft tokens greedily with a small local model.
+    The draft model keeps its own KV cache; consecutive calls share the
+    prompt prefix, so only newly accepted tokens are evaluated.
+    """
+
+    def __init__(self, model_path: str, n_ctx: int, n_threads: int,
+                 num_pred_tokens: int = LLAMA_DRAFT_TOKENS):
+        """
+        Load the draft model.
+
+        Args:
+            model_path (str): Path of the draft GGUF model
+            n_ctx (int): Context size, same as the main model's
+            n_threads (int): CPU threads for drafting
+            num_pred_tokens (int): Tokens drafted per call
+        """
+        self.num_pred_tokens = num_pred_tokens
+        self.model = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads,
+                           verbose=False, use_mmap=True)
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs) -> np.ndarray:
+        """Greedy continuation of input_ids"""
+        tokens = []
+        for token in self.model.generate(input_ids.tolist(), top_k=1, temp=0.0, reset=True):
+            if token == self.model.token_eos():
+                break
+            tokens.append(token)
+            if len(tokens) >= self.num_pred_tokens:
+                break
+        return np.array(tokens, dtype=np.intc)
+
+def build_draft_model(mode: str, n_ctx: int, n_threads: int) -> Optional[LlamaDraftModel]:
+    """
+    Draft model for a speculative decoding mode.
+
+    Prompt lookup drafts by matching the last generated n-gram against
+    the prompt, which pays off because evaluations restate phrases from
+    the prompt's example answers; it costs no extra model. The draft
+    model mode needs LLAMA_DRAFT_MODEL.
+
+    Args:
+        mode (str): One of SPECULATIVE_MODES
+        n_ctx (int): Context size of the main model
+        n_threads (int): CPU threads of the main model
+
+    Returns:
+        Optional[LlamaDraftModel]: None for plain decoding
+    """
+    if mode == 'prompt-lookup':
+        return LlamaPromptLookupDecoding(num_pred_tokens=LLAMA_DRAFT_TOKENS)
+    if mode == 'draft-model':
+        if not LLAMA_DRAFT_MODEL or not os.path.exists(LLAMA_DRAFT_MODEL):
+            logger.error(f"Draft model not found at '{LLAMA_DRAFT_MODEL}', using plain decoding")
+            return None
+        return DraftModelDecoding(LLAMA_DRAFT_MODEL, n_ctx, n_threads)
+    if mode != 'off':
+        logger.error(f"Unknown speculative mode '{mode}', using plain decoding")
+    return None
+
+def _load_texts(record_ids: Optional[List[int]], text_file: Optional[str]) -> List[str]:
+    """Transcripts to benchmark on, from the database or a file with one per line"""
+    if text_file:
+        with open(text_file, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+    from app.db_operations_evaluation import DatabaseOperationsEvaluation
+    db_ops = DatabaseOperationsEvaluation()
+    texts = []
+    for record_id in record_ids or []:
+        speech = db_ops.get_transcription(record_id)
+        if speech and speech.get('text'):
+            texts.append(speech['text'])
+    return texts
+
+def benchmark(texts: List[str], mode: str) -> Dict:
+    """
+    Evaluate texts with plain decoding and with mode, comparing speed and output.
+    Results are not written to the evaluation cache.
+
+    Returns:
+        Dict: Per-mode token rates and the share of identical outputs
+    """
+    from app.fast_inference import LlamaEvaluator, build_evaluation_prompt
+
+    outputs = {}
+    report = {}
+    for current in ('off', mode):
+        evaluator = LlamaEvaluator(speculative=current)
+        results, tokens, seconds = [], 0, 0.0
+        try:
+            for text in texts:
+                evaluator.last_usage = {}
+                started = time.monotonic()
+                results.append(evaluator._generate(build_evaluation_prompt(text)))
+                seconds += time.monotonic() - started
+                tokens += evaluator.last_usage.get('completion_tokens', 0)
+        finally:
+            evaluator.cleanup()
+        outputs[current] = results
+        report[current] = {
+            'completion_tokens': tokens,
+            'seconds': round(seconds, 2),
+            'tokens_per_second': round(tokens / seconds, 2) if seconds else 0.0
+        }
+        logger.info(f"{current}: {report[current]}")
+
+    pairs = list(zip(outputs['off'], outputs[mode]))
+    report['identical_text'] = sum(1 for plain, fast in pairs if plain[0] == fast[0])
+    report['identical_mark'] = sum(1 for plain, fast in pairs if plain[1] == fast[1])
+    report['texts'] = len(pairs)
+    if report['off']['tokens_per_second']:
+        report['speedup'] = round(report[mode]['tokens_per_second'] / report['off']['tokens_per_second'], 2)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Benchmark speculative decoding against plain decoding for the evaluator'
+    )
+    parser.add_argument('--mode', choices=SPECULATIVE_MODES[1:], default='prompt-lookup',
+                        help='Speculative mode to compare (default: prompt-lookup)')
+    parser.add_argument('--ids', type=int, nargs='+', help='Record IDs whose transcripts to evaluate')
+    parser.add_argument('--text-file', help='File with one transcript per line')
+
+    args = parser.parse_args()
+
+    texts = _load_texts(args.ids, args.text_file)
+    if not texts:
+        logger.error("No transcripts to benchmark; pass --ids or --text-file")
+        sys.exit(1)
+
+    try:
+        print(json.dumps(benchmark(texts, args.mode), indent=2), flush=True)
+    except Exception as e:
+        logger.error(f"Benchmark failed: {str(e)}")
+        sys.exit(1)
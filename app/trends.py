@@ -0,0 +1,157 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+from app.db_async import async_db
+from app.record_cache import RecordCache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BUCKET_SIZES = ('day', 'week', 'month')
+
+# Time zone for bucket boundaries when the request does not name one
+TRENDS_TIMEZONE = os.getenv('TRENDS_TIMEZONE', 'UTC')
+
+# Largest number of buckets a single request may span
+TRENDS_MAX_BUCKETS = int(os.getenv('TRENDS_MAX_BUCKETS', '1000'))
+
+# Closed buckets only change when an old record is re-evaluated, so they
+# are cached for longer than single records; 0 disables the cache
+trend_cache = RecordCache(
+    'trends',
+    max_size=int(os.getenv('TRENDS_CACHE_SIZE', '5000')),
+    ttl=float(os.getenv('TRENDS_CACHE_TTL', '3600'))
+)
+
+def bucket_start(moment: datetime, bucket: str) -> datetime:
+    """First instant of the bucket containing moment, in moment's time zone"""
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'week':
+        # ISO weeks start on Monday, as date_trunc('week') does
+        start -= timedelta(days=start.weekday())
+    elif bucket == 'month':
+        start = start.replace(day=1)
+    return start
+
+def next_bucket(start: datetime, bucket: str) -> datetime:
+    """Start of the bucket following the one starting at start"""
+    if bucket == 'day':
+        return start + timedelta(days=1)
+    if bucket == 'week':
+        return start + timedelta(weeks=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+def _empty_bucket(start: datetime, end: datetime) -> Dict:
+    """Bucket with zero counts"""
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'ingested': 0,
+        'evaluated': 0,
+        'average_mark': 0,
+        'marks_distribution': {i: 0 for i in range(1, 11)}
+    }
+
+async def get_trends(date_from: datetime, date_to: datetime, bucket: str = 'day',
+                     timezone: str = TRENDS_TIMEZONE, language: Optional[str] = None) -> Dict:
+    """
+    Per-bucket ingest volume, evaluation counts, average marks and mark
+    histograms between date_from and date_to.
+
+    The range is widened to whole buckets. Buckets that ended before now
+    are served from trend_cache when possible and only the remaining
+    range is queried.
+
+    Args:
+        date_from (datetime): Start of the range; naive values are read in timezone
+        date_to (datetime): End of the range; naive values are read in timezone
+        bucket (str): 'day', 'week' or 'month'
+        timezone (str): IANA time zone name for bucket boundaries
+        language (str, optional): Only include records in this language
+
+    Returns:
+        Dict: Request parameters and the list of buckets, oldest first
+
+    Raises:
+        ValueError: If the bucket size, time zone or range is invalid
+    """
+    if bucket not in BUCKET_SIZES:
+        raise ValueError(f"Unknown bucket size: {bucket}")
+    try:
+        zone = ZoneInfo(timezone)
+    except Exception:
+        raise ValueError(f"Unknown time zone: {timezone}")
+
+    def localize(moment: datetime) -> datetime:
+        return moment.replace(tzinfo=zone) if moment.tzinfo is None else moment.astimezone(zone)
+
+    date_from, date_to = localize(date_from), localize(date_to)
+    if date_to <= date_from:
+        raise ValueError("date_to must be after date_from")
+
+    # Enumerate buckets covering the range
+    starts = []
+    start = bucket_start(date_from, bucket)
+    while start < date_to:
+        starts.append(start)
+        if len(starts) > TRENDS_MAX_BUCKETS:
+            raise ValueError(f"Range spans more than {TRENDS_MAX_BUCKETS} buckets")
+        start = next_bucket(start, bucket)
+    range_end = start
+
+    now = datetime.now(zone)
+    buckets = {}
+    for start in starts:
+        end = next_bucket(start, bucket)
+        cached = trend_cache.get((bucket, timezone, language, start)) if end <= now else None
+        buckets[start] = cached
+
+    missing = [start for start in starts if buckets[start] is None]
+    if missing:
+        query_start = missing[0]
+        for start in starts:
+            if start >= query_start:
+                buckets[start] = _empty_bucket(start, next_bucket(start, bucket))
+
+        evaluated, ingested = await async_db.get_trend_counts(
+            bucket, timezone, query_start, range_end, language
+        )
+        for row in ingested:
+            key = row['bucket'].astimezone(zone)
+            if key in buckets:
+                buckets[key]['ingested'] = row['count']
+        for row in evaluated:
+            key = row['bucket'].astimezone(zone)
+            if key not in buckets:
+                continue
+            buckets[key]['evaluated'] += row['count']
+            if row['mark'] in buckets[key]['marks_distribution']:
+                buckets[key]['marks_distribution'][row['mark']] = row['count']
+
+        for start in starts:
+            if start < query_start:
+                continue
+            item = buckets[start]
+            marked = sum(item['marks_distribution'].values())
+            if marked:
+                total = sum(mark * count for mark, count in item['marks_distribution'].items())
+                item['average_mark'] = round(total / marked, 2)
+            if next_bucket(start, bucket) <= now:
+                trend_cache.set((bucket, timezone, language, start), item)
+
+        logger.info(f"Computed {len(starts) - starts.index(query_start)} {bucket} trend bucket(s) in SQL, "
+                    f"{starts.index(query_start)} served from cache")
+
+    return {
+        'bucket': bucket,
+        'timezone': timezone,
+        'language': language,
+        'date_from': starts[0].isoformat(),
+        'date_to': range_end.isoformat(),
+        'buckets': [buckets[start] for start in starts]
+    }
@@ -0,0 +1,281 @@
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# Profile written by `python -m app.tuning` and read by the services at startup
+TUNING_PROFILE_PATH = os.getenv('TUNING_PROFILE', 'tuning_profile.json')
+
+CPU_COUNT = os.cpu_count() or 8
+
+# Synthetic workload: a prompt and answer of typical evaluation size
+BENCHMARK_PROMPT_TOKENS = 1500
+BENCHMARK_ANSWER_TOKENS = 150
+
+# Seconds of synthetic audio transcribed per Whisper candidate
+BENCHMARK_AUDIO_SECONDS = 30
+
+_profile: Optional[Dict] = None
+_profile_lock = threading.Lock()
+
+def _cuda_available() -> bool:
+    """Whether a CUDA device is usable, without requiring torch"""
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+def load_profile() -> Dict:
+    """
+    Read the tuning profile once per process.
+
+    Returns:
+        Dict: Profile with 'llama' and 'whisper' sections, empty if no
+        profile was written for this machine
+    """
+    global _profile
+    with _profile_lock:
+        if _profile is None:
+            try:
+                with open(TUNING_PROFILE_PATH, 'r', encoding='utf-8') as f:
+                    _profile = json.load(f)
+                logger.info(f"Loaded tuning profile {TUNING_PROFILE_PATH} "
+                            f"(created {_profile.get('created_at')} on {_profile.get('machine', {}).get('hostname')})")
+            except FileNotFoundError:
+                _profile = {}
+            except Exception as e:
+                logger.error(f"Invalid tuning profile {TUNING_PROFILE_PATH}: {str(e)}")
+                _profile = {}
+        return _profile
+
+def llama_settings() -> Dict:
+    """
+    llama.cpp settings: the tuned profile over defaults for this machine.
+
+    Returns:
+        Dict: n_threads (per context), n_batch, n_gpu_layers, pool_size, total_threads
+    """
+    cuda = _cuda_available()
+    settings = {
+        'n_threads': min(8, CPU_COUNT),
+        'n_batch': 512,
+        'n_gpu_layers': 35 if cuda else 0,
+        'pool_size': 1 if cuda else 2,  # offloaded layers are copied per context
+        'total_threads': CPU_COUNT
+    }
+    settings.update(load_profile().get('llama', {}))
+    return settings
+
+def whisper_settings() -> Dict:
+    """
+    Whisper (torch) settings: the tuned profile over defaults.
+
+    Returns:
+        Dict: torch_threads and torch_interop_threads
+    """
+    settings = {'torch_threads': CPU_COUNT, 'torch_interop_threads': None}
+    settings.update(load_profile().get('whisper', {}))
+    return settings
+
+def _synthetic_prompt(tokenizer, n_tokens: int) -> str:
+    """Random Ukrainian words until the prompt reaches n_tokens"""
+    words = ['оператор', 'клієнт', 'замовлення', 'доставка', 'питання', 'дякую',
+             'будь ласка', 'рахунок', 'номер', 'сьогодні', 'зрозуміло', 'допомогти']
+    rng = random.Random(42)
+    text = ''
+    while len(tokenizer.tokenize(text.encode('utf-8'))) < n_tokens:
+        text += ' '.join(rng.choice(words) for _ in range(50)) + '. '
+    return f"[INST]{text}\nПідсумуйте розмову.[/INST]"
+
+def _run_llama_job(model, prompt: str) -> int:
+    """One synthetic evaluation; returns generated tokens"""
+    # Forget the previous prompt, otherwise llama.cpp reuses its matching
+    # prefix and only decoding would be timed, which n_batch does not affect
+    model.reset()
+    response = model.create_completion(
+        prompt, max_tokens=BENCHMARK_ANSWER_TOKENS, temperature=0.0
+    )
+    return response.get('usage', {}).get('completion_tokens', 0)
+
+def benchmark_llama(thread_candidates: List[int], batch_candidates: List[int],
+                    pool_candidates: List[int]) -> Dict:
+    """
+    Measure evaluation throughput for llama.cpp settings.
+    n_batch is tuned first with one context using all threads, then
+    total thread count and number of concurrent contexts are tuned with
+    that batch size, running one job per context in parallel.
+
+    Returns:
+        Dict: Best llama settings and all measurements
+    """
+    from llama_cpp import Llama
+    from app.fast_inference import MODEL_NAME
+
+    model_path = os.path.abspath(os.path.join('models', MODEL_NAME))
+    n_gpu_layers = llama_settings()['n_gpu_layers']
+    if n_gpu_layers:
+        # The evaluator pool runs one context when layers are offloaded
+        pool_candidates = [1]
+    n_ctx = 2048 if BENCHMARK_PROMPT_TOKENS + BENCHMARK_ANSWER_TOKENS <= 2048 else 4096
+    tokenizer = Llama(model_path=model_path, vocab_only=True, verbose=False)
+    prompt = _synthetic_prompt(tokenizer, BENCHMARK_PROMPT_TOKENS)
+
+    def load(n_threads: int, n_batch: int):
+        return Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads,
+                     n_batch=n_batch, n_gpu_layers=n_gpu_layers, seed=42,
+                     verbose=False, use_mmap=True, use_mlock=False)
+
+    results = []
+
+    # Stage 1: batch size with a single context
+    best_batch, best_seconds = batch_candidates[0], None
+    full_threads = max(thread_candidates)
+    for n_batch in batch_candidates:
+        model = load(full_threads, n_batch)
+        _run_llama_job(model, prompt)  # warm-up: page in weights
+        started = time.monotonic()
+        _run_llama_job(model, prompt)
+        seconds = time.monotonic() - started
+        del model
+        results.append({'stage': 'n_batch', 'n_batch': n_batch, 'n_threads': full_threads,
+                        'seconds_per_job': round(seconds, 2)})
+        logger.info(f"n_batch={n_batch}: {seconds:.2f} s per evaluation")
+        if best_seconds is None or seconds < best_seconds:
+            best_batch, best_seconds = n_batch, seconds
+
+    # Stage 2: total threads and concurrent contexts
+    best = None
+    for total_threads in thread_candidates:
+        for pool_size in pool_candidates:
+            n_threads = max(1, total_threads // pool_size)
+            models = [load(n_threads, best_batch) for _ in range(pool_size)]
+            for model in models:
+                _run_llama_job(model, prompt)
+            # ctypes releases the GIL, so contexts run in parallel threads
+            workers = [threading.Thread(target=_run_llama_job, args=(model, prompt)) for model in models]
+            started = time.monotonic()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            seconds = time.monotonic() - started
+            del models
+            per_minute = pool_size * 60 / seconds
+            results.append({'stage': 'pool', 'total_threads': total_threads, 'pool_size': pool_size,
+                            'n_threads': n_threads, 'n_batch': best_batch,
+                            'evaluations_per_minute': round(per_minute, 2)})
+            logger.info(f"{pool_size} contexts x {n_threads} threads: {per_minute:.2f} evaluations/min")
+            if best is None or per_minute > best['evaluations_per_minute']:
+                best = results[-1]
+
+    return {
+        'settings': {
+            'n_threads': best['n_threads'],
+            'n_batch': best_batch,
+            'n_gpu_layers': n_gpu_layers,
+            'pool_size': best['pool_size'],
+            'total_threads': best['total_threads']
+        },
+        'measurements': results
+    }
+
+def benchmark_whisper(model_name: str, thread_candidates: List[int]) -> Dict:
+    """
+    Measure Whisper transcription time for torch thread counts on
+    synthetic audio.
+
+    Returns:
+        Dict: Best whisper settings and all measurements
+    """
+    import numpy as np
+    import torch
+    import whisper
+    from app.whisper_transcribe import SAMPLE_RATE
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = whisper.load_model(model_name).to(device)
+
+    # Speech-band tones with noise; content is irrelevant, the decoder
+    # still runs over every 30 s window
+    rng = np.random.default_rng(42)
+    t = np.arange(BENCHMARK_AUDIO_SECONDS * SAMPLE_RATE) / SAMPLE_RATE
+    audio = (0.1 * np.sin(2 * np.pi * 220 * t) * np.sin(2 * np.pi * 3 * t)
+             + 0.02 * rng.standard_normal(t.shape)).astype(np.float32)
+
+    results = []
+    best = None
+    for threads in thread_candidates:
+        torch.set_num_threads(threads)
+        model.transcribe(audio, language='uk', fp16=device == 'cuda')  # warm-up
+        started = time.monotonic()
+        model.transcribe(audio, language='uk', fp16=device == 'cuda')
+        seconds = time.monotonic() - started
+        results.append({'torch_threads': threads, 'seconds': round(seconds, 2),
+                        'realtime_factor': round(BENCHMARK_AUDIO_SECONDS / seconds, 2)})
+        logger.info(f"torch threads={threads}: {seconds:.2f} s for {BENCHMARK_AUDIO_SECONDS} s of audio")
+        if best is None or seconds < best['seconds']:
+            best = results[-1]
+
+    return {
+        'settings': {'torch_threads': best['torch_threads'], 'torch_interop_threads': 1},
+        'measurements': results
+    }
+
+def _thread_candidates() -> List[int]:
+    """Quarter, half and all logical cores (half is usually the physical core count)"""
+    return sorted({max(1, CPU_COUNT // 4), max(1, CPU_COUNT // 2), CPU_COUNT})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Benchmark llama.cpp and Whisper settings on this machine and write a tuning profile'
+    )
+    parser.add_argument('--output', default=TUNING_PROFILE_PATH,
+                        help=f'Profile path (default: {TUNING_PROFILE_PATH})')
+    parser.add_argument('--skip-llama', action='store_true', help='Do not benchmark llama.cpp')
+    parser.add_argument('--skip-whisper', action='store_true', help='Do not benchmark Whisper')
+    parser.add_argument('--whisper-model', default='large-v3', help='Whisper model to benchmark')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[128, 256, 512],
+                        help='n_batch candidates')
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[1, 2, 4],
+                        help='Concurrent context candidates')
+
+    args = parser.parse_args()
+
+    profile = {
+        'created_at': datetime.now().isoformat(),
+        'machine': {'hostname': socket.gethostname(), 'cpu_count': CPU_COUNT, 'cuda': _cuda_available()}
+    }
+    try:
+        if not args.skip_llama:
+            pool_sizes = [size for size in args.pool_sizes if size <= CPU_COUNT] or [1]
+            result = benchmark_llama(_thread_candidates(), args.batch_sizes, pool_sizes)
+            profile['llama'] = result['settings']
+            profile['llama_measurements'] = result['measurements']
+        if not args.skip_whisper:
+            result = benchmark_whisper(args.whisper_model, _thread_candidates())
+            profile['whisper'] = result['settings']
+            profile['whisper_measurements'] = result['measurements']
+    except Exception as e:
+        logger.error(f"Tuning failed: {str(e)}")
+        sys.exit(1)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2)
+    logger.info(f"Tuning profile written to {args.output}")
+    print(json.dumps({key: profile.get(key) for key in ('llama', 'whisper')}, indent=2), flush=True)
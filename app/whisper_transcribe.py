@@ -8,7 +8,10 @@ import os
 import logging
 import warnings
 import codecs
+import time
 from app.db_operations_whisper import DatabaseOperations
+from app.tuning import whisper_settings
+from app.scheduler import DeadlineExceeded, Job, whisper_gate
 
 # Suppress all warnings from whisper and torch for cleaner output
 warnings.filterwarnings('ignore')
@@ -25,6 +28,32 @@ logger = logging.getLogger(__name__)
 # Set UTF-8 encoding for stdout to handle multilingual transcriptions
 sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer)
 
+# Whisper resamples all audio to 16kHz
+SAMPLE_RATE = 16000
+
+def apply_torch_threads():
+    """Set torch thread pools from the tuning profile"""
+    settings = whisper_settings()
+    torch.set_num_threads(settings['torch_threads'])
+    if settings.get('torch_interop_threads'):
+        try:
+            torch.set_num_interop_threads(settings['torch_interop_threads'])
+        except RuntimeError:
+            # Can only be set before the first parallel operation
+            logger.warning("torch interop threads already initialized, keeping current setting")
+
+def audio_duration(audio_path):
+    """
+    Audio length in seconds from the container metadata, without decoding.
+    Used to order transcription jobs; falls back to an estimate from file size.
+    """
+    try:
+        from pydub.utils import mediainfo
+        return float(mediainfo(audio_path)['duration'])
+    except Exception:
+        # Roughly 128 kbit/s compressed audio
+        return os.path.getsize(audio_path) / 16000
+
 class WhisperTranscriber:
     def __init__(self, model_name="large-v3"):
         """
@@ -35,6 +64,7 @@ class WhisperTranscriber:
         """
         self.model_name = model_name
         self.model = None
+        apply_torch_threads()
         # Set device to CUDA if available for faster processing
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         # Initialize database connection using the new DatabaseOperations class
@@ -52,20 +82,22 @@ class WhisperTranscriber:
             logger.error(f"Error loading model: {str(e)}")
             raise
 
-    def detect_language(self, audio_path):
+    def detect_language(self, audio_path, audio=None):
         """
         Detect language from audio file.
         Takes a sample from the middle for efficient detection.
         
         Args:
             audio_path (str): Path to the audio file
+            audio (np.ndarray, optional): Already decoded audio, to avoid decoding twice
             
         Returns:
             str: Detected language code (defaults to 'en' if detection fails)
         """
         try:
             # Load a small segment for language detection
-            audio = whisper.load_audio(audio_path)
+            if audio is None:
+                audio = whisper.load_audio(audio_path)
             
             # Take a 30-second segment from the middle for efficient detection
             duration = len(audio)
@@ -89,25 +121,27 @@ class WhisperTranscriber:
             logger.error(f"Language detection failed: {str(e)}")
             return "en"  # Default to English on failure
 
-    def chunk_audio(self, audio_path, chunk_duration=240):
+    def chunk_audio(self, audio_path, chunk_duration=240, audio=None):
         """
         Split audio into manageable chunks for processing.
         
         Args:
             audio_path (str): Path to audio file
             chunk_duration (int): Length of each chunk in seconds (default: 4 minutes)
+            audio (np.ndarray, optional): Already decoded audio, to avoid decoding twice
             
         Returns:
             list: List of audio chunks as numpy arrays
         """
         try:
-            logger.info("Loading audio file for chunking...")
-            audio = whisper.load_audio(audio_path)
-            total_duration = len(audio) / 16000  # Convert to seconds
+            if audio is None:
+                logger.info("Loading audio file for chunking...")
+                audio = whisper.load_audio(audio_path)
+            total_duration = len(audio) / SAMPLE_RATE  # Convert to seconds
             logger.info(f"Total audio duration: {total_duration:.2f} seconds")
             
             # Calculate chunk parameters
-            sample_rate = 16000  # Whisper uses 16kHz
+            sample_rate = SAMPLE_RATE  # Whisper uses 16kHz
             chunk_length = chunk_duration * sample_rate
             overlap_length = 5 * sample_rate  # 5 second overlap
             
@@ -169,27 +203,93 @@ class WhisperTranscriber:
         Returns:
             str: Cleaned transcription text
         """
+        result = self.process_audio_with_metadata(audio_path)
+        return result['text'] if result else None
+
+    def transcribe_scheduled(self, audio_path, priority='interactive'):
+        """
+        Transcribe through the Whisper scheduler: queued by priority class and
+        audio length, and abandoned once the job's deadline has passed.
+        
+        Args:
+            audio_path (str): Path to the audio file
+            priority (str): Scheduler priority class
+            
+        Returns:
+            dict: As process_audio_with_metadata; None also when the deadline passed
+        """
+        job = Job(priority, cost=audio_duration(audio_path))
+        try:
+            with whisper_gate.admit(job):
+                return self.process_audio_with_metadata(audio_path, job=job)
+        except DeadlineExceeded as e:
+            logger.error(f"Transcription of {audio_path} cancelled: {str(e)}")
+            return None
+
+    def process_audio_with_metadata(self, audio_path, job=None):
+        """
+        Process the complete audio file and return the transcription together
+        with what was learned about the audio on the way.
+        
+        Args:
+            audio_path (str): Path to the audio file
+            job (Job, optional): Scheduler job; processing stops between
+                chunks once its deadline has passed
+            
+        Returns:
+            dict: Transcription details, or None on failure:
+                - text: Cleaned transcription text
+                - language: Detected language code
+                - duration_seconds: Audio duration
+                - word_count: Number of words in the cleaned text
+                - language_detection_seconds: Time spent detecting the language
+                - transcription_seconds: Time spent transcribing chunks
+                - processing_seconds: Total processing time including decoding
+                - model: Whisper model name
+        """
         try:
             if self.model is None:
                 self.load_model()
             
+            started = time.perf_counter()
+            # Decode once and share the samples between detection and chunking
+            audio = whisper.load_audio(audio_path)
+            duration_seconds = len(audio) / SAMPLE_RATE
+
             # Detect language and chunk audio
-            language = self.detect_language(audio_path)
-            chunks = self.chunk_audio(audio_path)
+            detection_started = time.perf_counter()
+            language = self.detect_language(audio_path, audio=audio)
+            language_detection_seconds = time.perf_counter() - detection_started
+
+            chunks = self.chunk_audio(audio_path, audio=audio)
             if not chunks:
                 raise Exception("Failed to create audio chunks")
             
             # Process each chunk and combine results
+            transcription_started = time.perf_counter()
             full_text = ""
             for chunk in chunks:
+                if job:
+                    job.check_deadline()
                 result = self.transcribe_chunk(chunk, language)
                 if result:
                     if full_text and result["text"]:
                         full_text += " "
                     full_text += result["text"].strip()
+            transcription_seconds = time.perf_counter() - transcription_started
             
-            # Clean up and return the text
-            return self._clean_text(full_text)
+            # Clean up the text
+            text = self._clean_text(full_text)
+            return {
+                'text': text,
+                'language': language,
+                'duration_seconds': round(duration_seconds, 2),
+                'word_count': len(text.split()),
+                'language_detection_seconds': round(language_detection_seconds, 3),
+                'transcription_seconds': round(transcription_seconds, 3),
+                'processing_seconds': round(time.perf_counter() - started, 3),
+                'model': self.model_name
+            }
 
         except Exception as e:
             logger.error(f"Audio processing failed: {str(e)}")
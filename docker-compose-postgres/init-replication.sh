@@ -0,0 +1,4 @@
+#!/bin/bash
+# Allow the replica container to stream WAL from the primary
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,29 @@
+import os
+import pytest
+
+@pytest.fixture
+def voice_db(monkeypatch):
+    """
+    Cursor on a scratch database with the current schema and empty tables.
+    Set TEST_DB_NAME (and the usual DB_HOST/DB_USER/DB_PASSWORD) to run
+    database tests; the database is emptied by every test.
+    """
+    test_db = os.getenv('TEST_DB_NAME')
+    if not test_db:
+        pytest.skip("TEST_DB_NAME is not set")
+    psycopg2 = pytest.importorskip('psycopg2')
+    monkeypatch.setenv('DB_NAME', test_db)
+
+    from app.db_handler import primary_params
+    from app.init_db import create_schema
+
+    conn = psycopg2.connect(**primary_params())
+    conn.autocommit = True
+    cursor = conn.cursor()
+    create_schema(cursor)
+    cursor.execute("TRUNCATE voice_evaluations, voice_evaluation_payloads, evaluation_result_cache")
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,26 @@
+import asyncio
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('llama_cpp')
+pytest.importorskip('torch')
+
+from app import evaluation_coordinator
+
+def test_wait_for_other_process_is_capped(monkeypatch):
+    reads = []
+
+    async def get_evaluation(record_id, include_payload=True):
+        reads.append(include_payload)
+        return {'status': 'processing', 'mark': 0}
+
+    monkeypatch.setattr(evaluation_coordinator.async_db, 'get_evaluation', get_evaluation)
+    monkeypatch.setattr(evaluation_coordinator, 'WAIT_MAX_SECONDS', 0.2)
+    monkeypatch.setattr(evaluation_coordinator, 'WAIT_POLL_SECONDS', 0.05)
+
+    result = asyncio.run(asyncio.wait_for(evaluation_coordinator._unclaimed_result(1), timeout=2))
+    assert result['status'] == 'processing'
+    # Polls stay slim; only the final read fetches the payload
+    assert reads[-1] is True and not any(reads[:-1])
+    assert len(reads) <= 10
+    assert evaluation_coordinator._result_items(result)[0]['type'] == 'error'
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+
+pytest.importorskip('asyncpg')
+
+from app.db_async import AsyncDatabaseOperations, _asyncpg_params
+
+SPEECH = {'text': 'Добрий день, чим можу допомогти?', 'filename': 'call.wav', 'language': 'uk'}
+
+def run_with_db(scenario):
+    """Run scenario(db) against a fresh pool and close it afterwards"""
+    async def main():
+        db = AsyncDatabaseOperations()
+        try:
+            return await scenario(db)
+        finally:
+            await db.close()
+    return asyncio.run(main())
+
+@pytest.fixture
+def async_db(voice_db, monkeypatch):
+    """voice_db with reads kept on the scratch database"""
+    monkeypatch.delenv('DB_READ_HOST', raising=False)
+    return voice_db
+
+def test_asyncpg_params():
+    params = {'dbname': 'voice', 'user': 'u', 'password': 'p', 'host': 'db', 'port': '5433'}
+    assert _asyncpg_params(params) == {
+        'database': 'voice', 'user': 'u', 'password': 'p', 'host': 'db', 'port': 5433
+    }
+
+def test_transcription_round_trip(async_db):
+    async def scenario(db):
+        stored, record_id = await db.store_transcription(SPEECH)
+        assert stored
+        return record_id, await db.get_transcription(record_id), await db.get_evaluation(record_id)
+
+    record_id, speech, record = run_with_db(scenario)
+    # JSONB comes back decoded, as with psycopg2
+    assert speech == SPEECH
+    assert record['status'] == 'pending' and record['evaluation'] == {'status': 'pending'}
+    async_db.execute("SELECT word_count, language FROM voice_evaluations WHERE id = %s", (record_id,))
+    assert async_db.fetchone() == (5, 'uk')
+
+def test_claim_store_and_release(async_db):
+    async def scenario(db):
+        _, first = await db.store_transcription(SPEECH)
+        _, second = await db.store_transcription(SPEECH)
+
+        claimed = await db.claim_record(first, 'worker-a', 60)
+        assert claimed == {'id': first, 'speech': SPEECH}
+        assert await db.claim_record(first, 'worker-b', 60) is None
+
+        assert await db.store_evaluation(first, {'text': '7 Добре.', 'mark': 7, 'status': 'completed'})
+        completed = await db.get_evaluation(first, include_payload=False)
+
+        assert await db.claim_record(second, 'worker-a', 60)
+        assert not await db.release_claim(second, 'worker-b', max_attempts=3)
+        assert await db.release_claim(second, 'worker-a', max_attempts=3)
+        return first, second, completed
+
+    first, second, completed = run_with_db(scenario)
+    assert completed['status'] == 'completed' and completed['mark'] == 7
+    assert completed['evaluated_at'] is not None
+    async_db.execute("SELECT id, status, claimed_by, attempts FROM voice_evaluations ORDER BY id")
+    assert async_db.fetchall() == [(first, 'completed', None, 1), (second, 'pending', None, 1)]
+
+def test_missing_record(async_db):
+    async def scenario(db):
+        return await db.get_evaluation(-1), await db.store_evaluation(-1, {'mark': 1})
+
+    assert run_with_db(scenario) == (None, False)
@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+import pytest
+
+pytest.importorskip('psycopg2')
+
+from psycopg2.extras import Json
+from app import db_operations_evaluation
+from app.db_handler import STORE_TRANSCRIPTION_SQL
+from app.db_operations_evaluation import DatabaseOperationsEvaluation
+
+def add_record(cursor, text='Добрий день, чим можу допомогти?'):
+    """Insert a pending record and return its ID"""
+    cursor.execute(STORE_TRANSCRIPTION_SQL, (
+        datetime.now(timezone.utc), None, None, None, None, None, None,
+        Json({'text': text}), Json({'status': 'pending'})
+    ))
+    return cursor.fetchone()[0]
+
+def queue_state(cursor, record_id):
+    """status, claimed_by and attempts of a record"""
+    cursor.execute("SELECT status, claimed_by, attempts FROM voice_evaluations WHERE id = %s",
+                   (record_id,))
+    return cursor.fetchone()
+
+def test_claim_pending_hands_out_each_record_once(voice_db):
+    first, second = add_record(voice_db), add_record(voice_db)
+    db = DatabaseOperationsEvaluation()
+
+    claimed_a = db.claim_pending('worker-a', batch_size=1)
+    claimed_b = db.claim_pending('worker-b', batch_size=5)
+
+    assert [record['id'] for record in claimed_a] == [first]
+    assert [record['id'] for record in claimed_b] == [second]
+    assert claimed_a[0]['speech']['text']
+    assert db.claim_pending('worker-c') == []
+    assert queue_state(voice_db, first) == ('processing', 'worker-a', 1)
+
+def test_expired_lease_is_reclaimed(voice_db):
+    record_id = add_record(voice_db)
+    db = DatabaseOperationsEvaluation()
+
+    db.claim_pending('worker-a', lease_seconds=0)
+    claimed = db.claim_pending('worker-b')
+
+    assert [record['id'] for record in claimed] == [record_id]
+    assert queue_state(voice_db, record_id) == ('processing', 'worker-b', 2)
+    assert db.renew_lease([record_id], 'worker-a') == []
+    assert db.renew_lease([record_id], 'worker-b') == [record_id]
+
+def test_expired_final_attempt_is_failed(voice_db, monkeypatch):
+    monkeypatch.setattr(db_operations_evaluation, 'MAX_ATTEMPTS', 1)
+    record_id = add_record(voice_db)
+    db = DatabaseOperationsEvaluation()
+
+    db.claim_pending('worker-a', lease_seconds=0)
+
+    assert db.claim_pending('worker-b') == []
+    assert queue_state(voice_db, record_id) == ('failed', None, 1)
+
+def test_release_claim_requeues_until_attempts_are_used(voice_db, monkeypatch):
+    monkeypatch.setattr(db_operations_evaluation, 'MAX_ATTEMPTS', 2)
+    record_id = add_record(voice_db)
+    db = DatabaseOperationsEvaluation()
+
+    db.claim_pending('worker-a')
+    assert db.release_claim(record_id, 'worker-a')
+    assert queue_state(voice_db, record_id) == ('pending', None, 1)
+
+    db.claim_pending('worker-a')
+    assert db.release_claim(record_id, 'worker-a')
+    assert queue_state(voice_db, record_id)[0] == 'failed'
+
+def test_store_evaluations_completes_claimed_records(voice_db):
+    record_id = add_record(voice_db)
+    db = DatabaseOperationsEvaluation()
+    db.claim_pending('worker-a')
+
+    stored = db.store_evaluations([(record_id, {'text': '7 Добре', 'mark': 7})], worker_id='worker-a')
+
+    assert stored == [record_id]
+    assert queue_state(voice_db, record_id) == ('completed', None, 1)
+    voice_db.execute("SELECT v.mark, v.evaluated_at IS NOT NULL, p.evaluation->>'text' "
+                     "FROM voice_evaluations v JOIN voice_evaluation_payloads p USING (id, created_at) "
+                     "WHERE v.id = %s", (record_id,))
+    assert voice_db.fetchone() == (7, True, '7 Добре')
+
+def test_store_evaluations_skips_records_claimed_elsewhere(voice_db):
+    record_id = add_record(voice_db)
+    db = DatabaseOperationsEvaluation()
+    db.claim_pending('worker-a', lease_seconds=0)
+    db.claim_pending('worker-b')
+
+    assert db.store_evaluations([(record_id, {'text': '3 Погано', 'mark': 3})], worker_id='worker-a') == []
+    assert queue_state(voice_db, record_id) == ('processing', 'worker-b', 2)
+    voice_db.execute("SELECT evaluation->>'text' FROM voice_evaluation_payloads WHERE id = %s", (record_id,))
+    assert voice_db.fetchone()[0] is None
+
+    assert db.store_evaluations([(record_id, {'text': '8 Добре', 'mark': 8})], worker_id='worker-b') == [record_id]
@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip('llama_cpp')
+pytest.importorskip('torch')
+
+from app import fast_inference
+
+class FakeLlama:
+    """Stands in for llama_cpp.Llama: one token per word, a fixed answer"""
+    loaded = []
+
+    def __init__(self, model_path, vocab_only=False, **kwargs):
+        self.vocab_only = vocab_only
+        if not vocab_only:
+            FakeLlama.loaded.append(kwargs['n_ctx'])
+
+    def tokenize(self, data: bytes, add_bos: bool = True):
+        return [0] * (len(data.split()) + add_bos)
+
+    def create_completion(self, prompt, stream=False, **params):
+        assert not self.vocab_only
+        if stream:
+            return iter({'choices': [{'text': piece}]} for piece in ("7", " Добре", " вирішено."))
+        return {'choices': [{'text': "7 Добре вирішено."}],
+                'usage': {'prompt_tokens': 10, 'completion_tokens': 4}}
+
+@pytest.fixture
+def evaluator(tmp_path, monkeypatch):
+    """Freshly constructed evaluator whose model has not been loaded yet"""
+    models = tmp_path / 'models'
+    models.mkdir()
+    (models / fast_inference.MODEL_NAME).write_bytes(b'GGUF')
+    monkeypatch.chdir(tmp_path)
+    FakeLlama.loaded = []
+    monkeypatch.setattr(fast_inference, 'Llama', FakeLlama)
+    monkeypatch.setattr(fast_inference.LlamaGrammar, 'from_string', staticmethod(lambda *args, **kwargs: None))
+    monkeypatch.setattr(fast_inference, 'build_draft_model', lambda *args: None)
+    monkeypatch.setattr(fast_inference, 'llama_settings',
+                        lambda: {'n_threads': 1, 'n_batch': 8, 'n_gpu_layers': 0})
+    monkeypatch.setattr(fast_inference.evaluation_result_cache, 'enabled', False)
+    return fast_inference.LlamaEvaluator()
+
+def test_first_evaluation_loads_the_model(evaluator):
+    assert evaluator.model is None
+    assert evaluator.evaluate_conversation("Добрий день, чим можу допомогти?") == ("7 Добре вирішено.", 7)
+    assert FakeLlama.loaded == [fast_inference.CONTEXT_SIZES[0]]
+    assert evaluator.last_usage == {'prompt_tokens': 10, 'completion_tokens': 4}
+
+def test_first_stream_loads_the_model(evaluator):
+    items = list(evaluator.stream_conversation("Добрий день, чим можу допомогти?"))
+    assert items[0] == {'type': 'mark', 'mark': 7}
+    assert items[-1] == {'type': 'done', 'text': "7 Добре вирішено.", 'mark': 7}
+    assert len(FakeLlama.loaded) == 1
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import pytest
+
+pytest.importorskip('fastapi')
+
+from fastapi import Request
+from app.http_cache import cache_headers, is_not_modified, make_etag
+
+def request_with(**headers) -> Request:
+    """Request carrying the given headers (underscores become dashes)"""
+    raw = [(name.replace('_', '-').encode('latin-1'), value.encode('latin-1'))
+           for name, value in headers.items()]
+    return Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': raw})
+
+def http_date(moment: datetime) -> str:
+    return format_datetime(moment, usegmt=True)
+
+def test_make_etag_is_weak_and_stable():
+    etag = make_etag('evaluation', 1, 'completed', 7)
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert etag == make_etag('evaluation', 1, 'completed', 7)
+    assert etag != make_etag('evaluation', 1, 'completed', 8)
+
+def test_if_none_match():
+    etag = make_etag('x')
+    assert is_not_modified(request_with(if_none_match=etag), etag)
+    # Weak comparison ignores the W/ prefix
+    assert is_not_modified(request_with(if_none_match=etag[2:]), etag)
+    assert is_not_modified(request_with(if_none_match=f'"other", {etag}'), etag)
+    assert is_not_modified(request_with(if_none_match='*'), etag)
+    assert not is_not_modified(request_with(if_none_match=make_etag('y')), etag)
+
+def test_if_none_match_takes_precedence():
+    old = datetime.now(timezone.utc) - timedelta(hours=1)
+    request = request_with(if_none_match=make_etag('y'), if_modified_since=http_date(datetime.now(timezone.utc)))
+    assert not is_not_modified(request, make_etag('x'), old)
+
+def test_if_modified_since():
+    modified = datetime.now(timezone.utc).replace(microsecond=123456) - timedelta(minutes=5)
+    etag = make_etag('x')
+    assert is_not_modified(request_with(if_modified_since=http_date(modified)), etag, modified)
+    assert not is_not_modified(request_with(if_modified_since=http_date(modified - timedelta(seconds=1))),
+                               etag, modified)
+    assert not is_not_modified(request_with(if_modified_since='not a date'), etag, modified)
+
+def test_if_modified_since_ignored_within_current_second():
+    now = datetime.now(timezone.utc)
+    request = request_with(if_modified_since=http_date(now + timedelta(seconds=1)))
+    assert not is_not_modified(request, make_etag('x'), now)
+
+def test_last_modified_header_only_when_settled():
+    etag = make_etag('x')
+    assert 'Last-Modified' not in cache_headers(etag, datetime.now(timezone.utc))
+    past = datetime(2024, 5, 1, 12, 0, 0, tzinfo=timezone.utc)
+    headers = cache_headers(etag, past)
+    assert headers['Last-Modified'] == 'Wed, 01 May 2024 12:00:00 GMT'
+    assert headers['ETag'] == etag and headers['Cache-Control'] == 'no-cache'
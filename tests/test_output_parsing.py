@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip('llama_cpp')
+pytest.importorskip('torch')
+
+from app.fast_inference import OUTPUT_PATTERN, LlamaEvaluator, build_output_grammar
+
+def parse(raw_text: str):
+    """_parse_output does not touch the model, so no instance needs loading"""
+    return LlamaEvaluator._parse_output(object.__new__(LlamaEvaluator), raw_text)
+
+def test_reads_the_leading_mark():
+    assert parse("7 Оператор привітався та вирішив питання.") == \
+        ("7 Оператор привітався та вирішив питання.", 7)
+    assert parse("10 Бездоганна розмова.")[1] == 10
+    assert parse("1 Погано.")[1] == 1
+
+def test_normalizes_whitespace():
+    assert parse("  8   Добре\n\nвирішено.  ") == ("8 Добре вирішено.", 8)
+
+def test_missing_or_invalid_mark_is_zero():
+    assert parse("Оператор був ввічливий.")[1] == 0
+    assert parse("0 Нуль не є оцінкою.")[1] == 0
+    assert parse("11 Поза шкалою.")[1] == 0
+    assert parse("7")[1] == 0
+
+def test_output_pattern():
+    assert OUTPUT_PATTERN.match("10 text").group(1) == "10"
+    assert OUTPUT_PATTERN.match("9 text").group(1) == "9"
+    assert OUTPUT_PATTERN.match("07 text") is None
+
+def test_grammar_bounds_the_text():
+    grammar = build_output_grammar(120)
+    assert 'root ::= mark " " text' in grammar
+    assert '"10" | [1-9]' in grammar
+    assert '{1,120}' in grammar
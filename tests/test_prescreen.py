@@ -0,0 +1,80 @@
+import pytest
+from app import prescreen
+from app.prescreen import PRESCREEN_MIN_WORDS, PRESCREEN_REPEAT_MIN_WORDS, classify
+
+CONVERSATION = ("Добрий день, компанія MDM, мене звати Олена, чим можу допомогти? "
+                "Я хотів би дізнатися про статус замовлення номер 123.")
+
+def words(count, distinct=None):
+    """Text of count words cycling through distinct different words"""
+    vocabulary = [f"слово{index}" for index in range(distinct or count)]
+    return ' '.join(vocabulary[index % len(vocabulary)] for index in range(count))
+
+@pytest.mark.parametrize('text', [None, '', '   \n\t'])
+def test_empty(text):
+    assert classify(text) == 'empty'
+
+@pytest.mark.parametrize('text', [
+    'Дякую за перегляд!',
+    'Субтитри створено спільнотою Amara.org',
+    'Субтитры сделал DimaTorzok',
+    'Редактор субтитров А.Синецкая Корректор А.Егорова',
+    'Продолжение следует... Спасибо за просмотр!',
+    '...'
+])
+def test_silence(text):
+    assert classify(text) == 'silence'
+
+def test_subtitle_word_in_speech_is_not_silence():
+    text = 'Субтитри до фільму не працюють. ' + CONVERSATION
+    assert classify(text) is None
+    # A credit phrase only removes its own few words
+    assert classify('Субтитри створено спільнотою Amara.org. ' + CONVERSATION) is None
+
+@pytest.mark.parametrize('text', [
+    'Абонент тимчасово недоступний, залиште повідомлення після сигналу',
+    'Абонент недоступний',
+    'Оставьте сообщение после звукового сигнала.',
+    'Please leave a message after the tone.'
+])
+def test_short_voicemail_is_skipped(text):
+    assert classify(text) == 'voicemail'
+    assert prescreen.REASONS['voicemail'][0] == 'skipped'
+
+def test_voicemail_words_in_long_call_are_evaluated():
+    text = CONVERSATION + ' ' + words(4 * PRESCREEN_MIN_WORDS) + ' залиште повідомлення'
+    assert classify(text) is None
+
+def test_too_short_boundary():
+    assert classify(words(PRESCREEN_MIN_WORDS - 1)) == 'too_short'
+    assert classify(words(PRESCREEN_MIN_WORDS)) is None
+
+def test_repetitive_boundary():
+    # One distinct word in ten is below the default 0.2 ratio
+    assert classify(words(PRESCREEN_REPEAT_MIN_WORDS, distinct=PRESCREEN_REPEAT_MIN_WORDS // 10)) == 'repetitive'
+    # Shorter transcripts are not judged by repetition
+    assert classify(words(PRESCREEN_REPEAT_MIN_WORDS - 1, distinct=2)) is None
+    # At the ratio itself the transcript is kept
+    assert classify(words(PRESCREEN_REPEAT_MIN_WORDS, distinct=PRESCREEN_REPEAT_MIN_WORDS // 5)) is None
+
+def test_conversation_passes():
+    assert classify(CONVERSATION) is None
+
+def test_prescreen_decision_and_counters(monkeypatch):
+    monkeypatch.setattr(prescreen, 'PRESCREEN_ENABLED', True)
+    monkeypatch.setattr(prescreen, 'prescreen_stats', prescreen.PrescreenStats())
+
+    decision = prescreen.prescreen('')
+    assert decision['mark'] == 0
+    assert decision['prescreen'] == {'reason': 'empty', 'outcome': 'skipped',
+                                     'version': prescreen.PRESCREEN_VERSION}
+    assert prescreen.prescreen(CONVERSATION) is None
+
+    stats = prescreen.prescreen_stats.stats()
+    assert stats['checked'] == 2
+    assert stats['llm_calls_avoided'] == 1
+    assert stats['reasons']['empty'] == 1
+
+def test_prescreen_disabled(monkeypatch):
+    monkeypatch.setattr(prescreen, 'PRESCREEN_ENABLED', False)
+    assert prescreen.prescreen('') is None
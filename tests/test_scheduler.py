@@ -0,0 +1,115 @@
+import threading
+import time
+import pytest
+from app import scheduler
+from app.scheduler import DeadlineExceeded, Job, PriorityGate, estimate_tokens
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+def admission_order(gate, jobs):
+    """Queue jobs behind a held slot, release it and return the admission order"""
+    order = []
+    lock = threading.Lock()
+
+    def run(name, job):
+        with gate.admit(job):
+            with lock:
+                order.append(name)
+
+    with gate.admit(Job('interactive', timeout=None)):
+        threads = []
+        for name, job in jobs:
+            thread = threading.Thread(target=run, args=(name, job))
+            thread.start()
+            threads.append(thread)
+            # Queue one at a time so arrival order is deterministic
+            wait_for(lambda: sum(gate.stats()['waiting'].values()) == len(threads))
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        Job('urgent')
+
+def test_default_deadlines():
+    assert Job('backfill').deadline is None
+    assert Job('interactive', timeout=None).deadline is None
+    job = Job('interactive', timeout=10)
+    assert 9 < job.remaining() <= 10
+    assert not job.expired()
+
+def test_priority_then_shortest_job_then_arrival():
+    gate = PriorityGate('test', 1)
+    order = admission_order(gate, [
+        ('backfill', Job('backfill', cost=1)),
+        ('batch-long', Job('batch', cost=100)),
+        ('interactive-long', Job('interactive', cost=50)),
+        ('batch-short', Job('batch', cost=10)),
+        ('interactive-short', Job('interactive', cost=5)),
+        ('interactive-short-later', Job('interactive', cost=5)),
+    ])
+    assert order == ['interactive-short', 'interactive-short-later', 'interactive-long',
+                     'batch-short', 'batch-long', 'backfill']
+
+def test_aging_moves_waiting_jobs_up_one_class_per_step(monkeypatch):
+    monkeypatch.setattr(scheduler, 'SCHEDULER_AGING_SECONDS', 10)
+    backfill = Job('backfill', cost=1)
+    batch = Job('batch', cost=1)
+    interactive = Job('interactive', cost=1)
+    now = time.monotonic()
+
+    backfill.submitted_at = now - 10
+    assert backfill.sort_key(now)[0] == 1
+    backfill.submitted_at = now - 25
+    assert backfill.sort_key(now)[0] == 0
+    # Aging never goes past the most urgent class
+    backfill.submitted_at = now - 1000
+    assert backfill.sort_key(now)[0] == 0
+    assert batch.sort_key(now)[0] == 1
+    assert interactive.sort_key(now)[0] == 0
+
+def test_aged_job_is_admitted_before_newer_higher_class(monkeypatch):
+    monkeypatch.setattr(scheduler, 'SCHEDULER_AGING_SECONDS', 10)
+    gate = PriorityGate('test', 1)
+    old_backfill = Job('backfill', cost=100)
+    old_backfill.submitted_at -= 25
+    order = admission_order(gate, [
+        ('batch', Job('batch', cost=1)),
+        ('old-backfill', old_backfill),
+    ])
+    assert order == ['old-backfill', 'batch']
+
+def test_capacity_admits_several_jobs():
+    gate = PriorityGate('test', 2)
+    with gate.admit(Job('batch')):
+        with gate.admit(Job('batch')):
+            assert gate.stats()['running'] == 2
+    assert gate.stats()['running'] == 0
+    assert gate.stats()['classes']['batch']['admitted'] == 2
+
+def test_job_expiring_in_queue_is_dropped():
+    gate = PriorityGate('test', 1)
+    with gate.admit(Job('interactive', timeout=None)):
+        with pytest.raises(DeadlineExceeded):
+            with gate.admit(Job('interactive', timeout=0.05)):
+                pass
+    stats = gate.stats()
+    assert stats['classes']['interactive']['expired'] == 1
+    assert sum(stats['waiting'].values()) == 0
+
+def test_check_deadline():
+    job = Job('interactive', timeout=0.01)
+    time.sleep(0.02)
+    assert job.expired()
+    with pytest.raises(DeadlineExceeded):
+        job.check_deadline()
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('а' * 300) == 100
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import pytest
+
+pytest.importorskip('asyncpg')
+
+from app.trends import bucket_start, next_bucket
+
+KYIV = ZoneInfo('Europe/Kyiv')
+
+def test_day_bucket():
+    moment = datetime(2024, 5, 15, 13, 45, 12, 500, tzinfo=timezone.utc)
+    start = bucket_start(moment, 'day')
+    assert start == datetime(2024, 5, 15, tzinfo=timezone.utc)
+    assert next_bucket(start, 'day') == datetime(2024, 5, 16, tzinfo=timezone.utc)
+
+def test_week_bucket_starts_on_monday():
+    # 2024-05-19 is a Sunday
+    start = bucket_start(datetime(2024, 5, 19, 23, 59, tzinfo=timezone.utc), 'week')
+    assert start == datetime(2024, 5, 13, tzinfo=timezone.utc)
+    assert start.weekday() == 0
+    assert bucket_start(start, 'week') == start
+    assert next_bucket(start, 'week') == datetime(2024, 5, 20, tzinfo=timezone.utc)
+
+def test_month_bucket():
+    start = bucket_start(datetime(2024, 2, 29, 10, tzinfo=timezone.utc), 'month')
+    assert start == datetime(2024, 2, 1, tzinfo=timezone.utc)
+    assert next_bucket(start, 'month') == datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+def test_month_rolls_over_the_year():
+    start = bucket_start(datetime(2023, 12, 31, 23, tzinfo=timezone.utc), 'month')
+    assert next_bucket(start, 'month') == datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+def test_buckets_follow_the_local_time_zone():
+    # 23:30 UTC on March 30 is already March 31 in Kyiv
+    moment = datetime(2024, 3, 30, 23, 30, tzinfo=timezone.utc).astimezone(KYIV)
+    start = bucket_start(moment, 'day')
+    assert (start.year, start.month, start.day, start.hour) == (2024, 3, 31, 0)
+    assert start.utcoffset().total_seconds() == 2 * 3600
+
+def test_buckets_across_a_dst_change_are_calendar_days():
+    # Kyiv moves to summer time on 2024-03-31, so that day lasts 23 hours
+    start = bucket_start(datetime(2024, 3, 31, 12, tzinfo=KYIV), 'day')
+    end = next_bucket(start, 'day')
+    assert (end.month, end.day, end.hour) == (4, 1, 0)
+    assert end.utcoffset().total_seconds() == 3 * 3600
+    assert end.astimezone(timezone.utc) - start.astimezone(timezone.utc) == \
+        datetime(2024, 4, 1, tzinfo=timezone.utc) - datetime(2024, 3, 31, 1, tzinfo=timezone.utc)
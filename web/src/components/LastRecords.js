@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import { subscribeToEvents } from '../services/evaluationService';
 
 const API_URL = 'http://127.0.0.1:8000';
 
@@ -10,9 +11,9 @@ function LastRecords() {
   const [error, setError] = useState(null);
   const itemsPerPage = 5;
 
-  const fetchEvaluations = async () => {
+  const fetchEvaluations = async (silent = false) => {
     try {
-      setIsLoading(true);
+      if (!silent) setIsLoading(true);
       const response = await axios.get(`${API_URL}/evaluations/`, {
         timeout: 10000,
         headers: {
@@ -43,8 +44,18 @@ function LastRecords() {
 
   useEffect(() => {
     fetchEvaluations();
-    const interval = setInterval(fetchEvaluations, 60000);
-    return () => clearInterval(interval);
+    // Refresh when the server pushes a change instead of polling;
+    // bursts of events (e.g. bulk ingestion) collapse into one fetch
+    let refreshTimer = null;
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(() => fetchEvaluations(true), 1000);
+    };
+    const unsubscribe = subscribeToEvents(scheduleRefresh, { onReconnect: scheduleRefresh });
+    return () => {
+      clearTimeout(refreshTimer);
+      unsubscribe();
+    };
   }, []);
 
   const getStatusColor = (status) => {
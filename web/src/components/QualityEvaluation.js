@@ -1,5 +1,5 @@
-import React, { useState } from 'react';
-import { getEvaluation } from '../services/evaluationService';
+import React, { useState, useEffect } from 'react';
+import { getEvaluation, streamEvaluation, subscribeToEvents } from '../services/evaluationService';
 import EvaluationDisplay from './EvaluationDisplay';
 
 function QualityEvaluation() {
@@ -7,8 +7,30 @@ function QualityEvaluation() {
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
+  // Mark and explanation shown while the evaluation is being generated
+  const [streamed, setStreamed] = useState(null);
 
-  const handleEvaluation = async () => {
+  // While the record is still being evaluated, wait for the server to push
+  // its completion instead of re-fetching
+  useEffect(() => {
+    if (!result || result.evaluation.status === 'completed') return undefined;
+    const id = Number(recordId);
+    return subscribeToEvents(async (event) => {
+      if (event.status === 'completed' || event.status === 'failed') {
+        try {
+          setResult(await getEvaluation(id));
+        } catch (err) {
+          setError(err.message);
+        }
+      }
+    }, { recordId: id });
+  }, [result]); // eslint-disable-line react-hooks/exhaustive-deps
+
+  // Close an open evaluation stream when leaving the page
+  const [closeStream, setCloseStream] = useState(null);
+  useEffect(() => () => closeStream && closeStream(), [closeStream]);
+
+  const handleEvaluation = () => {
     if (!recordId) {
       setError('Будь ласка, введіть ID запису');
       return;
@@ -17,20 +39,35 @@ function QualityEvaluation() {
     setIsLoading(true);
     setError(null);
     setResult(null);
+    setStreamed(null);
 
-    try {
-      const evaluationData = await getEvaluation(recordId);
-      if (evaluationData) {
-        setResult(evaluationData);
-        setError(null);
+    // The mark arrives within a second; the explanation follows as it is generated
+    const close = streamEvaluation(recordId, {
+      onMark: (mark) => setStreamed({ mark, text: '' }),
+      onToken: (text) => setStreamed((current) => current && { ...current, text: current.text + text }),
+      onDone: async () => {
+        try {
+          const evaluationData = await getEvaluation(recordId);
+          if (evaluationData) {
+            setResult(evaluationData);
+            setStreamed(null);
+          }
+        } catch (err) {
+          console.error('Evaluation error:', err);
+          setError(err.message);
+        } finally {
+          setIsLoading(false);
+        }
+      },
+      onError: (message) => {
+        console.error('Evaluation error:', message);
+        setError(message);
+        setResult(null);
+        setStreamed(null);
+        setIsLoading(false);
       }
-    } catch (err) {
-      console.error('Evaluation error:', err);
-      setError(err.message);
-      setResult(null);
-    } finally {
-      setIsLoading(false);
-    }
+    });
+    setCloseStream(() => close);
   };
 
   return (
@@ -56,6 +93,17 @@ function QualityEvaluation() {
       </div>
       
       {error && <div className="error-message">{error}</div>}
+
+      {streamed && !result && (
+        <div className="result-section">
+          <div className="result-item">
+            <strong>Оцінка:</strong> {streamed.mark}
+          </div>
+          <div className="result-item">
+            <div className="text-content">{streamed.text}</div>
+          </div>
+        </div>
+      )}
       
       {result && (
         <div className="result-section">
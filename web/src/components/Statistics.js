@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
+import { subscribeToEvents } from '../services/evaluationService';
 
 const API_URL = 'http://127.0.0.1:8000';
 
@@ -8,9 +9,9 @@ function Statistics() {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState(null);
 
-  const fetchStatistics = async () => {
+  const fetchStatistics = async (silent = false) => {
     try {
-      setIsLoading(true);
+      if (!silent) setIsLoading(true);
       const response = await axios.get(`${API_URL}/statistics/`, {
         timeout: 10000, // Increased to 10 seconds
         headers: {
@@ -41,9 +42,18 @@ function Statistics() {
 
   useEffect(() => {
     fetchStatistics();
-    // Refresh every minute instead of 30 seconds
-    const interval = setInterval(fetchStatistics, 60000);
-    return () => clearInterval(interval);
+    // Refresh when the server pushes a change instead of polling;
+    // bursts of events (e.g. bulk ingestion) collapse into one fetch
+    let refreshTimer = null;
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(() => fetchStatistics(true), 1000);
+    };
+    const unsubscribe = subscribeToEvents(scheduleRefresh, { onReconnect: scheduleRefresh });
+    return () => {
+      clearTimeout(refreshTimer);
+      unsubscribe();
+    };
   }, []);
 
   if (error) return <div className="error-message">{error}</div>;
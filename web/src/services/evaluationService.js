@@ -44,4 +44,60 @@ const getEvaluation = async (recordId) => {
   }
 };
 
-export { getEvaluation }; 
\ No newline at end of file
+/**
+ * Subscribe to record change events pushed by the API over Server-Sent Events
+ * @param {Function} onEvent - Called with each event ({event, id, status, mark})
+ * @param {Object} options - Optional settings
+ * @param {number} options.recordId - Only receive events for this record
+ * @param {Function} options.onReconnect - Called when the stream (re)connects
+ * @returns {Function} Unsubscribe function that closes the stream
+ */
+const subscribeToEvents = (onEvent, { recordId, onReconnect } = {}) => {
+  const query = recordId ? `?record_id=${recordId}` : '';
+  const source = new EventSource(`${API_URL}/events/${query}`);
+
+  source.onmessage = (message) => {
+    try {
+      onEvent(JSON.parse(message.data));
+    } catch (error) {
+      console.error('Invalid event payload:', error);
+    }
+  };
+  if (onReconnect) {
+    source.onopen = onReconnect;
+  }
+
+  return () => source.close();
+};
+
+/**
+ * Evaluate a record with the result streamed over Server-Sent Events
+ * @param {number} recordId - The ID of the record to evaluate
+ * @param {Object} handlers - Callbacks for stream events
+ * @param {Function} handlers.onMark - Called with the mark as soon as it is generated
+ * @param {Function} handlers.onToken - Called with each piece of explanation text
+ * @param {Function} handlers.onDone - Called with the stored evaluation ({text, mark, ...})
+ * @param {Function} handlers.onError - Called with an error message
+ * @returns {Function} Function that closes the stream
+ */
+const streamEvaluation = (recordId, { onMark, onToken, onDone, onError }) => {
+  const source = new EventSource(`${API_URL}/evaluate/${recordId}/stream`);
+  const parse = (message) => JSON.parse(message.data);
+
+  source.addEventListener('mark', (message) => onMark(parse(message).mark));
+  source.addEventListener('token', (message) => onToken(parse(message).text));
+  source.addEventListener('done', (message) => {
+    source.close();
+    onDone(parse(message));
+  });
+  source.addEventListener('error', (message) => {
+    source.close();
+    // Server-sent error events carry data; connection failures do not
+    const detail = message.data ? parse(message).detail : null;
+    onError(detail === 'Record not found' ? 'Запису нема' : `Помилка отримання оцінки: ${detail || 'зʼєднання перервано'}`);
+  });
+
+  return () => source.close();
+};
+
+export { getEvaluation, streamEvaluation, subscribeToEvents }; 
\ No newline at end of file